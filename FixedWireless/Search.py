@@ -1,23 +1,42 @@
-import arcpy
+from __future__ import annotations
+
 import logging
-import pandas as pd
-import tqdm
 from os import path
-from arcpy import env
 from datetime import datetime
 from zipfile import ZipFile
 from collections import OrderedDict
 from collections import defaultdict as dd
 from typing import Optional
-from arcgis.features import GeoAccessor
 
 # Fixed Wireless Codebase Imports
 from FixedWireless.postgis.connect import ODW
+from FixedWireless.postgis.async_connect import AsyncODW, run_sync
+from FixedWireless.postgis.candidate_cache import CandidateCache
 from FixedWireless.postgis import queries as queries
 from FixedWireless.utils import google as google
 from FixedWireless.utils import siklu as siklu
 from FixedWireless.utils import helpers as helpers
 from FixedWireless.utils import arcgis as arc
+from FixedWireless.utils import lazy as lazy
+
+# Heavy dependencies load on first use: pandas when the search is set up, arcpy/arcgis only for the geoprocessing
+# stages (parse_source_site & construct_features), tqdm when execute_process runs.
+arcpy = lazy.lazy_import('arcpy', hint='arcpy is only available inside an ArcGIS Pro Python environment.')
+pd = lazy.lazy_import('pandas')
+tqdm = lazy.lazy_import('tqdm')
+GeoAccessor = lazy.lazy_import('arcgis.features', 'GeoAccessor')
+local_search = lazy.lazy_import('FixedWireless.postgis.local_search')
+dem = lazy.lazy_import('FixedWireless.utils.dem')
+link_budget = lazy.lazy_import('FixedWireless.utils.link_budget')
+candidate_table = lazy.lazy_import('FixedWireless.utils.candidate_table')
+ranker = lazy.lazy_import('FixedWireless.utils.ranking')
+open_levels = lazy.lazy_import('FixedWireless.utils.open_levels')
+
+SEARCH_BACKENDS = ('odw', 'local')
+
+ELEVATION_BACKENDS = ('google', 'dem')
+
+LINK_BUDGET_BACKENDS = ('siklu', 'itu')
 
 LOCAL_SCRATCH_FOLDER = r'C:\Users\kryan\Documents\Local_Pro_Projects\Fixed Wireless\FixedWireless\scratch_folder'
 
@@ -50,7 +69,20 @@ class IdentifyCandidates:
             input_max_lit: Optional[int] = 0,
             input_max_re: Optional[int] = 0,
             input_max_cci_sites: Optional[int] = 0,
-            scoring_excel: Optional[str] = None
+            scoring_excel: Optional[str] = None,
+            concurrent_queries: Optional[bool] = True,
+            cache_results: Optional[bool] = True,
+            search_backend: Optional[str] = 'odw',
+            vertex_table: Optional[bool] = False,
+            fcc_count_table: Optional[bool] = False,
+            pipeline: Optional[bool] = False,
+            elevation_backend: Optional[str] = 'google',
+            dem_path: Optional[str] = None,
+            elevation_cache: Optional[bool] = True,
+            link_budget_backend: Optional[str] = 'siklu',
+            link_budget_cache: Optional[bool] = True,
+            min_tx_agl: Optional[float] = None,
+            max_ranked: Optional[int] = None
     ):
         """
         Initializes IdentifyCandidates instance and stores the parameters supplied prior to runtime that will be
@@ -69,20 +101,43 @@ class IdentifyCandidates:
         :param input_max_lit: Maximum number of lit building candidates to allow
         :param input_max_re: Maximum number of real estate candidates to allow (ASD & MGT)
         :param input_max_cci_sites: Maximum number of CCI Sites candidates to allow
+        :param concurrent_queries: Dispatch the per candidate type search & ranking queries concurrently
+        :param cache_results: Reuse locally cached initial search results for the same location & parameters
+        :param search_backend: ['odw', 'local'] run the initial search on the server or against an in-memory snapshot
+        :param vertex_table: Read lit building vertices from workspace.fw_lit_building_vertices (migration 002)
+        :param fcc_count_table: Read lit building FCC counts from workspace.fw_building_fcc_counts (migration 003)
+        :param pipeline: Fetch candidates and their ranking attributes together (queries.bind_*_ranked_query), skipping
+                         extract_unique_ids & ranking. The lit building ranked query computes its own vertices, so
+                         vertex_table does not apply
+        :param elevation_backend: ['google', 'dem'] terrain source for check_google_los, 'dem' reads local GeoTIFFs
+        :param dem_path: GeoTIFF DEM file or folder of tiles (or a list of them) used by the 'dem' elevation_backend
+        :param elevation_cache: Keep Google elevation samples locally and only request the parts of a path not cached
+        :param link_budget_backend: ['siklu', 'itu'] Siklu link budget web API or the offline ITU-R model in
+                                    utils.link_budget
+        :param link_budget_cache: Keep Siklu link budget reports locally and only request candidates not cached
+        :param min_tx_agl: Clearance height (ft) a CCI site mount has to reach, TX AGL becomes the lowest open level
+                           mount at or above it instead of the highest mount available
+        :param max_ranked: Only rank (and write to the sorted sheet) the best max_ranked candidates, the rest keep an
+                           empty fw_rank. All candidates are ranked by default
         """
         self._start = datetime.now()  # get timestamp for logfile name
         self._logfile = f"FW_Log_{self._start.strftime('%d%b%Y-%I%M%S')}"  # construct name
         self.odw = ODW(username='CC_GEO_PRIVATE')  # helper class that stores ODW connection params
+        self.async_odw = AsyncODW(self.odw)  # runs independent queries concurrently on pooled connections
         self.logger = None  # setup_logging assigns the root logger to this field
         self.setup_logging() # initialize logger
+        self._wgs84 = None  # geoprocessing environment is applied by init_geoprocessing when arcpy is first needed
         self.workspace = r'C:\Users\kryan\Documents\Local_Pro_Projects\Fixed Wireless\FixedWireless\scratch_folder\Testing.gdb' # TODO swap after test env.scratchGDB  # get path to scratch GDB
         self.folder = LOCAL_SCRATCH_FOLDER  # TODO Swap out after testing self.folder = env.scratchFolder
         self.project = helpers.sanitize_value(output_name)  # Check project name for invalid characters & replace if any
         self.source_site = source_site_coordinates
         self.latitude = latitude
         self.longitude = longitude
+        self.targets = None  # every source site as target_id/longitude/latitude, searched together by batch_search
         if not raw_coordinates:
             self.parse_source_site()
+        else:
+            self.targets = pd.DataFrame({'target_id': [0], 'longitude': [longitude], 'latitude': [latitude]})
         self.min_speed = input_min_speed
         self.max_neighbors = input_max_neighbors
         self.distance = distance
@@ -92,6 +147,31 @@ class IdentifyCandidates:
         self.non_lit = include_non_lit
         self.check_google = google_check
         self.limit_by_type = extra_control
+        self.concurrent_queries = concurrent_queries
+        self.candidate_cache = CandidateCache(self.odw) if cache_results else None
+        if search_backend not in SEARCH_BACKENDS:
+            raise ValueError(f"search_backend must be one of {SEARCH_BACKENDS}, got {search_backend!r}")
+        self.search_backend = search_backend
+        self.vertex_table = vertex_table
+        self.fcc_count_table = fcc_count_table
+        if pipeline and search_backend != 'odw':
+            raise ValueError('pipeline mode reads ranking attributes from ODW and requires the odw search_backend')
+        self.pipeline = pipeline
+        if elevation_backend not in ELEVATION_BACKENDS:
+            raise ValueError(f"elevation_backend must be one of {ELEVATION_BACKENDS}, got {elevation_backend!r}")
+        if elevation_backend == 'dem' and not dem_path:
+            raise ValueError("elevation_backend 'dem' requires dem_path")
+        self.elevation_backend = elevation_backend
+        self.dem_path = dem_path
+        self._elevation_model = None
+        self.elevation_cache = elevation_cache
+        if link_budget_backend not in LINK_BUDGET_BACKENDS:
+            raise ValueError(f"link_budget_backend must be one of {LINK_BUDGET_BACKENDS}, got {link_budget_backend!r}")
+        self.link_budget_backend = link_budget_backend
+        self.link_budget_cache = link_budget_cache
+        self.min_tx_agl = min_tx_agl
+        self.max_ranked = max_ranked
+        self._elevation_fetcher = None
 
         # property placeholders
         self._max_lit_buildings = -1
@@ -116,14 +196,17 @@ class IdentifyCandidates:
 
         # Result Data
         self.unique_ids = dd(list)  # collections.defaultdict factory for dict of lists e.g. {<default>: []}
-        self.ranking_dataframes = dict()  # keeps track of individual ranking results that will be written to excel
+        self.ranking_tables = dict()  # {candidate type: CandidateTable} ranking results that will be written to excel
+        self.output_table = None  # candidates joined with their ranking attributes by assemble_output_dataframe
         self.output_data = None  # final dataframe where results are assembled
         self.output_data_all = None
         self.output_data_sorted = None
         self.output_fields = []
         
         # Instantiate empty dataframes to receive query results
-        self.candidates = pd.DataFrame(columns=queries.CANDIDATE_FIELDS)  # initial_search query results are appended here
+        self.candidate_table = candidate_table.CandidateTable.from_pandas(
+            pd.DataFrame(columns=queries.CANDIDATE_FIELDS)
+        )  # initial_search query results are appended here, one record batch per query
         self.lit_building_ranking = pd.DataFrame(columns=queries.LIT_BUILDING_RANKING_FIELDS)  # lit building ranks
 
         # Not always populated
@@ -132,7 +215,7 @@ class IdentifyCandidates:
         self.real_estate_mgt_ranking = pd.DataFrame(columns=queries.REAL_ESTATE_MGT_RANKING_FIELDS)
 
         # Siklu Budget API Dataframe
-        self.siklu_api_responses = pd.DataFrame(columns=siklu.SIKLU_FIELDS)  # Link reports are appended here
+        self.siklu_api_responses = pd.DataFrame(columns=siklu.SIKLU_FIELDS)  # Link reports, aligned to output_data
 
         # Feature Class Params
         self.candidate_point_fields = []
@@ -142,11 +225,6 @@ class IdentifyCandidates:
         self.line_arrays = []
         self.sanitized = []
 
-        # Geoprocessing environment settings
-        env.outputCoordinateSystem = arcpy.SpatialReference(4326)
-        env.overwriteOutput = True
-        self.wgs84 = arcpy.SpatialReference(4326)
-
         # Scoring Template
         self.score_inputs = pd.read_excel(scoring_excel) if scoring_excel else None
 
@@ -193,6 +271,33 @@ class IdentifyCandidates:
         self._xlsx_writer = pd.ExcelWriter(self._xlsx_path)
         self.logger.debug('Output Zip & Excel handlers instantiated.')
 
+    def init_geoprocessing(self) -> None:
+        """
+        Imports arcpy (if it is not already loaded by the host application) and applies the geoprocessing environment
+        settings. Only the stages that create or read ESRI data call this.
+        """
+        if self._wgs84 is not None:
+            return
+
+        arcpy.env.outputCoordinateSystem = arcpy.SpatialReference(4326)
+        arcpy.env.overwriteOutput = True
+        self._wgs84 = arcpy.SpatialReference(4326)
+        self.logger.debug(f"Geoprocessing environment initialized - import times: {lazy.import_times()}")
+
+    @property
+    def wgs84(self):
+        self.init_geoprocessing()
+        return self._wgs84
+
+    @staticmethod
+    def progressor(function_name: str, *args, **kwargs) -> None:
+        """
+        Forward to the arcpy progressor functions when running inside a geoprocessing host, where arcpy is already
+        imported. Outside of ArcGIS this is a no-op so that progress reporting never triggers the arcpy import.
+        """
+        if lazy.is_loaded('arcpy'):
+            getattr(arcpy, function_name)(*args, **kwargs)
+
     @property
     def distance(self) -> int:
         """
@@ -374,6 +479,18 @@ class IdentifyCandidates:
 
         self.logger.debug('GNP parameter CSV added to Zip directory')
 
+    def fetch_dataframes(self, statements: OrderedDict) -> OrderedDict:
+        """
+        Runs each SQL string / bound statement and returns {name: DataFrame} in the order supplied. When
+        concurrent_queries is set the statements are dispatched together through AsyncODW, so database wall time
+        approaches the slowest query rather than the sum of all of them.
+        """
+        if self.concurrent_queries and len(statements) > 1:
+            self.logger.debug(f"Dispatching {len(statements)} queries concurrently")
+            return run_sync(self.async_odw.gatherDataFrames(statements))
+
+        return OrderedDict((name, self.odw.fetchDataFrame(statement)) for name, statement in statements.items())
+
     def initial_search(self) -> None:
 
         """
@@ -384,66 +501,193 @@ class IdentifyCandidates:
 
         self.logger.debug('Beginning Initial Search...')
 
+        if self.pipeline:
+            lit_query = 'bind_lit_building_ranked_fcc_query' if self.fcc_count_table else 'bind_lit_building_ranked_query'
+        else:
+            lit_query = 'bind_lit_building_vertex_query' if self.vertex_table else 'bind_lit_building_query'
+
+        suffix = '_ranked_query' if self.pipeline else '_query'
+
         if self.non_lit:
 
             query_dict = {
-                'build_lit_building_query': self.max_lit_buildings,
-                'build_asd_real_estate_query': self.max_real_estate,
-                'build_mgt_real_estate_query': self.max_real_estate,
-                'build_macro_cci_sites_query': self.max_cci_sites
+                lit_query: self.max_lit_buildings,
+                f'bind_asd_real_estate{suffix}': self.max_real_estate,
+                f'bind_mgt_real_estate{suffix}': self.max_real_estate,
+                f'bind_macro_cci_sites{suffix}': self.max_cci_sites
             }
 
         else:
             query_dict = {
-                'build_lit_building_query': self.max_lit_buildings,
-                'build_macro_cci_sites_query': self.max_cci_sites
+                lit_query: self.max_lit_buildings,
+                f'bind_macro_cci_sites{suffix}': self.max_cci_sites
             }
 
+        self.logger.debug(f"{len(query_dict)} total queries included in initial search")
+
+        if self.search_backend == 'local':
+            search_results = self.snapshot_search(query_dict)
+        else:
+            search_results = self.odw_search(query_dict)
+
+        for function_name, results in search_results.items():
+
+            self.logger.debug(f"{'_'.join(function_name.split('_')[1:-1])} returned {results.shape[0]} records w/in {self.distance}km")
+
+            self.candidate_table.append(results)
+
+            if self.pipeline:
+                self.collect_ranking_attributes(function_name, results)
+
+        self.candidate_table.fill_null('height', float(30))
+
+        self.logger.debug("Filled Candidates DF NULL height values with value -> 30.0")
+
+    def odw_search(self, query_dict: dict) -> OrderedDict:
+
+        """
+        Runs the initial search candidate queries against ODW, serving repeat searches from the candidate cache
+        :param query_dict: {queries.bind_* function name: limit}
+        :return: {function name: candidate DataFrame} in query_dict order
+        """
+
         param_template = [self.longitude, self.latitude, self.distance]
 
-        self.logger.debug(f"{len(query_dict)} total queries included in initial search")
+        statements = OrderedDict()
+        cache_keys = dict()
+        cached = dict()
+
+        if self.candidate_cache is not None and self.candidate_cache.validate():
+            self.logger.debug('Source tables changed, candidate cache cleared')
 
         for function_name, limit_value in query_dict.items():
 
             parameters = param_template[:]
             parameters.append(limit_value)
 
-            if function_name == 'build_macro_cci_sites_query':
+            if function_name.startswith('bind_macro_cci_sites_'):
                 parameters.append(self.non_lit)
 
-            sql_string = getattr(queries, function_name)(*parameters)
+            if self.candidate_cache is not None:
+                cache_keys[function_name] = self.candidate_cache.key(function_name, *parameters[:4], self.non_lit)
+                hit = self.candidate_cache.get(cache_keys[function_name])
+                if hit is not None:
+                    self.logger.debug(f"{function_name} served from candidate cache")
+                    cached[function_name] = hit
+                    continue
+
+            statements[function_name] = getattr(queries, function_name)(*parameters)
 
-            results = pd.read_sql(sql_string, self.odw.connection)
+        fetched = self.fetch_dataframes(statements)
 
-            self.logger.debug(f"{'_'.join(function_name.split('_')[1:-1])} returned {results.shape[0]} records w/in {self.distance}km")
+        for function_name, results in fetched.items():
+            if function_name in cache_keys:
+                self.candidate_cache.set(cache_keys[function_name], results)
 
-            self.candidates = self.candidates.append(results, ignore_index=True)
+        return OrderedDict(
+            (function_name, cached[function_name] if function_name in cached else fetched[function_name])
+            for function_name in query_dict
+        )
 
-        self.candidates['height'] = self.candidates['height'].fillna(float(30))
+    def snapshot_search(self, query_dict: dict) -> OrderedDict:
 
-        self.logger.debug("Filled Candidates DF NULL height values with value -> 30.0")
+        """
+        Answers the initial search candidate queries from the in-memory ODW snapshot (postgis.local_search)
+        :param query_dict: {queries.bind_* function name: limit}
+        :return: {function name: candidate DataFrame} in query_dict order
+        """
+
+        engine = local_search.LocalCandidateSearch.shared(self.odw)
+
+        return OrderedDict(
+            (
+                function_name,
+                engine.search(
+                    local_search.FUNCTION_CANDIDATE_TYPES[function_name], self.longitude, self.latitude, self.distance,
+                    limit_value, self.non_lit
+                )
+            )
+            for function_name, limit_value in query_dict.items()
+        )
+
+    def batch_search(self, targets=None, method: str = 'array'):
+
+        """
+        Initial search for every source site (or the supplied targets) in a single statement on ODW
+        :param targets: DataFrame of target_id/longitude/latitude (optionally distance), defaults to the source sites
+        :param method: ['array', 'temp_table'] how the targets are sent to PostGIS
+        :return: DataFrame of target_id + queries.CANDIDATE_FIELDS
+        """
+
+        limits = OrderedDict([('ospi', self.max_lit_buildings)])
+        if self.non_lit:
+            limits['re_asd'] = self.max_real_estate
+            limits['re_mgt'] = self.max_real_estate
+        limits['cci_sites'] = self.max_cci_sites
+
+        targets = self.targets if targets is None else targets
+
+        results = self.odw.batchSearchToDataFrame(
+            targets, limits, distance=self.distance, include_non_lit=self.non_lit, method=method
+        )
+
+        self.logger.debug(f"Batch search returned {results.shape[0]} records for {len(targets)} targets")
+
+        results['height'] = results['height'].fillna(float(30))
+
+        return results
+
+    @property
+    def elevation_model(self):
+        if self._elevation_model is None:
+            self._elevation_model = dem.ElevationModel.from_paths(self.dem_path)
+            self.logger.debug(f"Opened {len(self._elevation_model.tiles)} DEM tiles")
+        return self._elevation_model
+
+    @property
+    def candidates(self) -> pd.DataFrame:
+        """
+        initial_search results as a DataFrame, materialised from candidate_table on every access.
+        """
+        return self.candidate_table.to_pandas()
+
+    @property
+    def elevation_fetcher(self) -> google.ElevationFetcher:
+        if self._elevation_fetcher is None:
+            self._elevation_fetcher = google.ElevationFetcher(
+                cache=google.ElevationCache() if self.elevation_cache else None, logger=self.logger
+            )
+        return self._elevation_fetcher
 
     def check_google_los(self) -> None:
 
-        self.candidates['Clearance_Score'] = self.candidates.apply(lambda row: google.get_elevation_path(row.lat, row.long, self.latitude, self.longitude, row.height), axis=1)
+        lat, lon, height = (self.candidate_table.column(field) for field in ('lat', 'long', 'height'))
 
-        delete_indices = self.candidates['Clearance_Score'] == 'Delete'
-        if any(delete_indices.values.tolist()):
-            self.logger.debug(f"{len(delete_indices)} Candidates to be removed after Google elevation check")
+        if self.elevation_backend == 'dem':
+            scores = dem.clearance_scores(self.elevation_model, lat, lon, self.latitude, self.longitude, height)
+        else:
+            scores = self.elevation_fetcher.clearance_scores(lat, lon, self.latitude, self.longitude, height)
+
+        self.candidate_table.set_column('Clearance_Score', scores)
 
-            self.candidates.drop(delete_indices, inplace=True, axis=1)
+        delete_indices = scores == 'Delete'
+        if delete_indices.any():
+            self.logger.debug(f"{int(delete_indices.sum())} Candidates to be removed after Google elevation check")
 
-        self.candidates.reset_index(drop=True, inplace=True)
+            self.candidate_table = self.candidate_table.filter(~delete_indices)
 
-        self.logger.debug(f"{self.candidates.shape[0]} Candidates remain after Google elevation check")
+            # pipeline mode collected the ranking attributes before this check, keep only the remaining candidates
+            # in the all_<type> sheets as ranking() would
+            remaining = self.candidate_table.column('id')
+            for short_name, ranks in self.ranking_tables.items():
+                self.ranking_tables[short_name] = ranks.filter(pd.Series(ranks.column('id')).isin(remaining))
 
-    # Vectorized method for Pandas DataFrame
-    def categorize_id(self, row) -> None:
-        self.unique_ids[row['candidate_type']].append(row['id'])
+        self.logger.debug(f"{len(self.candidate_table)} Candidates remain after Google elevation check")
 
     def extract_unique_ids(self) -> None:
         self.logger.debug("Begin extracting unique ID values")
-        self.candidates.apply(self.categorize_id, axis=1)
+        for candidate_type, ids in self.candidate_table.groups('candidate_type').items():
+            self.unique_ids[candidate_type].extend(ids)
         nl = '\n'
         self.logger.debug(f"{nl.join([ctype +': ' + str(len(id_list)) for ctype, id_list in self.unique_ids.items()])}")
 
@@ -451,16 +695,18 @@ class IdentifyCandidates:
         """
         Constructs a dictionary of query function identifiers and their corresponding lists of unique IDs based on
         the user supplied parameter include_non_lit. Each query function is stored in the postgis.queries module and
-        acts as template that inserts the query parameters (unique ID). The SQL string is passed via Pandas
-        read_sql() method where the record set returned is converted on the fly into a dataframe.
+        acts as template that binds the query parameters (unique ID list). The bound statement is passed to
+        ODW.fetchDataFrame where the record set returned is converted on the fly into a dataframe.
 
         """
         self.logger.debug('Begin Ranking...')
 
+        lit_rank_query = 'build_lit_building_rank_fcc_query' if self.fcc_count_table else 'build_lit_building_rank_query'
+
         if self.non_lit:
 
             query_dict = OrderedDict([
-                ('build_lit_building_rank_query', self.unique_ids['ospi']),
+                (lit_rank_query, self.unique_ids['ospi']),
                 ('build_asd_real_estate_rank_query', self.unique_ids['re_asd']),
                 ('build_mgt_real_estate_rank_query', self.unique_ids['re_mgt']),
                 ('build_macro_cci_sites_rank_query', self.unique_ids['cci_sites'])
@@ -468,106 +714,101 @@ class IdentifyCandidates:
 
         else:
             query_dict = OrderedDict([
-                ('build_lit_building_rank_query', self.unique_ids['ospi']),
+                (lit_rank_query, self.unique_ids['ospi']),
                 ('build_macro_cci_sites_rank_query', self.unique_ids['cci_sites'])
             ])
 
         self.logger.debug(f"{len(query_dict)} total ranking queries")
 
+        statements = OrderedDict()
+
         for function_name, unique_ids in query_dict.items():
             if not unique_ids:
                 self.logger.warning(f"No unique IDs for {function_name}")
                 continue
-            short_name = '_'.join(function_name.split('_')[1:-2])
 
-            sql_string = getattr(queries, function_name)(unique_ids)
+            statements[function_name] = getattr(queries, function_name)(unique_ids)
 
             self.logger.debug(f"calling {function_name}")
 
-            results = pd.read_sql(sql_string, self.odw.connection)
+        for function_name, results in self.fetch_dataframes(statements).items():
+            short_name = '_'.join(function_name.replace('_rank_fcc_', '_rank_').split('_')[1:-2])
 
             self.logger.debug(f"completed {function_name} - {results.shape[0]} records")
 
-            self.ranking_dataframes.update({short_name: results})
+            self.ranking_tables.update({short_name: candidate_table.CandidateTable.from_pandas(results)})
 
         self.logger.debug("Ranking complete")
 
+    def collect_ranking_attributes(self, function_name: str, results: pd.DataFrame) -> None:
+        """
+        Pipeline mode counterpart of ranking(): splits the ranking attributes returned by a queries.bind_*_ranked_query
+        statement from its candidate fields, one row per candidate id, so the all_<type> Excel sheets are unchanged.
+        """
+        if results.empty:
+            self.logger.warning(f"No unique IDs for {function_name}")
+            return
+
+        short_name = '_'.join(function_name.replace('_ranked_fcc_', '_ranked_').split('_')[1:-2])
+        rank_fields = [
+            field for field in results.columns if field not in queries.CANDIDATE_FIELDS and field != 'pnt_geom'
+        ]
+
+        self.ranking_tables.update({
+            short_name: candidate_table.CandidateTable.from_pandas(results[['id'] + rank_fields].drop_duplicates('id'))
+        })
+
     def assemble_output_dataframe(self) -> None:
         """
         Depending on the number of dataframes returned by the ranking() method this method combines the resulting
-        ranking dataframes into a single object and merges it with the candidates dataframe.
+        ranking tables into a single table and joins it with the candidate table.
         """
         self.logger.debug('Assembling output dataframe')
-        if len(self.ranking_dataframes) > 1:
-
-            self.logger.debug('Concatenating ranking dataframes')
-            combined_ranks = pd.concat(self.ranking_dataframes, ignore_index=True, sort=False)
-
-            self.logger.debug('Merging combined ranking dataframes with candidate dataframe')
-            self.output_data = self.candidates.merge(
-                combined_ranks,
-                left_on=self.candidates.id.astype(str),
-                right_on=combined_ranks.id.astype(str),
-                how='left',
-                sort=False,
-                suffixes=['', '_Drop']
-            )
+        if self.pipeline and self.ranking_tables:
 
-        elif len(self.ranking_dataframes) == 1:
+            self.logger.debug('Candidates already carry their ranking attributes (pipeline mode)')
+            self.output_table = self.candidate_table
 
-            self.logger.debug('Merging single ranking dataframe with candidate dataframe')
+        elif self.ranking_tables:
+
+            self.logger.debug(f"Joining {len(self.ranking_tables)} ranking table(s) with the candidate table")
+            combined_ranks = candidate_table.CandidateTable()
+            for ranks in self.ranking_tables.values():
+                combined_ranks.append(ranks)
+
+            self.output_table = self.candidate_table.join(combined_ranks, suffix='_Drop')
 
-            combined_ranks = self.ranking_dataframes[list(self.ranking_dataframes.keys()).pop()]
-            self.output_data = self.candidates.merge(
-                combined_ranks,
-                left_on=self.candidates.id.astype(str),
-                right_on=combined_ranks.id.astype(str),
-                how='left',
-                sort=False,
-                suffixes=['', '_Drop']
-            )
         else:
 
             self.logger.critical('No Ranking DataFrames resulted from queries!')
             raise RuntimeError('No Ranking Dataframes were found!')
 
-        self.output_data.drop(['key_0', 'id_Drop'], axis=1, inplace=True)
-        self.logger.debug('Dropped key_0 & id_Drop from output dataframe')
+        self.output_data = self.output_table.to_pandas()
 
         if 'open_levels' in self.output_data:
             self.logger.debug('Parsing open_levels attribute')
-            self.output_data['open_levels'].fillna('NULL', inplace=True)
-            self.output_data['TX AGL'] = self.output_data.apply(self.parse_open_levels, axis=1)
-
-        else:
-            self.logger.debug('Setting default value of 30 for TX AGL')
-            self.output_data['TX AGL'] = 30
+            self.output_data['open_levels'] = self.output_data['open_levels'].fillna('NULL')
+            self.output_data['TX AGL'] = open_levels.tx_agl(self.output_data['open_levels'], self.min_tx_agl)
 
-    # Vectorized method for Pandas DataFrame
-    def parse_open_levels(self, row: pd.Series) -> float:
-        """
-        When applied to the output DataFrame e.g. dataframe['column'] = dataframe.apply(func) this function parses
-        the open_levels column from gis_dw_private.private_cci_sites_scrubbing_vw and extracts the right-hand most
-        integer before the distance unit abbreviation.
-
-        Example *open_levels* value: 30 - 115 FT , 117 - 125 FT , 129 - 150 FT
-        """
-        value = row['open_levels']
-        if value in ['NULL', 'None', 'nan']:
-            return 30.0
         else:
-            #
-            last_value = value.split('-')[-1]
-            self.logger.debug(f"{row.id} - open_levels - {last_value}")
-            try:
-                result = float(''.join([char for char in last_value if char.isnumeric()])) - 5
-                return result
-            except ValueError as ve:
-                self.logger.error(f'{ve.args}')
-                return 30.0
+            self.logger.debug(f'Setting default value of {open_levels.DEFAULT_TX_AGL:g} for TX AGL')
+            self.output_data['TX AGL'] = open_levels.DEFAULT_TX_AGL
 
     def siklu_api_call(self) -> None:
-        self.output_data.apply(lambda row: siklu.link_budget_api(self, siklu.DEFAULT_MODEL, row_series=row), axis=1)
+        if self.link_budget_backend == 'itu':
+            self.siklu_api_responses = link_budget.evaluate_many(
+                self.output_data, self.latitude, self.longitude, self.min_speed
+            )
+        else:
+            cache = siklu.LinkBudgetCache() if self.link_budget_cache else None
+            with siklu.LinkBudgetClient(cache=cache, logger=self.logger) as client:
+                self.siklu_api_responses = client.evaluate_many(
+                    self.output_data, self.latitude, self.longitude, self.min_speed
+                )
+            if cache is not None:
+                stats = cache.stats
+                self.logger.debug(f"Siklu link budget cache: {stats['hits']} hits, {stats['misses']} misses")
+                cache.close()
 
         #  Concatenate siklu API responses DF
         self.output_data = pd.concat([self.siklu_api_responses, self.output_data], axis=1)
@@ -594,238 +835,37 @@ class IdentifyCandidates:
 
     def output_ranker(self):
 
-        if self.check_google:
-            self.output_dataframe_ranker_with_google_attributes()
-        else:
-            self.output_dataframe_ranker()
+        self.output_dataframe_ranker()
 
         self.output_fields.extend(self.output_data.columns.values.tolist())
         self.logger.debug(f"output fields: {', '.join(self.output_fields)}")
 
     def output_dataframe_ranker(self):
-        """ **Sort** all neighbors based on *distance*, and other *attributes* like has *power*, *has fiber connectivity*, *has FCC license on roof*, etc.
-            Also return the winning or "top" **20** neighbors """
-  
-        sort_df = self.output_data.drop_duplicates('id')
-        
-        unique_types = self.output_data.candidate_type.unique().tolist()
-
-        if 'cci_sites' in unique_types and 'ospi' in unique_types and any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fi_dist',
-                'fcc_cnt'
-            ],
-                ascending=[True, True, True, False, True, True, False, False, True, False])
-
-        elif 'cci_sites' in unique_types and any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fi_dist'
-            ],
-                ascending=[True, True, True, False, True, True, False, False, True])
-
-        elif 'cci_sites' in unique_types and 'ospi' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fcc_cnt'
-            ],
-                ascending=[True, True, True, False, True, True, False, False, False])
-
-        elif 'cci_sites' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed'
-            ],
-                ascending=[True, True, True, False, True, True, False, False])
-
-        elif 'ospi' in unique_types and any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'score',
-                'antenna',
-                'Speed',
-                'fi_dist',
-                'fcc_cnt'
-            ],
-                ascending=[True, True, False, True, False])
-
-        elif 'ospi' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'score',
-                'antenna',
-                'Speed',
-                'fcc_cnt'
-            ],
-                ascending=[True, True, False, False])
-
-        elif any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'antenna',
-                'Speed',
-                'fi_dist'
-            ],
-                ascending=[True, False, True])
-        else:
-            sort_df_sorted_temp = sort_df.sort_values(by=['antenna', 'Speed'], ascending=[True, False])
-
-        sort_df_sorted_temp.reset_index(drop=True, inplace=True)
-        sort_df_sorted_temp = sort_df_sorted_temp.rename_axis('fw_rank').reset_index()
-        sort_df_sorted_temp['fw_rank'] = sort_df_sorted_temp['fw_rank'].astype(int) + 1
-
-        self.output_data_sorted = sort_df_sorted_temp
-        self.output_data_all = self.output_data.join(sort_df_sorted_temp[['id', 'fw_rank']].set_index('id'), on='id')
-        self.logger.debug('Created Output Data ALL Dataframe')
-
-        self.output_data = sort_df_sorted_temp
-        self.output_data['id'] = self.output_data['id'].astype(str)
-        self.output_data.dropna(1, 'all', inplace=True)
-        self.output_data = self.output_data.sort_values(by='fw_rank')
-
-    def output_dataframe_ranker_with_google_attributes(self):
-
+        """
+        **Sort** all neighbors on the utils.ranking.RANK_KEYS that apply to the candidate types found (power, fiber
+        connectivity, FCC licenses on roof, speed, ...), led by the Google clearance score when google_check ran.
+        fw_rank numbers the ranked candidates, with max_ranked only the best max_ranked are ranked & kept.
+        """
         sort_df = self.output_data.drop_duplicates('id')
 
         unique_types = self.output_data.candidate_type.unique().tolist()
+        keys = ranker.active_keys(unique_types, google=self.check_google)
+        directions = [f"{key.field} {'asc' if key.ascending else 'desc'}" for key in keys]
+        self.logger.debug(f"Ranking {len(sort_df)} candidates on {', '.join(directions)}")
 
-        if all([_type in unique_types for _type in ['cci_sites', 'ospi']]) and any(
-                [_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fi_dist',
-                'fcc_cnt'
-            ],
-                ascending=[False, True, True, True, False, True, True, False, False, True, False]
-            )
+        sort_df_sorted_temp = sort_df.iloc[ranker.rank_order(sort_df, keys, self.max_ranked)]
 
-        elif 'cci_sites' in unique_types and any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fi_dist'
-            ],
-                ascending=[False, True, True, True, False, True, True, False, False, True])
-
-        elif 'cci_sites' in unique_types and 'ospi' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed',
-                'fcc_cnt'
-            ],
-                ascending=[False, True, True, True, False, True, True, False, False, False])
-
-        elif 'cci_sites' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'fiber_on_site',
-                'is_cci_power_available',
-                'if_no_cci_power_is_meter_avail',
-                'pt_id',
-                'score',
-                'antenna',
-                'revshare',
-                'Speed'
-            ],
-                ascending=[False, True, True, True, False, True, True, False, False])
-
-        elif 'ospi' in unique_types and any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'score',
-                'antenna',
-                'Speed',
-                'fi_dist',
-                'fcc_cnt'
-            ],
-                ascending=[False, True, True, False, True, False])
-
-        elif 'ospi' in unique_types:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'score',
-                'antenna',
-                'Speed',
-                'fcc_cnt'
-            ],
-                ascending=[False, True, True, False, False])
-
-        elif any([_type in unique_types for _type in ['re_asd', 're_mgt']]):
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'antenna',
-                'Speed',
-                'fi_dist'
-            ],
-                ascending=[False, True, False, True])
-        else:
-            sort_df_sorted_temp = sort_df.sort_values(by=[
-                'Clearance_Score',
-                'antenna',
-                'Speed'
-            ],
-                ascending=[False, True, False])
-
-        sort_df_sorted_temp.reset_index(drop=True, inplace=True)
+        sort_df_sorted_temp = sort_df_sorted_temp.reset_index(drop=True)
         sort_df_sorted_temp = sort_df_sorted_temp.rename_axis('fw_rank').reset_index()
         sort_df_sorted_temp['fw_rank'] = sort_df_sorted_temp['fw_rank'].astype(int) + 1
 
-        self.output_data_sorted = sort_df_sorted_temp
         self.output_data_all = self.output_data.join(sort_df_sorted_temp[['id', 'fw_rank']].set_index('id'), on='id')
         self.logger.debug('Created Output Data ALL Dataframe')
 
-        self.output_data = sort_df_sorted_temp
-        self.output_data['id'] = self.output_data['id'].astype(str)
-        self.output_data.dropna(1, 'all', inplace=True)
-        self.output_data = self.output_data.sort_values(by='fw_rank')
-    
+        sort_df_sorted_temp['id'] = sort_df_sorted_temp['id'].astype(str)
+        self.output_data_sorted = sort_df_sorted_temp.dropna(axis=1, how='all')
+        self.output_data = self.output_data_sorted.copy()
+
     def score_final_candidates(self):
         # TODO Implement scoring/sorting mechanism
         self.logger.warning('Scoring NOT IMPLEMENTED')
@@ -850,9 +890,9 @@ class IdentifyCandidates:
             self.ExcelWriter
         )
 
-        for candidate_type, dataframe in self.ranking_dataframes.items():
-            dataframe['id'] = dataframe['id'].astype(str)
-            dataframe = dataframe.merge(self.output_data_all[['fw_rank', 'id']], how='left', on='id')
+        fw_ranks = candidate_table.CandidateTable.from_pandas(self.output_data_all[['id', 'fw_rank']])
+        for candidate_type, ranks in self.ranking_tables.items():
+            dataframe = ranks.join(fw_ranks).to_pandas()
             dataframe.to_excel(self.ExcelWriter, f"all_{candidate_type}", index=False)
             
             self.logger.debug(f"Wrote all_{candidate_type} to Excel Workbook")
@@ -873,30 +913,46 @@ class IdentifyCandidates:
             self.logger.warning(f"No CCI Sites Candidates remaining!!!")
             return
 
-        sql_string = queries.build_cc_scrub_query(cci_dataframe.id.tolist())
-
-        scrub_dataframe = pd.read_sql(sql_string, self.odw.connection)
+        scrub_dataframe = self.odw.fetchDataFrame(queries.build_cc_scrub_query(cci_dataframe.id.tolist()))
 
         scrub_dataframe.to_excel(self.ExcelWriter, 'Tower Scrub', index=False)
 
     def parse_source_site(self):
+        self.init_geoprocessing()
         epsg = arcpy.Describe(self.source_site).spatialReference.factoryCode
 
-        with arcpy.da.SearchCursor(self.source_site, ['SHAPE@X', 'SHAPE@Y']) as site_cursor:
-            for r in site_cursor:
-                if epsg != 4326:
-                    self.odw.cursor.execute(
-                        f"""
-                        Select ST_X(ST_Transform(ST_GeomFromText('Point ({r[0]} {r[1]})', {epsg}), 4326)) as lon, 
-                        ST_Y(ST_Transform(ST_GeomFromText('Point ({r[0]} {r[1]})', {epsg}), 4326)) as lat
-                        """
-                    )
-                    coordinates = self.odw.cursor.fetchone()
-                    self.longitude = coordinates[0]
-                    self.latitude = coordinates[1]
-                else:
-                    self.longitude = r[0]
-                    self.latitude = r[1]
+        with arcpy.da.SearchCursor(self.source_site, ['OID@', 'SHAPE@X', 'SHAPE@Y']) as site_cursor:
+            sites = [row for row in site_cursor]
+
+        if not sites:
+            raise ValueError(f"{self.source_site} does not contain any source site points")
+
+        if epsg != 4326:
+            # project every source site in one statement instead of one query per point
+            with self.odw.pooledConnection() as conn, conn.cursor() as cur:
+                cur.execute(
+                    """
+                    select st_x(p), st_y(p)
+                    from unnest(%(xs)s::float8[], %(ys)s::float8[]) with ordinality as u(x, y, n)
+                    cross join lateral st_transform(st_setsrid(st_makepoint(x, y), %(epsg)s), 4326) as projected(p)
+                    order by n
+                    """,
+                    {'xs': [site[1] for site in sites], 'ys': [site[2] for site in sites], 'epsg': epsg}
+                )
+                coordinates = cur.fetchall()
+        else:
+            coordinates = [(site[1], site[2]) for site in sites]
+
+        self.targets = pd.DataFrame({
+            'target_id': [site[0] for site in sites],
+            'longitude': [coordinate[0] for coordinate in coordinates],
+            'latitude': [coordinate[1] for coordinate in coordinates]
+        })
+
+        if len(sites) > 1:
+            self.logger.debug(f"{len(sites)} source sites read, initial_search uses the first, batch_search all of them")
+
+        self.longitude, self.latitude = coordinates[0]
 
     def sanitize_field_names(self):
         self.sanitized = ['SHAPE@']
@@ -933,6 +989,7 @@ class IdentifyCandidates:
 
     def construct_features(self):
 
+        self.init_geoprocessing()
         self.sanitize_field_names()
 
         self.candidate_points = path.join(self.workspace, 'Candidates')
@@ -975,21 +1032,38 @@ class IdentifyCandidates:
             ('write_data_to_excel', (self.logger.debug, 'execute: write to excel')),
             ('construct_features', (self.logger.debug, 'execute: create esri features'))
         ])
-        with tqdm.tqdm(total=len(process_methods), desc='Execute All') as prog:
-            arcpy.SetProgressor('step', message='Identifying FW Candidates', min_range=0, max_range=len(process_methods), step_value=1)
-            for method_name, logging_tuple in process_methods.items():
-                arcpy.SetProgressorLabel(f"{method_name}")
-                if method_name == 'check_google_los' and not self.check_google:
-                    arcpy.SetProgressorPosition()
-                    continue
-                prog.desc = method_name
-                method = getattr(self, method_name)
-                handle, message = logging_tuple
-                handle(message)
-                method()
-                arcpy.SetProgressorPosition()
-                prog.update()
-            arcpy.ResetProgressor()
+        try:
+            with tqdm.tqdm(total=len(process_methods), desc='Execute All') as prog:
+                self.progressor('SetProgressor', 'step', message='Identifying FW Candidates', min_range=0, max_range=len(process_methods), step_value=1)
+                for method_name, logging_tuple in process_methods.items():
+                    self.progressor('SetProgressorLabel', f"{method_name}")
+                    if method_name == 'check_google_los' and not self.check_google:
+                        self.progressor('SetProgressorPosition')
+                        continue
+                    if method_name in ('extract_unique_ids', 'ranking') and self.pipeline:
+                        # ranking attributes were fetched with the candidates by initial_search
+                        self.progressor('SetProgressorPosition')
+                        continue
+                    prog.desc = method_name
+                    method = getattr(self, method_name)
+                    handle, message = logging_tuple
+                    handle(message)
+                    method()
+                    self.progressor('SetProgressorPosition')
+                    prog.update()
+                self.progressor('ResetProgressor')
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the query worker threads and the elevation fetcher's session, called when execute_process ends.
+        Both are recreated on demand, so the instance stays usable.
+        """
+        self.async_odw.close()
+        if self._elevation_fetcher is not None:
+            self._elevation_fetcher.close()
+            self._elevation_fetcher = None
 
     def test_logs(self):
         self.logger.warning('TEST WARNING!')
@@ -0,0 +1,4 @@
+__all__ = [
+    'copy_transfer', 'startup', 'prepared_queries', 'knn_queries', 'id_lists', 'link_budget', 'candidate_table',
+    'open_levels', 'ranking'
+]
\ No newline at end of file
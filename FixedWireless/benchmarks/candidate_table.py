@@ -0,0 +1,126 @@
+"""
+Candidate assembly (initial_search -> assemble_output_dataframe -> the all_<type> Excel sheets) with the previous
+pandas frames versus utils.candidate_table.CandidateTable, on synthetic query results.
+
+The pandas path grows the candidate frame once per query (DataFrame.append semantics), merges the concatenated
+ranking frames on astype(str) keys and merges every ranking frame with fw_rank again. The table path appends one
+record batch per query, joins on the key normalised at ingest and builds DataFrames only where the old code handed
+them on. Each run happens in a fresh process and reports wall time and the growth of peak RSS over the process
+baseline (numpy, pandas & pyarrow already imported).
+
+Usage:
+    python -m FixedWireless.benchmarks.candidate_table --rows 250000
+"""
+import argparse
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+
+from FixedWireless.postgis.queries import CANDIDATE_FIELDS
+from FixedWireless.utils import candidate_table
+
+TYPES = ('ospi', 're_asd', 're_mgt', 'cci_sites')
+STATES = ('NY', 'NJ', 'CT', 'PA')
+STRUCTURES = ('MONOPOLE', 'ROOFTOP', 'LATTICE', 'WATER TANK', 'GUYED')
+
+
+def synthetic_results(rows: int, seed: int = 0):
+    """
+    {candidate type: (candidates, ranks)}, ids are ints in the candidate frames and text in the ranking frames as
+    they come back from ODW.
+    """
+    rng = np.random.default_rng(seed)
+    results = dict()
+    for offset, candidate_type in enumerate(TYPES):
+        ids = np.arange(rows) + offset * rows
+        candidates = pd.DataFrame({
+            'candidate_type': candidate_type, 'id': ids, 'cand_dist_km': rng.random(rows) * 11,
+            'long': -74 + rng.random(rows), 'lat': 40 + rng.random(rows),
+            'height': np.where(rng.random(rows) < 0.2, np.nan, rng.random(rows) * 100)
+        })
+        ranks = pd.DataFrame({
+            'id': ids.astype(str), 'name': [f"site {i}" for i in ids], 'state': rng.choice(STATES, rows),
+            'structure': rng.choice(STRUCTURES, rows), 'city': rng.choice(['New York', 'Newark', 'Yonkers'], rows),
+            'score': rng.integers(0, 10, rows)
+        })
+        results[candidate_type] = (candidates, ranks)
+    return results
+
+
+def pandas_path(results) -> int:
+    candidates = pd.DataFrame(columns=CANDIDATE_FIELDS)
+    for frame, _ in results.values():
+        candidates = pd.concat([candidates, frame], ignore_index=True)
+    candidates['height'] = candidates['height'].fillna(float(30))
+
+    ranking = {candidate_type: ranks for candidate_type, (_, ranks) in results.items()}
+    combined = pd.concat(ranking, ignore_index=True, sort=False)
+    output = candidates.merge(
+        combined, left_on=candidates.id.astype(str), right_on=combined.id.astype(str), how='left', sort=False,
+        suffixes=['', '_Drop']
+    ).drop(['key_0', 'id_Drop'], axis=1)
+
+    output['fw_rank'] = np.arange(len(output)) + 1
+    output['id'] = output['id'].astype(str)
+    sheets = 0
+    for ranks in ranking.values():
+        ranks['id'] = ranks['id'].astype(str)
+        sheets += len(ranks.merge(output[['fw_rank', 'id']], how='left', on='id'))
+    return len(output) + sheets
+
+
+def table_path(results) -> int:
+    candidates = candidate_table.CandidateTable.from_pandas(pd.DataFrame(columns=CANDIDATE_FIELDS))
+    for frame, _ in results.values():
+        candidates.append(frame)
+    candidates.fill_null('height', float(30))
+
+    ranking = {
+        candidate_type: candidate_table.CandidateTable.from_pandas(ranks)
+        for candidate_type, (_, ranks) in results.items()
+    }
+    combined = candidate_table.CandidateTable()
+    for ranks in ranking.values():
+        combined.append(ranks)
+    output = candidates.join(combined).to_pandas()
+
+    output['fw_rank'] = np.arange(len(output)) + 1
+    fw_ranks = candidate_table.CandidateTable.from_pandas(output[['id', 'fw_rank']])
+    sheets = 0
+    for ranks in ranking.values():
+        sheets += len(ranks.join(fw_ranks).to_pandas())
+    return len(output) + sheets
+
+
+def _measure(path_name: str, rows: int, queue) -> None:
+    results = synthetic_results(rows)
+    import pyarrow  # noqa: F401  baseline includes the library itself
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    produced = globals()[path_name](results)
+    wall = time.perf_counter() - start
+    queue.put((produced, wall, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline))
+
+
+def run(rows: int) -> None:
+    context = multiprocessing.get_context('spawn')
+    print(f"\n{len(TYPES)} queries x {rows} candidates")
+    print(f"    {'path':<14}{'rows out':>12}{'wall ms':>12}{'peak RSS growth MB':>22}")
+    for path_name in ('pandas_path', 'table_path'):
+        queue = context.Queue()
+        process = context.Process(target=_measure, args=(path_name, rows, queue))
+        process.start()
+        produced, wall, growth_kb = queue.get()
+        process.join()
+        print(f"    {path_name:<14}{produced:>12}{wall * 1000:>12.1f}{growth_kb / 1024:>22.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=250000, help='Candidates per query')
+    args = parser.parse_args()
+
+    run(args.rows)
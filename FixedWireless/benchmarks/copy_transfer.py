@@ -0,0 +1,82 @@
+"""
+Compare the read_sql transfer path against ODW.copyQueryToDataFrame (COPY csv / binary).
+
+Usage:
+    python -m FixedWireless.benchmarks.copy_transfer --environment ODW_DEV --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from FixedWireless.postgis.connect import ODW
+
+SIZES = [1000, 10000, 100000, 1000000]
+
+# ~40 columns of mixed types, roughly the shape of get_vector_sales_query / the ranking queries
+SYNTHETIC_QUERY = """
+    select
+        g as id,
+        md5(g::text) as name,
+        (g % 50)::int2 as state_code,
+        g::int8 * 7 as big_id,
+        random() as score,
+        round((random() * 100)::numeric, 2) as fi_dist,
+        (g % 2 = 0) as fiber_on_site,
+        now()::date - (g % 365) as last_revision,
+        {padding}
+    from generate_series(1, {rows}) as g
+"""
+
+
+def synthetic_query(rows: int) -> str:
+    padding = ',\n        '.join(
+        [f"'text value ' || (g % {idx + 3}) as text_{idx}" for idx in range(16)] +
+        [f"(random() * {idx + 1})::float8 as float_{idx}" for idx in range(16)]
+    )
+    return SYNTHETIC_QUERY.format(rows=rows, padding=padding)
+
+
+def time_call(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frame = func()
+        best = min(best, time.perf_counter() - start)
+        del frame
+    return best
+
+
+def run(environment: str, username: str, sizes, repeat: int) -> pd.DataFrame:
+    odw = ODW(environment=environment, username=username)
+    results = []
+
+    for rows in sizes:
+        query = synthetic_query(rows)
+
+        def read_sql():
+            with odw.pooledConnection() as conn:
+                return pd.read_sql(query, conn)
+
+        timings = {
+            'rows': rows,
+            'read_sql_s': time_call(read_sql, repeat),
+            'copy_csv_s': time_call(lambda: odw.copyQueryToDataFrame(query, copy_format='csv'), repeat),
+            'copy_binary_s': time_call(lambda: odw.copyQueryToDataFrame(query, copy_format='binary'), repeat),
+        }
+        timings['csv_speedup'] = timings['read_sql_s'] / timings['copy_csv_s']
+        results.append(timings)
+        print(timings)
+
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environment', default='ODW_DEV')
+    parser.add_argument('--username', default='CC_GEO_PRIVATE')
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(run(args.environment, args.username, args.sizes, args.repeat).to_string(index=False))
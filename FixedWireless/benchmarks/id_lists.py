@@ -0,0 +1,87 @@
+"""
+Id list transport for the ranking & scrub queries: the old str(tuple(ids)) splice versus the ids bound as one array
+(= any(%(ids)s)) versus the ids COPYed into a session temp table and joined.
+
+Ids are read from the statement's own relation/column (repeated when the relation has fewer rows than requested) so
+every form filters on values that exist. For each size the statement text sent to the server and the median wall time
+over --repeats runs are reported.
+
+Usage:
+    python -m FixedWireless.benchmarks.id_lists --environment ODW_DEV --query cc_scrub
+"""
+import argparse
+import statistics
+import time
+
+from FixedWireless.postgis.connect import ODW
+from FixedWireless.postgis import id_lists
+from FixedWireless.postgis import queries
+
+SIZES = (10, 1000, 100000)
+
+STATEMENTS = {
+    'cc_scrub': queries.CC_SCRUB_STATEMENT,
+    'macro_cci_sites_rank': queries.MACRO_CCI_SITES_RANK_STATEMENT,
+    'lit_building_rank_fcc': queries.LIT_BUILDING_RANK_FCC_STATEMENT,
+    'asd_real_estate_rank': queries.ASD_REAL_ESTATE_RANK_STATEMENT,
+}
+
+
+def sample_ids(cursor, statement: id_lists.IdListStatement, count: int):
+    cursor.execute(
+        f"select {statement.column}::text from {statement.relation} where {statement.column} is not null limit %s",
+        (count,)
+    )
+    ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        raise RuntimeError(f"{statement.relation} returned no ids")
+    return (ids * (count // len(ids) + 1))[:count]
+
+
+def spliced_sql(statement: id_lists.IdListStatement, ids) -> str:
+    # the form the builders produced before id_lists
+    return statement.sql.format(ids='in ' + str(tuple(ids)).replace(',)', ')')).replace('%%', '%')
+
+
+def run(environment: str, username: str, query: str, repeats: int) -> None:
+    odw = ODW(environment=environment, username=username)
+    statement = STATEMENTS[query]
+
+    with odw.pooledConnection() as conn, conn.cursor() as cur:
+        ids = sample_ids(cur, statement, max(SIZES))
+
+    print(f"\n{query} ({repeats} runs per size)")
+    print(f"    {'ids':>8}{'method':>14}{'sql bytes':>14}{'median wall ms':>18}")
+
+    for size in SIZES:
+        subset = ids[:size]
+        forms = {
+            'tuple splice': (lambda: odw.fetchDataFrame(spliced_sql(statement, subset)), spliced_sql(statement, subset)),
+            'array': (
+                lambda: odw.fetchDataFrame(statement.bind(subset, method='array')),
+                statement.array_statement.sql + id_lists.array_literal(subset)
+            ),
+            'temp_table': (
+                lambda: odw.fetchDataFrame(statement.bind(subset, method='temp_table')),
+                statement.temp_table_sql()
+            ),
+        }
+
+        for method, (execute, sent) in forms.items():
+            walls = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                execute()
+                walls.append((time.perf_counter() - start) * 1000)
+            print(f"    {size:>8}{method:>14}{len(sent.encode('utf-8')):>14}{statistics.median(walls):>18.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environment', default='ODW_DEV')
+    parser.add_argument('--username', default='CC_GEO_PRIVATE')
+    parser.add_argument('--query', choices=sorted(STATEMENTS), default='cc_scrub')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.environment, args.username, args.query, args.repeats)
@@ -0,0 +1,69 @@
+"""
+Execution time of the st_distance candidate builders versus the index-driven KNN builders (st_dwithin radius filter
+plus ORDER BY ... <-> on the geography expression indexes from postgis/sql/migrations/001_candidate_knn_indexes.sql).
+
+For each random search point around --latitude/--longitude both forms are run through EXPLAIN (ANALYZE, SUMMARY) and
+the reported Execution Time is collected, along with whether the plan read a GiST index at all. Run the migration
+against the target database first, without the indexes both forms scan.
+
+Usage:
+    python -m FixedWireless.benchmarks.knn_queries --environment ODW_DEV --searches 25
+"""
+import argparse
+import statistics
+
+from FixedWireless.postgis.connect import ODW
+from FixedWireless.postgis import queries
+from FixedWireless.benchmarks.prepared_queries import explain_timings, search_points
+
+CASES = {
+    'lit_building': (queries.build_lit_building_query, queries.knn_build_lit_building_query),
+    'asd_real_estate': (queries.build_asd_real_estate_query, queries.knn_build_asd_real_estate_query),
+    'mgt_real_estate': (queries.build_mgt_real_estate_query, queries.knn_build_mgt_real_estate_query),
+    'macro_cci_sites': (queries.build_macro_cci_sites_query, queries.knn_build_macro_cci_sites_query),
+}
+
+
+def uses_index(cursor, sql: str) -> bool:
+    cursor.execute(f"explain {sql}")
+    plan = '\n'.join(row[0] for row in cursor.fetchall())
+    return 'Index Scan' in plan or 'Bitmap Index Scan' in plan
+
+
+def run(environment: str, username: str, latitude: float, longitude: float, searches: int, distance: float,
+        limit: int) -> None:
+    odw = ODW(environment=environment, username=username)
+    points = search_points(latitude, longitude, searches)
+
+    for case, (build, knn_build) in CASES.items():
+        timings = {'st_distance': [], 'knn': []}
+
+        with odw.pooledConnection() as conn, conn.cursor() as cur:
+            indexed = uses_index(cur, knn_build(longitude, latitude, distance, limit))
+
+            for lon, lat in points:
+                for label, builder in (('st_distance', build), ('knn', knn_build)):
+                    _, execution = explain_timings(cur, builder(lon, lat, distance, limit))
+                    timings[label].append(execution)
+
+        print(f"\n{case} ({searches} searches, distance={distance}km, limit={limit}, knn plan uses index: {indexed})")
+        print(f"    {'':<14}{'median ms':>12}{'p95 ms':>12}{'max ms':>12}")
+        for label, values in timings.items():
+            p95 = sorted(values)[int(0.95 * (len(values) - 1))]
+            print(f"    {label:<14}{statistics.median(values):>12.2f}{p95:>12.2f}{max(values):>12.2f}")
+        speedup = statistics.median(timings['st_distance']) / max(statistics.median(timings['knn']), 1e-9)
+        print(f"    median speedup: {speedup:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environment', default='ODW_DEV')
+    parser.add_argument('--username', default='CC_GEO_PRIVATE')
+    parser.add_argument('--latitude', type=float, default=40.7390831)
+    parser.add_argument('--longitude', type=float, default=-73.9913778)
+    parser.add_argument('--searches', type=int, default=25)
+    parser.add_argument('--distance', type=float, default=2)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.environment, args.username, args.latitude, args.longitude, args.searches, args.distance, args.limit)
@@ -0,0 +1,75 @@
+"""
+Offline ITU-R link budget model (utils.link_budget) against the Siklu link budget web API.
+
+Candidates are read from a CSV with id, lat & long columns. The API reports are either requested live (and written to
+--record so later runs can replay them with --responses) or read from a previously recorded CSV. For every numeric
+field the median and 95th percentile absolute difference are reported, for antenna, capacity & modulation the share of
+candidates where both backends agree, plus the wall time of each backend.
+
+Usage:
+    python -m FixedWireless.benchmarks.link_budget --candidates candidates.csv --lat 40.74 --lon -73.99 \\
+        --capacity 1000 --record siklu_reports.csv
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from FixedWireless.utils import link_budget
+from FixedWireless.utils import siklu
+
+NUMERIC_FIELDS = ('d_km', 'oxygen_attenuation_km', 'rain_attenuation_km', 'rain_attenuation_total', 'link_margin')
+MATCH_FIELDS = ('antenna', 'capacity', 'modulation')
+
+
+def compare(api: pd.DataFrame, itu: pd.DataFrame) -> None:
+    answered = api['capacity'].notna()
+    print(f"\n{answered.sum()} of {len(api)} candidates have an API report")
+
+    print(f"    {'field':<26}{'median |diff|':>16}{'p95 |diff|':>14}")
+    for field in NUMERIC_FIELDS:
+        diff = (pd.to_numeric(api.loc[answered, field], errors='coerce') - itu.loc[answered, field]).abs().dropna()
+        if diff.empty:
+            continue
+        print(f"    {field:<26}{diff.median():>16.3f}{np.percentile(diff, 95):>14.3f}")
+
+    print(f"    {'field':<26}{'agreement':>16}")
+    for field in MATCH_FIELDS:
+        agree = (api.loc[answered, field].astype(str) == itu.loc[answered, field].astype(str)).mean()
+        print(f"    {field:<26}{agree:>16.1%}")
+
+
+def run(candidates_csv: str, lat: float, lon: float, capacity: float, model_name: str, responses: str = None,
+        record: str = None) -> None:
+    candidates = pd.read_csv(candidates_csv, dtype={'id': str})
+
+    start = time.perf_counter()
+    itu = link_budget.evaluate_many(candidates, lat, lon, capacity, model_name=model_name)
+    print(f"itu:   {len(candidates)} candidates in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if responses:
+        api = pd.read_csv(responses, index_col=0).reindex(candidates.index)
+    else:
+        start = time.perf_counter()
+        with siklu.LinkBudgetClient(model_name=model_name) as client:
+            api = client.evaluate_many(candidates, lat, lon, capacity)
+        print(f"siklu: {len(candidates)} candidates in {(time.perf_counter() - start) * 1000:.1f} ms")
+        if record:
+            api.to_csv(record)
+
+    compare(api, itu)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', required=True)
+    parser.add_argument('--lat', type=float, required=True)
+    parser.add_argument('--lon', type=float, required=True)
+    parser.add_argument('--capacity', type=float, default=1000)
+    parser.add_argument('--model', default=siklu.DEFAULT_MODEL, choices=sorted(link_budget.EQUIPMENT))
+    parser.add_argument('--responses', help='Recorded API reports to compare against instead of calling the API')
+    parser.add_argument('--record', help='Write the live API reports to this CSV')
+    args = parser.parse_args()
+
+    run(args.candidates, args.lat, args.lon, args.capacity, args.model, args.responses, args.record)
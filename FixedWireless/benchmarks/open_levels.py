@@ -0,0 +1,87 @@
+"""
+TX AGL from the open_levels column: the previous row by row DataFrame.apply parser (split on '-', keep the digits of
+the last piece, minus 5) versus utils.open_levels, on synthetic CCI site values.
+
+Values hold one to four ascending open levels ("30 - 115 FT , 117 - 125 FT"), a share of them NULL / None. The
+legacy parser runs with its per row DEBUG line filtered out by the logger level, its cheapest configuration. Reported
+are the wall times of both, of parse alone and of tx_agl against a required clearance height, plus the share of sites
+where the vectorised TX AGL equals the legacy one (all of them, as the levels are ascending).
+
+Usage:
+    python -m FixedWireless.benchmarks.open_levels --rows 1000000
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from FixedWireless.utils import open_levels
+
+logger = logging.getLogger(__name__)
+
+
+def synthetic_values(rows: int, distinct: int, null_share: float = 0.3, seed: int = 0) -> pd.Series:
+    """
+    rows open_levels values drawn from distinct generated ones, null_share of them NULL or None.
+    """
+    rng = np.random.default_rng(seed)
+    pool = []
+    for _ in range(distinct):
+        bounds = np.sort(rng.choice(np.arange(10, 300, 5), 2 * rng.integers(1, 5), replace=False))
+        pool.append(' , '.join(f"{low} - {high} FT" for low, high in bounds.reshape(-1, 2)))
+    values = np.asarray(pool, dtype=object)[rng.integers(0, distinct, rows)]
+    nulls = rng.random(rows) < null_share
+    values[nulls] = np.where(rng.random(nulls.sum()) < 0.5, 'NULL', None)
+    return pd.Series(values, name='open_levels')
+
+
+def legacy_parse(row: pd.Series) -> float:
+    value = row['open_levels']
+    if value in ['NULL', 'None', 'nan']:
+        return 30.0
+    last_value = value.split('-')[-1]
+    logger.debug(f"{row.id} - open_levels - {last_value}")
+    try:
+        return float(''.join([char for char in last_value if char.isnumeric()])) - 5
+    except ValueError as ve:
+        logger.error(f'{ve.args}')
+        return 30.0
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(rows: int, distinct: int, required: float) -> None:
+    values = synthetic_values(rows, distinct)
+    frame = pd.DataFrame({'id': np.arange(rows).astype(str), 'open_levels': values.fillna('NULL')})
+
+    legacy, legacy_ms = _timed(lambda: frame.apply(legacy_parse, axis=1).to_numpy())
+    intervals, parse_ms = _timed(open_levels.parse, frame['open_levels'])
+    _, intervals_ms = _timed(open_levels.tx_agl, intervals)
+    vectorised, vectorised_ms = _timed(open_levels.tx_agl, frame['open_levels'])
+    clearance, clearance_ms = _timed(open_levels.tx_agl, frame['open_levels'], required)
+
+    print(f"\n{rows} values ({distinct} distinct), {len(intervals.lower)} open levels")
+    print(f"    {'method':<34}{'wall ms':>12}")
+    print(f"    {'DataFrame.apply (legacy)':<34}{legacy_ms:>12.1f}")
+    print(f"    {'parse':<34}{parse_ms:>12.1f}")
+    print(f"    {'tx_agl on parsed intervals':<34}{intervals_ms:>12.1f}")
+    print(f"    {'tx_agl':<34}{vectorised_ms:>12.1f}")
+    print(f"    {f'tx_agl, required {required:g} ft':<34}{clearance_ms:>12.1f}")
+    print(f"    speedup {legacy_ms / vectorised_ms:.1f}x, agreement with legacy {np.mean(legacy == vectorised):.1%}, "
+          f"{np.mean(clearance >= required):.1%} of sites reach {required:g} ft")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--distinct', type=int, default=50000, help='Distinct open_levels values among the rows')
+    parser.add_argument('--required', type=float, default=100.0, help='Required clearance height (ft)')
+    args = parser.parse_args()
+
+    run(args.rows, args.distinct, args.required)
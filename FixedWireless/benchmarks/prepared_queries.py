@@ -0,0 +1,87 @@
+"""
+Planning time of the f-string candidate builders versus the bind-parameter prepared statements.
+
+For each random search point around --latitude/--longitude both forms are run through EXPLAIN (ANALYZE, SUMMARY) and
+the reported Planning/Execution Time is collected. The prepared statement is PREPAREd once per connection, so after
+PostgreSQL settles on a plan every EXECUTE skips parse/analyze/plan.
+
+Usage:
+    python -m FixedWireless.benchmarks.prepared_queries --environment ODW_DEV --searches 50
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+
+from FixedWireless.postgis.connect import ODW
+from FixedWireless.postgis import prepared
+from FixedWireless.postgis import queries
+
+_TIMING = re.compile(r'(Planning|Execution) Time: ([\d.]+) ms')
+
+CASES = {
+    'lit_building': (queries.build_lit_building_query, queries.bind_lit_building_query),
+    'macro_cci_sites': (queries.build_macro_cci_sites_query, queries.bind_macro_cci_sites_query),
+}
+
+
+def explain_timings(cursor, sql: str, params=None):
+    cursor.execute(f"explain (analyze, summary) {sql}", params)
+    timings = dict((kind, float(ms)) for kind, ms in _TIMING.findall('\n'.join(row[0] for row in cursor.fetchall())))
+    return timings.get('Planning', 0.0), timings.get('Execution', 0.0)
+
+
+def search_points(latitude: float, longitude: float, count: int, spread: float = 0.05):
+    rng = random.Random(42)
+    return [(longitude + rng.uniform(-spread, spread), latitude + rng.uniform(-spread, spread)) for _ in range(count)]
+
+
+def run(environment: str, username: str, latitude: float, longitude: float, searches: int, distance: float,
+        limit: int) -> None:
+    odw = ODW(environment=environment, username=username)
+    points = search_points(latitude, longitude, searches)
+
+    for case, (build, bind) in CASES.items():
+        adhoc_plan, prepared_plan, adhoc_wall, prepared_wall = [], [], [], []
+
+        with odw.pooledConnection() as conn, conn.cursor() as cur:
+            for lon, lat in points:
+                planning, _ = explain_timings(cur, build(lon, lat, distance, limit))
+                adhoc_plan.append(planning)
+
+                bound = bind(lon, lat, distance, limit)
+                prepared.ensure_prepared(conn, cur, bound.statement)
+                planning, _ = explain_timings(cur, bound.statement.execute_sql(), bound.params)
+                prepared_plan.append(planning)
+
+                start = time.perf_counter()
+                cur.execute(build(lon, lat, distance, limit))
+                cur.fetchall()
+                adhoc_wall.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                prepared.execute_prepared(conn, bound)
+                prepared_wall.append((time.perf_counter() - start) * 1000)
+
+        print(f"\n{case} ({searches} searches, distance={distance}km, limit={limit})")
+        print(f"    {'':<22}{'median plan ms':>16}{'p95 plan ms':>14}{'median wall ms':>16}")
+        for label, plans, walls in (('f-string', adhoc_plan, adhoc_wall), ('prepared', prepared_plan, prepared_wall)):
+            p95 = sorted(plans)[int(0.95 * (len(plans) - 1))]
+            print(f"    {label:<22}{statistics.median(plans):>16.3f}{p95:>14.3f}{statistics.median(walls):>16.1f}")
+        saved = statistics.median(adhoc_plan) - statistics.median(prepared_plan)
+        print(f"    planning time saved per query: {saved:.3f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environment', default='ODW_DEV')
+    parser.add_argument('--username', default='CC_GEO_PRIVATE')
+    parser.add_argument('--latitude', type=float, default=40.7390831)
+    parser.add_argument('--longitude', type=float, default=-73.9913778)
+    parser.add_argument('--searches', type=int, default=50)
+    parser.add_argument('--distance', type=float, default=2)
+    parser.add_argument('--limit', type=int, default=100)
+    args = parser.parse_args()
+
+    run(args.environment, args.username, args.latitude, args.longitude, args.searches, args.distance, args.limit)
@@ -0,0 +1,85 @@
+"""
+Final candidate ranking: DataFrame.sort_values on the key list of the former output_dataframe_ranker branches versus
+utils.ranking.rank_order, fully ordered and with top-k selection, on synthetic candidates carrying every ranking
+attribute (all candidate types present, Google clearance score included) plus --width other output columns. Both
+sides reorder the frame, as the ranker does.
+
+Reported are the best wall times of three runs and whether each order matches sort_values (the top-k one on its
+first k rows).
+
+Usage:
+    python -m FixedWireless.benchmarks.ranking --rows 1000000 --top 20
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from FixedWireless.utils import ranking
+
+TYPES = ('cci_sites', 'ospi', 're_asd', 're_mgt')
+
+
+def synthetic_candidates(rows: int, width: int = 0, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'id': np.arange(rows).astype(str),
+        'Clearance_Score': rng.choice(['Pass', 'Fail'], rows),
+        'fiber_on_site': rng.choice(['Y', 'N'], rows),
+        'is_cci_power_available': rng.choice(['Y', 'N'], rows),
+        'if_no_cci_power_is_meter_avail': rng.choice(['Y', 'N'], rows),
+        'pt_id': rng.integers(0, 5000, rows).astype(float),
+        'score': rng.integers(0, 10, rows).astype(float),
+        'antenna': rng.choice([1, 2, 3], rows),
+        'revshare': rng.random(rows).round(3),
+        'Speed': rng.choice([500.0, 1000.0, 2000.0, 5000.0], rows),
+        'fi_dist': rng.random(rows) * 5000,
+        'fcc_cnt': rng.integers(0, 30, rows).astype(float),
+    })
+    for field in ('pt_id', 'score', 'revshare', 'fi_dist', 'fcc_cnt'):
+        frame.loc[rng.random(rows) < 0.2, field] = np.nan  # attributes of the other candidate types
+    for column in range(width):
+        frame[f"attribute_{column}"] = rng.random(rows) if column % 2 else rng.choice(['a', 'b', 'c'], rows)
+    return frame.copy()  # consolidated blocks, like a frame read from a query
+
+
+def _timed(function, repeat: int = 3):
+    """
+    Result and best wall time (ms) of repeat calls.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def run(rows: int, top: int, width: int) -> None:
+    frame = synthetic_candidates(rows, width)
+    keys = ranking.active_keys(TYPES, google=True)
+
+    legacy, legacy_ms = _timed(
+        lambda: frame.sort_values(
+            [key.field for key in keys], ascending=[key.ascending for key in keys]
+        ).index.to_numpy()
+    )
+    full, full_ms = _timed(lambda: frame.iloc[ranking.rank_order(frame, keys)].index.to_numpy())
+    best, best_ms = _timed(lambda: frame.iloc[ranking.rank_order(frame, keys, top)].index.to_numpy())
+
+    print(f"\n{rows} candidates x {len(frame.columns)} columns, {len(keys)} keys")
+    print(f"    {'method':<28}{'wall ms':>12}{'matches':>10}")
+    print(f"    {'sort_values (legacy)':<28}{legacy_ms:>12.1f}")
+    print(f"    {'rank_order':<28}{full_ms:>12.1f}{str(np.array_equal(full, legacy)):>10}")
+    print(f"    {f'rank_order top {top}':<28}{best_ms:>12.1f}{str(np.array_equal(best, legacy[:top])):>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--width', type=int, default=40, help='Output columns besides the ranking attributes')
+    args = parser.parse_args()
+
+    run(args.rows, args.top, args.width)
@@ -0,0 +1,100 @@
+"""
+Startup benchmark: reports the import cost of each module pulled in by `import FixedWireless.Search` (python -X
+importtime in a fresh interpreter) and the cost of each heavy dependency that is now loaded lazily.
+
+Usage:
+    python -m FixedWireless.benchmarks.startup --budget-ms 500
+
+Exits with status 1 when importing FixedWireless.Search takes longer than --budget-ms, so a dependency that slips
+back into module-level imports shows up as a failure.
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+TARGETS = ['FixedWireless.postgis.connect', 'FixedWireless.Search']
+
+LAZY_DEPENDENCIES = ['pandas', 'geopandas', 'sqlalchemy', 'requests', 'tqdm', 'arcgis.features', 'arcpy']
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Run `python -X importtime -c "import module"` and return (module, self_us, cumulative_us, depth) rows.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def top_level_costs(rows: List[Tuple[str, int, int, int]]) -> Dict[str, float]:
+    """
+    Cumulative milliseconds per module imported directly by the target (the last, depth 0 row). importtime lists
+    children before their parent, so the target's subtree is every row after the previous depth 0 row.
+    """
+    start = len(rows) - 1
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+
+    costs: Dict[str, float] = {}
+    for name, _, cumulative_us, depth in rows[start:-1]:
+        if depth == 1:
+            package = name if name.startswith('FixedWireless') else name.split('.')[0]
+            costs[package] = costs.get(package, 0.0) + cumulative_us / 1000
+    return costs
+
+
+def dependency_cost(module: str) -> float:
+    rows = import_profile(module)
+    return rows[-1][2] / 1000 if rows else 0.0
+
+
+def run(budget_ms: float, top: int) -> bool:
+    within_budget = True
+
+    for target in TARGETS:
+        rows = import_profile(target)
+        total_ms = rows[-1][2] / 1000 if rows else 0.0
+        print(f"\nimport {target}: {total_ms:.1f} ms")
+        for package, cost in sorted(top_level_costs(rows).items(), key=lambda item: -item[1])[:top]:
+            print(f"    {package:<45}{cost:>10.1f} ms")
+
+        loaded = {name for name, *_ in rows}
+        eager = [dep for dep in LAZY_DEPENDENCIES if dep in loaded]
+        if eager:
+            print(f"    WARNING lazy dependencies imported eagerly: {', '.join(eager)}")
+
+        if target == 'FixedWireless.Search' and total_ms > budget_ms:
+            within_budget = False
+
+    print('\ndeferred dependency cost (paid only by the stage that needs it)')
+    for dependency in LAZY_DEPENDENCIES:
+        try:
+            print(f"    {dependency:<45}{dependency_cost(dependency):>10.1f} ms")
+        except RuntimeError:
+            print(f"    {dependency:<45}{'not installed':>13}")
+
+    return within_budget
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=500.0)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.budget_ms, args.top) else 1)
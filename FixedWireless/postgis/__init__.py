@@ -1 +1 @@
-__all__ = ['connect', 'queries']
\ No newline at end of file
+__all__ = ['connect', 'queries', 'bulk', 'prepared', 'async_connect', 'candidate_cache', 'local_search', 'batch_search', 'maintenance', 'id_lists']
\ No newline at end of file
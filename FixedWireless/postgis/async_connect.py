@@ -0,0 +1,87 @@
+__all__ = ['AsyncODW', 'run_sync']
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from FixedWireless.postgis.connect import ODW
+
+
+class AsyncODW:
+    """
+    asyncio front end for ODW. Every query borrows its own connection from the ODW pool and runs on a worker thread
+    (psycopg2 releases the GIL while waiting on the network), so independent queries overlap and a batch of them
+    costs roughly the slowest query instead of the sum.
+    """
+
+    def __init__(self, odw: ODW, max_workers: Optional[int] = None):
+        """
+        :param odw: Configured ODW instance, its pool size bounds how many queries can actually run at once
+        :param max_workers: Worker threads, defaults to the pool's max_connections
+        """
+        self.odw = odw
+        self.max_workers = max_workers or odw.max_connections
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='odw')
+        return self._executor
+
+    async def fetchDataFrame(self, statement, params=None):
+        """
+        Awaitable ODW.fetchDataFrame, statement is a SQL string or a queries.bind_* BoundStatement.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.odw.fetchDataFrame, statement, params)
+
+    async def gatherDataFrames(self, statements: Dict[str, object]) -> 'OrderedDict[str, object]':
+        """
+        Dispatch every statement concurrently and return {name: DataFrame} in the order supplied. The first failure
+        is raised once all queries have finished so no pooled connection is left checked out.
+        """
+        names = list(statements)
+        results = await asyncio.gather(
+            *[self.fetchDataFrame(statements[name]) for name in names], return_exceptions=True
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return OrderedDict(zip(names, results))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def run_sync(coroutine):
+    """
+    Run a coroutine to completion from synchronous code. When called from inside a running event loop (ArcGIS Pro
+    notebooks, Jupyter) the coroutine is run on a private loop in a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = asyncio.run(coroutine)
+        except BaseException as err:
+            outcome['error'] = err
+
+    thread = threading.Thread(target=target, name='odw-run-sync')
+    thread.start()
+    thread.join()
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
@@ -0,0 +1,246 @@
+__all__ = [
+    'BATCH_FIELDS', 'BATCH_METHODS', 'CANDIDATE_LATERALS', 'targets_frame', 'build_batch_query', 'batch_params',
+    'batch_search'
+]
+
+import io
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from FixedWireless.postgis.queries import CANDIDATE_FIELDS, CANDIDATE_TYPES
+
+BATCH_FIELDS = ['target_id'] + CANDIDATE_FIELDS
+
+BATCH_METHODS = ('array', 'temp_table')
+
+# Per target candidate queries, the same filters as the queries.build_*_query builders with the search point and radius
+# taken from the outer targets row (t) and the limit from a per candidate type bind parameter. Like the prepared
+# candidate statements each lateral filters with st_dwithin and takes its limit in KNN order (<->) on the geography
+# expression sql/migrations/001_candidate_knn_indexes.sql indexes, so every target is an index scan that stops after
+# limit rows instead of a scan of the whole relation. The lit building vertices are only computed for the buildings
+# read before the limit is reached.
+CANDIDATE_LATERALS = {
+    'ospi': """
+        select
+            'ospi'::text as candidate_type,
+            o.buildingid::text as id,
+            round((st_distance(t.geog, o.location::geography)/1000)::numeric, 2) as cand_dist_km,
+            st_x(vertices.geom) as long,
+            st_y(vertices.geom) as lat,
+            30::double precision as height
+        from
+            ospi.ne_dw_buildings o
+        join lateral
+            (
+                select
+                    x.name,
+                    (public.cc_cardinal_vertices_from_polygon(st_buffer(x.wkt_geometry,-0.000012))).geom
+                from ospi.ne_dw_buildings x
+                where st_intersects(x.location, o.wkt_geometry)
+            ) as vertices on o.name = vertices.name
+        where
+            st_dwithin(o.location::geography, t.geog, t.distance * 1000) and
+            st_distance(t.geog, o.location::geography) < (t.distance * 1000)
+        order by o.location::geography <-> t.geog
+        limit %(ospi_limit)s
+    """,
+    'cci_sites': """
+        select
+            'cci_sites'::text as candidate_type,
+            s_bus_unit::text as id,
+            round((st_distance(t.geog, geom::geography)/1000)::numeric, 2) as cand_dist_km,
+            s_long_dec::double precision as long,
+            s_lat_dec::double precision as lat,
+            s_hgt_no_appurt::double precision as height
+        from gis_dw_private.private_cci_sites_vw c
+        where
+            s_bu_type_code in ('TW','RT') and
+            s_external_flag = 1 and
+            s_open_space is not null and
+            (%(include_non_lit)s or s_bus_unit in (
+                            select
+                                bus_unit
+                            from
+                                gis_dw_private.private_cci_sites_scrubbing_vw
+                            where
+                                fiber_provider like '%%FPL%%'
+                                or fiber_provider like '%%CROWN CASTLE%%'
+                                or fiber_provider like '%%LIGHTOWER%%')) and
+            st_dwithin(geom::geography, t.geog, t.distance * 1000) and
+            st_distance(t.geog, geom::geography) < (t.distance * 1000)
+        order by geom::geography <-> t.geog
+        limit %(cci_sites_limit)s
+    """,
+    're_asd': """
+        select
+            're_asd'::text as candidate_type,
+            mastersiteid::text as id,
+            round((st_distance(t.geog, st_transform(geom, 4326)::geography)/1000)::numeric, 2) as cand_dist_km,
+            londec::double precision as long,
+            latdec::double precision as lat,
+            height::double precision as height
+        from gis_dw_private.private_site_alt_asd_vw
+        where
+            st_dwithin(st_transform(geom, 4326)::geography, t.geog, t.distance * 1000) and
+            st_distance(t.geog, st_transform(geom, 4326)::geography) < (t.distance * 1000)
+        order by st_transform(geom, 4326)::geography <-> t.geog
+        limit %(re_asd_limit)s
+    """,
+    're_mgt': """
+        select
+            're_mgt'::text as candidate_type,
+            esri_prinx::text as id,
+            round((st_distance(t.geog, st_transform(geom, 4326)::geography)/1000)::numeric, 2) as cand_dist_km,
+            lng_num::double precision as long,
+            lat_num::double precision as lat,
+            bld_hgt_num::double precision as height
+        from gis_dw_private.private_site_alt_mgt_vw
+        where
+            st_dwithin(st_transform(geom, 4326)::geography, t.geog, t.distance * 1000) and
+            st_distance(t.geog, st_transform(geom, 4326)::geography) < (t.distance * 1000)
+        order by st_transform(geom, 4326)::geography <-> t.geog
+        limit %(re_mgt_limit)s
+    """
+}
+
+_ARRAY_TARGETS = """
+    select
+        target_id, longitude, latitude, distance, ordinality as target_order
+    from unnest(%(target_ids)s::text[], %(longitudes)s::float8[], %(latitudes)s::float8[], %(distances)s::float8[])
+        with ordinality as u(target_id, longitude, latitude, distance, ordinality)
+"""
+
+_TEMP_TABLE_TARGETS = "select target_id, longitude, latitude, distance, target_order from fw_batch_targets"
+
+_TEMP_TABLE_DDL = """
+    create temp table if not exists fw_batch_targets
+        (target_id text, longitude float8, latitude float8, distance float8, target_order int8)
+        on commit delete rows
+"""
+
+
+def targets_frame(targets, distance: Optional[float] = None) -> pd.DataFrame:
+    """
+    Normalise batch targets to the target_id/longitude/latitude/distance columns the batch query binds.
+
+    :param targets: DataFrame with longitude & latitude columns (optionally target_id & distance), or an iterable of
+                    (target_id, longitude, latitude) tuples
+    :param distance: Search radius in km for targets without their own distance
+    """
+    if not isinstance(targets, pd.DataFrame):
+        targets = pd.DataFrame(list(targets), columns=['target_id', 'longitude', 'latitude'])
+
+    target_ids = targets['target_id'] if 'target_id' in targets else pd.Series(range(len(targets)), index=targets.index)
+    frame = pd.DataFrame({
+        'target_id': target_ids,
+        'longitude': targets['longitude'],
+        'latitude': targets['latitude'],
+        'distance': targets['distance'] if 'distance' in targets else distance
+    }).reset_index(drop=True)
+
+    if frame['distance'].isna().any():
+        raise ValueError('distance must be supplied for every target, either per target or as the default')
+    if frame['target_id'].duplicated().any():
+        raise ValueError('target_id values must be unique')
+
+    frame['target_id'] = frame['target_id'].astype(str)
+    frame[['longitude', 'latitude', 'distance']] = frame[['longitude', 'latitude', 'distance']].astype('float64')
+    return frame
+
+
+def build_batch_query(candidate_types: Iterable[str], method: str = 'array') -> str:
+    """
+    Compose a single statement returning every candidate of every requested type for every target: each target row
+    drives one LATERAL candidate query per type and the results are stacked with union all.
+
+    :param candidate_types: Subset of queries.CANDIDATE_TYPES, results of each target are stacked in this order
+    :param method: ['array', 'temp_table'] where the targets are read from
+    """
+    if method not in BATCH_METHODS:
+        raise ValueError(f"method must be one of {BATCH_METHODS}, got {method!r}")
+
+    candidate_types = list(OrderedDict.fromkeys(candidate_types))
+    unknown = set(candidate_types) - set(CANDIDATE_TYPES)
+    if unknown or not candidate_types:
+        raise ValueError(f"candidate_types must be a non-empty subset of {CANDIDATE_TYPES}, got {candidate_types}")
+
+    branches = '\n    union all\n'.join(
+        f"""
+    select t.target_id, t.target_order, {position} as type_order, c.*
+    from targets t
+    cross join lateral ({CANDIDATE_LATERALS[candidate_type]}) as c"""
+        for position, candidate_type in enumerate(candidate_types)
+    )
+
+    return f"""
+    with targets as (
+        select
+            s.target_id,
+            s.target_order,
+            s.distance,
+            st_setsrid(st_makepoint(s.longitude, s.latitude), 4326)::geography as geog
+        from ({_ARRAY_TARGETS if method == 'array' else _TEMP_TABLE_TARGETS}) as s
+    )
+    select target_id, {', '.join(CANDIDATE_FIELDS)}
+    from ({branches}
+    ) as candidates
+    order by target_order, type_order, cand_dist_km
+    """
+
+
+def batch_params(targets: pd.DataFrame, limits: Dict[str, int], include_non_lit: bool = False,
+                 method: str = 'array') -> dict:
+    params = dict((f"{candidate_type}_limit", int(limit)) for candidate_type, limit in limits.items())
+    params['include_non_lit'] = bool(include_non_lit)
+
+    if method == 'array':
+        params.update({
+            'target_ids': targets['target_id'].tolist(),
+            'longitudes': targets['longitude'].tolist(),
+            'latitudes': targets['latitude'].tolist(),
+            'distances': targets['distance'].tolist()
+        })
+    return params
+
+
+def _load_temp_table(cursor, targets: pd.DataFrame) -> None:
+    cursor.execute(_TEMP_TABLE_DDL)
+    buffer = io.StringIO()
+    targets.assign(target_order=range(1, len(targets) + 1)).to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.copy_expert(
+        'copy fw_batch_targets (target_id, longitude, latitude, distance, target_order) from stdin with (format csv)',
+        buffer
+    )
+    cursor.execute('analyze fw_batch_targets')
+
+
+def batch_search(conn, targets, limits: Dict[str, int], distance: Optional[float] = None,
+                 include_non_lit: bool = False, method: str = 'array') -> pd.DataFrame:
+    """
+    Candidates for many search points in one statement, tagged with target_id (BATCH_FIELDS).
+
+    :param conn: psycopg2 connection (typically checked out from ODW.pooledConnection)
+    :param targets: See targets_frame
+    :param limits: {candidate_type: limit}, only the candidate types listed are searched (in that order)
+    :param distance: Default search radius in km
+    :param include_non_lit: Keep cci_sites without a lit fiber provider
+    :param method: 'array' binds the targets as arrays (single round trip), 'temp_table' COPYs them into a temp table
+                   first, which gives the planner row estimates for very large batches
+    """
+    targets = targets_frame(targets, distance)
+    query = build_batch_query(limits, method)
+    params = batch_params(targets, limits, include_non_lit, method)
+
+    with conn.cursor() as cur:
+        if method == 'temp_table':
+            _load_temp_table(cur, targets)
+        cur.execute(query, params)
+        rows = cur.fetchall()
+    conn.commit()
+
+    results = pd.DataFrame(rows, columns=BATCH_FIELDS)
+    results['cand_dist_km'] = results['cand_dist_km'].astype('float64')
+    return results
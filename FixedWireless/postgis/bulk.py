@@ -0,0 +1,196 @@
+__all__ = ['copy_query_to_dataframe', 'read_pgcopy_binary', 'PG_TYPE_DTYPES', 'COPY_FORMATS']
+
+import io
+import struct
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+COPY_FORMATS = ('csv', 'binary')
+
+# pandas dtypes for the PostgreSQL type OIDs returned in cursor.description. Anything not listed (e.g. PostGIS
+# geometry whose OID differs per database) is left as an object column, matching what read_sql returns.
+PG_TYPE_DTYPES = {
+    16: 'boolean',  # bool
+    20: 'Int64',  # int8
+    21: 'Int16',  # int2
+    23: 'Int32',  # int4
+    26: 'Int64',  # oid
+    700: 'float32',  # float4
+    701: 'float64',  # float8
+    1700: 'float64',  # numeric
+    18: 'string',  # char
+    19: 'string',  # name
+    25: 'string',  # text
+    1042: 'string',  # bpchar
+    1043: 'string',  # varchar
+}
+
+PG_DATE_TYPES = (1082, 1114, 1184)  # date, timestamp, timestamptz
+
+PG_TIMESTAMPTZ = 1184  # read as UTC datetimes by both formats
+
+_NULL_MARKER = '\\N'
+_PGCOPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_PG_EPOCH = datetime(2000, 1, 1)
+
+
+def _result_columns(cursor, query: str) -> List[Tuple[str, int]]:
+    """
+    Column names and type OIDs of a query, obtained without transferring any rows.
+    """
+    cursor.execute(f"select * from ({query}) as fw_copy_columns limit 0")
+    return [(col.name, col.type_code) for col in cursor.description]
+
+
+def _render(cursor, query: str, params) -> str:
+    # COPY does not accept bind parameters, the statement is rendered client side by psycopg2 instead
+    query = query.strip().rstrip(';')
+    if params is None:
+        return query
+    return cursor.mogrify(query, params).decode()
+
+
+def copy_query_to_dataframe(conn, query: str, params=None, copy_format: str = 'csv') -> pd.DataFrame:
+    """
+    Run query through COPY (...) TO STDOUT, buffer the stream in memory and parse it into a DataFrame whose columns
+    are typed from the query's result description rather than inferred row by row.
+
+    :param conn: psycopg2 connection (typically checked out from ODW.pooledConnection)
+    :param query: SELECT statement
+    :param params: Optional psycopg2 parameters, rendered into the statement before COPY
+    :param copy_format: ['csv', 'binary']
+    """
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f"{copy_format} is not a member of {COPY_FORMATS}")
+
+    with conn.cursor() as cur:
+        query = _render(cur, query, params)
+        columns = _result_columns(cur, query)
+        buffer = io.BytesIO()
+
+        if copy_format == 'csv':
+            cur.copy_expert(f"copy ({query}) to stdout with (format csv, header true, null '\\N')", buffer)
+            buffer.seek(0)
+            return _parse_csv(buffer, columns)
+
+        cur.copy_expert(f"copy ({query}) to stdout with (format binary)", buffer)
+        return read_pgcopy_binary(buffer.getbuffer(), columns)
+
+
+def _parse_csv(buffer, columns: Sequence[Tuple[str, int]]) -> pd.DataFrame:
+    dtypes = {name: PG_TYPE_DTYPES.get(oid, 'object') for name, oid in columns if oid not in PG_DATE_TYPES}
+    parse_dates = [name for name, oid in columns if oid in PG_DATE_TYPES and oid != PG_TIMESTAMPTZ]
+    timestamptz = [name for name, oid in columns if oid == PG_TIMESTAMPTZ]
+
+    # numeric columns are read as float64 by the C parser, bool is read as object then mapped from t/f
+    read_types = {
+        name: ('object' if dtype == 'boolean' else dtype) for name, dtype in dtypes.items()
+    }
+
+    frame = pd.read_csv(
+        buffer,
+        dtype=dict(read_types, **{name: 'object' for name in timestamptz}),
+        parse_dates=parse_dates,
+        keep_default_na=False,
+        na_values=[_NULL_MARKER],
+        encoding='utf-8'
+    )
+
+    for name, dtype in dtypes.items():
+        if dtype == 'boolean':
+            frame[name] = frame[name].map({'t': True, 'f': False}).astype('boolean')
+
+    # text carries the session time zone offset, which can change within a column (DST)
+    for name in timestamptz:
+        frame[name] = pd.to_datetime(frame[name], utc=True)
+
+    return frame
+
+
+def _decode_numeric(value: memoryview) -> Optional[float]:
+    ndigits, weight, sign, dscale = struct.unpack_from('>hhHh', value)
+    if sign == 0xC000:
+        return float('nan')
+    digits = struct.unpack_from(f'>{ndigits}h', value, 8)
+    number = Decimal(0)
+    for idx, digit in enumerate(digits):
+        number += Decimal(digit).scaleb(4 * (weight - idx))
+    return float(-number if sign == 0x4000 else number)
+
+
+_BINARY_DECODERS = {
+    16: lambda v: v[0] != 0,
+    20: lambda v: struct.unpack('>q', v)[0],
+    21: lambda v: struct.unpack('>h', v)[0],
+    23: lambda v: struct.unpack('>i', v)[0],
+    26: lambda v: struct.unpack('>I', v)[0],
+    700: lambda v: struct.unpack('>f', v)[0],
+    701: lambda v: struct.unpack('>d', v)[0],
+    1700: _decode_numeric,
+    18: lambda v: bytes(v).decode('utf-8'),
+    19: lambda v: bytes(v).decode('utf-8'),
+    25: lambda v: bytes(v).decode('utf-8'),
+    1042: lambda v: bytes(v).decode('utf-8'),
+    1043: lambda v: bytes(v).decode('utf-8'),
+    1082: lambda v: date(2000, 1, 1) + timedelta(days=struct.unpack('>i', v)[0]),
+    1114: lambda v: _PG_EPOCH + timedelta(microseconds=struct.unpack('>q', v)[0]),
+    1184: lambda v: _PG_EPOCH + timedelta(microseconds=struct.unpack('>q', v)[0]),
+    17: bytes,  # bytea
+}
+
+
+def _decode_unknown(value: memoryview) -> str:
+    # PostGIS geometry/geography send EWKB, hex encode it so the column matches the read_sql representation
+    return bytes(value).hex().upper()
+
+
+def read_pgcopy_binary(data, columns: Sequence[Tuple[str, int]]) -> pd.DataFrame:
+    """
+    Parse a PGCOPY binary stream into a DataFrame.
+
+    :param data: bytes-like PGCOPY payload
+    :param columns: (name, type OID) pairs in result order
+    """
+    view = memoryview(data)
+    if bytes(view[:11]) != _PGCOPY_SIGNATURE:
+        raise ValueError('Invalid PGCOPY binary header')
+
+    _flags, extension_length = struct.unpack_from('>ii', view, 11)
+    offset = 19 + extension_length
+
+    decoders = [_BINARY_DECODERS.get(oid, _decode_unknown) for _, oid in columns]
+    values: List[list] = [[] for _ in columns]
+    unpack_field_count = struct.Struct('>h').unpack_from
+    unpack_length = struct.Struct('>i').unpack_from
+
+    while True:
+        field_count = unpack_field_count(view, offset)[0]
+        offset += 2
+        if field_count == -1:
+            break
+        if field_count != len(columns):
+            raise ValueError(f"PGCOPY tuple has {field_count} fields, expected {len(columns)}")
+
+        for idx in range(field_count):
+            length = unpack_length(view, offset)[0]
+            offset += 4
+            if length == -1:
+                values[idx].append(None)
+                continue
+            values[idx].append(decoders[idx](view[offset:offset + length]))
+            offset += length
+
+    frame: Dict[str, pd.Series] = {}
+    for (name, oid), column_values in zip(columns, values):
+        dtype = PG_TYPE_DTYPES.get(oid)
+        if oid in PG_DATE_TYPES:
+            frame[name] = pd.to_datetime(pd.Series(column_values, dtype='object'), utc=oid == PG_TIMESTAMPTZ)
+        elif dtype is not None:
+            frame[name] = pd.Series(column_values, dtype=dtype)
+        else:
+            frame[name] = pd.Series(column_values, dtype='object')
+
+    return pd.DataFrame(frame)
@@ -0,0 +1,129 @@
+__all__ = ['CandidateCache', 'SOURCE_RELATIONS', 'SOURCE_VERSION_QUERY']
+
+import json
+import re
+import time
+from os import path
+from typing import Dict, Optional, Tuple
+
+from FixedWireless.postgis.connect import ODW
+from FixedWireless.utils.cache import DiskCache, DEFAULT_CACHE_DIR
+
+# Relations read by the initial search candidate queries, including the rank attribute sources of the *_ranked
+# statements whose results are cached in pipeline mode
+SOURCE_RELATIONS = [
+    'ospi.ne_dw_buildings',
+    'gis_dw_private.private_cci_sites_vw',
+    'gis_dw_private.private_cci_sites_scrubbing_vw',
+    'gis_dw_private.private_site_alt_asd_vw',
+    'gis_dw_private.private_site_alt_mgt_vw',
+    'workspace.fw_lit_building_vertices',
+    'gis_dw_private.private_lit_buildings_vw',
+    'gis_dw_private.private_fcc_active_license_activities_vw',
+    'workspace.fw_building_rankings',
+    'workspace.fw_building_fcc_counts'
+]
+
+# Fingerprint of the tables behind the source relations: views are resolved (recursively) to the relations their
+# rewrite rules depend on, and each relation contributes its insert/update/delete counters. Any write to a base table
+# changes the fingerprint and therefore invalidates the cache. Relations missing from the database (e.g. the vertex
+# table before its migration has run) are skipped.
+SOURCE_VERSION_QUERY = """
+    with recursive sources(relid) as (
+        select to_regclass(relation)::oid
+        from unnest(%(relations)s::text[]) as relation
+        where to_regclass(relation) is not null
+        union
+        select d.refobjid
+        from sources s
+        join pg_rewrite r on r.ev_class = s.relid
+        join pg_depend d on d.objid = r.oid
+            and d.classid = 'pg_rewrite'::regclass
+            and d.refclassid = 'pg_class'::regclass
+        where d.refobjid <> s.relid
+    )
+    select md5(string_agg(
+        concat_ws(':', s.relid, coalesce(st.n_tup_ins, 0), coalesce(st.n_tup_upd, 0), coalesce(st.n_tup_del, 0)),
+        ',' order by s.relid
+    ))
+    from sources s
+    left join pg_stat_all_tables st on st.relid = s.relid
+"""
+
+
+class CandidateCache:
+    """
+    Local cache of initial_search candidate query results keyed by rounded search location and search parameters.
+    Backed by DiskCache (SQLite, TTL + LRU size bound) and invalidated whenever the source tables change.
+    """
+
+    # Last fingerprint check per (store file, environment & user), shared by the instances of a process so consecutive
+    # searches (each with its own CandidateCache) only query the source tables once per version_check_interval
+    _checked_at: Dict[Tuple[str, object], float] = {}
+
+    def __init__(self,
+                 odw: ODW,
+                 filepath: Optional[str] = None,
+                 precision: int = 4,
+                 ttl: Optional[float] = 7 * 24 * 3600,
+                 max_bytes: int = 256 * 1024 ** 2,
+                 version_check_interval: float = 300.0):
+        """
+        :param odw: ODW used to fingerprint the source tables
+        :param filepath: SQLite file, defaults to <FW_CACHE_DIR>/candidate_cache_<environment>_<user>.sqlite so each
+                         ODW environment & user fingerprints and clears its own store
+        :param precision: Decimal places latitude/longitude are rounded to in the key (4 ~ 11 m)
+        :param ttl: Seconds a cached result stays valid
+        :param max_bytes: Size bound for the store, least recently used results are evicted first
+        :param version_check_interval: Seconds between source table fingerprint checks within a process, shared by
+                                       every CandidateCache on the same file & ODW environment/user
+        """
+        self.odw = odw
+        self.precision = precision
+        self.version_check_interval = version_check_interval
+        self.store = DiskCache(filepath or self.default_filepath(odw), max_bytes=max_bytes, ttl=ttl)
+
+    @staticmethod
+    def default_filepath(odw: Optional[ODW]) -> str:
+        pool_key = getattr(odw, 'pool_key', None) or ()
+        suffix = ''.join(f"_{re.sub(r'[^0-9A-Za-z]+', '-', str(part)).lower()}" for part in pool_key)
+        return path.join(DEFAULT_CACHE_DIR, f"candidate_cache{suffix}.sqlite")
+
+    def key(self, function_name: str, longitude: float, latitude: float, distance: float, limit: int,
+            include_non_lit: bool = False) -> str:
+        # environment & user as well, results of different databases never share a key even in a shared filepath
+        return json.dumps([
+            [str(part) for part in getattr(self.odw, 'pool_key', None) or ()],
+            function_name,
+            round(float(longitude), self.precision),
+            round(float(latitude), self.precision),
+            float(distance),
+            int(limit),
+            bool(include_non_lit)
+        ])
+
+    def source_version(self) -> str:
+        with self.odw.pooledConnection() as conn, conn.cursor() as cur:
+            cur.execute(SOURCE_VERSION_QUERY, {'relations': SOURCE_RELATIONS})
+            return cur.fetchone()[0]
+
+    def validate(self, force: bool = False) -> bool:
+        """
+        Fingerprint the source tables (at most once per version_check_interval) and drop every cached result if they
+        changed since the results were stored.
+
+        :return: True if the cache was cleared
+        """
+        check = (path.abspath(self.store.filepath), getattr(self.odw, 'pool_key', None))
+        now = time.monotonic()
+        checked_at = self._checked_at.get(check)
+        if not force and checked_at is not None and now - checked_at < self.version_check_interval:
+            return False
+        self._checked_at[check] = now
+        return self.store.invalidate(self.source_version())
+
+    def get(self, key: str):
+        return self.store.get(key)
+
+    def set(self, key: str, dataframe) -> None:
+        self.store.set(key, dataframe)
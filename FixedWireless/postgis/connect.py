@@ -1,13 +1,42 @@
 import os
 import sys
-import importlib
 import logging
 import traceback
-from typing import Dict, Optional
-from psycopg2 import connect, DatabaseError, OperationalError
-from sqlalchemy import create_engine
+import time
+import uuid
+from contextlib import contextmanager
+from threading import BoundedSemaphore, RLock
+from typing import Dict, Iterator, Optional, Tuple
+from psycopg2 import connect, DatabaseError, OperationalError, InterfaceError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from FixedWireless.utils import lazy
+
+GEOPANDAS_HINT = 'In the Python Terminal type: conda install geopandas and try again'
+
+# heavy dependencies are only imported once a DataFrame flavor / engine is first requested
+pd = lazy.lazy_import('pandas')
+gpd = lazy.lazy_import('geopandas', hint=GEOPANDAS_HINT)
+GeoAccessor = lazy.lazy_import('arcgis.features', 'GeoAccessor')
+GeoSeriesAccessor = lazy.lazy_import('arcgis.features', 'GeoSeriesAccessor')
+sqlalchemy = lazy.lazy_import('sqlalchemy')
+
+DATAFRAME_LIBS = {
+    'pandas': [('pandas', '')],
+    'geopandas': [('pandas', ''), ('geopandas', GEOPANDAS_HINT)],
+    'esri': [
+        ('pandas', ''),
+        ('geopandas', f'Spatially Enabled DataFrame depends on GeoPandas to read directly from PostGIS!\n{GEOPANDAS_HINT}'),
+        ('arcgis', 'Spatially Enabled DataFrame requires the ArcGIS API for Python.')
+    ]
+}
+
+DATAFRAME_PROXIES = {
+    'pandas': [pd],
+    'geopandas': [pd, gpd],
+    'esri': [pd, gpd, GeoAccessor, GeoSeriesAccessor]
+}
 
-pd, gpd, GeoAccessor, GeoSeriesAccessor = None, None, None, None
 
 class ODW:
     """
@@ -26,11 +55,25 @@ class ODW:
         'port': ''
     }
 
+    # Connection pools and SQLAlchemy engines are shared by every ODW instance that targets the same
+    # environment/user pair, so consecutive searches within a process reuse warm connections.
+    _pools: Dict[Tuple[str, str], ThreadedConnectionPool] = {}
+    _engines: Dict[Tuple[str, str], object] = {}
+    _last_checkin: Dict[int, float] = {}
+    # Checkouts beyond max_connections wait on the pool's semaphore instead of failing with PoolError, every borrowed
+    # connection remembers the pool (and semaphore) it has to go back to.
+    _slots: Dict[Tuple[str, str], BoundedSemaphore] = {}
+    _borrowed: Dict[int, Tuple[ThreadedConnectionPool, BoundedSemaphore]] = {}
+    _pool_lock = RLock()
+
     def __init__(self,
                  environment: str = 'ODW_PROD',
                  username: Optional[str] = None,
                  password: Optional[str] = None,
-                 logger_object: Optional[logging.Logger] = None):
+                 logger_object: Optional[logging.Logger] = None,
+                 min_connections: int = 1,
+                 max_connections: int = 8,
+                 health_check_interval: float = 30.0):
         """
         Initialize ODW connection.
 
@@ -39,7 +82,16 @@ class ODW:
         :param username:
         :param password:
         :param logger_object:
+        :param min_connections: Connections opened when the pool for this environment/user is first created
+        :param max_connections: Upper bound on pooled connections (psycopg2 pool & SQLAlchemy engine)
+        :param health_check_interval: Seconds a pooled connection may sit idle before it is pinged on checkout
         """
+        if not 0 < max_connections or min_connections > max_connections:
+            raise ValueError(f"Invalid pool size min={min_connections} max={max_connections}")
+
+        self.min_connections = min_connections
+        self.max_connections = max_connections
+        self.health_check_interval = health_check_interval
         self._env = None
         self.environment = environment
         self._win_user = os.getlogin()
@@ -75,6 +127,7 @@ class ODW:
             user = self._set_user
             password = self._set_password
 
+        self.connection_params = dict(self.connection_params)  # per instance copy, class dict is a template
         self.connection_params.update({
             'host': host,
             'port': int(port),
@@ -127,13 +180,155 @@ class ODW:
 
             return self._conn
 
+    @property
+    def pool_key(self) -> Tuple[str, str]:
+        return self.environment, self.connection_params.get('user')
+
+    @property
+    def pool(self) -> ThreadedConnectionPool:
+        """
+        Thread safe psycopg2 connection pool shared by all instances using the same environment & user.
+        """
+        with self._pool_lock:
+            pool = self._pools.get(self.pool_key)
+            if pool is None or pool.closed:
+                try:
+                    pool = ThreadedConnectionPool(self.min_connections, self.max_connections, **self.connection_params)
+                except (DatabaseError, OperationalError) as db_err:
+                    if self._logger:
+                        self._logger.error(db_err)
+                    print(db_err)
+                    sys.exit(1)
+                self._pools[self.pool_key] = pool
+                self._slots[self.pool_key] = BoundedSemaphore(pool.maxconn)
+            return pool
+
+    @staticmethod
+    def _connectionHealthy(conn, ping: bool) -> bool:
+        if conn.closed:
+            return False
+        if not ping:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('select 1')
+            conn.rollback()
+            return True
+        except (DatabaseError, OperationalError, InterfaceError):
+            return False
+
+    def getPooledConnection(self, timeout: Optional[float] = None) -> connect:
+        """
+        Check a connection out of the pool, waiting for one to be returned when all max_connections are in use.
+        Connections idle for longer than health_check_interval are pinged before being handed out, dead connections
+        are discarded and replaced.
+
+        :param timeout: Seconds to wait for a free connection, None waits indefinitely
+        :raises PoolError: when no connection became free within timeout
+        """
+        with self._pool_lock:
+            pool = self.pool
+            slots = self._slots[self.pool_key]
+
+        if not slots.acquire(timeout=timeout):
+            raise PoolError(f'No pooled connection for {self.environment} became free within {timeout} s')
+
+        try:
+            for _ in range(self.max_connections + 1):
+                conn = pool.getconn()
+                idle = time.monotonic() - self._last_checkin.pop(id(conn), time.monotonic())
+                if self._connectionHealthy(conn, ping=idle > self.health_check_interval):
+                    self._borrowed[id(conn)] = (pool, slots)
+                    return conn
+                if self._logger:
+                    self._logger.warning('Discarding unhealthy pooled ODW connection')
+                pool.putconn(conn, close=True)
+        except BaseException:
+            slots.release()
+            raise
+
+        slots.release()
+        raise OperationalError(f'Unable to check out a healthy connection for {self.environment}')
+
+    def returnPooledConnection(self, conn, close: bool = False) -> None:
+        """
+        Return a connection to the pool it was checked out of, rolling back any open transaction so the next borrower
+        starts clean. A connection whose pool has been closed in the meantime is closed instead.
+        """
+        pool, slots = self._borrowed.pop(id(conn), (None, None))
+        if pool is None:
+            pool = self.pool
+
+        if not conn.closed and not close:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (DatabaseError, OperationalError, InterfaceError):
+                close = True
+
+        close = close or bool(conn.closed)
+        try:
+            if pool.closed:
+                conn.close()
+            else:
+                if not close:
+                    self._last_checkin[id(conn)] = time.monotonic()
+                pool.putconn(conn, close=close)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    @contextmanager
+    def pooledConnection(self):
+        """
+        Context manager around getPooledConnection/returnPooledConnection.
+
+        with odw.pooledConnection() as conn:
+            df = pd.read_sql(query, conn)
+        """
+        conn = self.getPooledConnection()
+        broken = False
+        try:
+            yield conn
+        except (OperationalError, InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.returnPooledConnection(conn, close=broken)
+
+    @classmethod
+    def closePools(cls) -> None:
+        """
+        Close every pooled connection and dispose every cached engine for all environments.
+        """
+        with cls._pool_lock:
+            for pool in cls._pools.values():
+                if not pool.closed:
+                    pool.closeall()
+            for eng in cls._engines.values():
+                eng.dispose()
+            cls._pools.clear()
+            cls._slots.clear()
+            cls._engines.clear()
+            cls._last_checkin.clear()
+
     @property
     def engine(self):
-        func = lambda x: self.connection_params.get(x)
-        eng = create_engine(
-            f'postgresql+psycopg2://{func("user")}:{func("password")}@{func("host")}/{func("database")}?port={func("port")}'
-        )
-        return eng
+        """
+        Long-lived SQLAlchemy engine, created once per environment/user and reused for the life of the process.
+        """
+        with self._pool_lock:
+            eng = self._engines.get(self.pool_key)
+            if eng is None:
+                func = lambda x: self.connection_params.get(x)
+                eng = sqlalchemy.create_engine(
+                    f'postgresql+psycopg2://{func("user")}:{func("password")}@{func("host")}/{func("database")}?port={func("port")}',
+                    pool_size=self.max_connections,
+                    max_overflow=0,
+                    pool_pre_ping=True
+                )
+                self._engines[self.pool_key] = eng
+            return eng
 
     @property
     def cursor(self) -> connect:
@@ -156,36 +351,21 @@ class ODW:
         else:
             raise ValueError(f'Cursor name {name} not member of {list(self._server_cursors.keys())}')
 
-    # TODO refactor this mess
     @staticmethod
     def importDataFrameLib(lib_name):
-
-        if lib_name not in ('pandas', 'geopandas', 'esri'):
+        """
+        Load the libraries a DataFrame flavor depends on. They are lazy proxies at module level so nothing heavier than
+        psycopg2 is imported until a flavor is actually requested.
+        """
+        if lib_name not in DATAFRAME_LIBS:
             raise ValueError(f"{lib_name} is not a member of (pandas, geopandas, esri)")
 
-        if (lib_name.lower() == 'pandas') and ('pandas' not in sys.modules):
-            global pd
-            pd = importlib.import_module('pandas')
-
-        elif (lib_name.lower() == 'geopandas') and ('geopandas' not in sys.modules):
-            global gpd
-            gpd_spec = importlib.util.find_spec('geopandas')
-            if not gpd_spec:
-                raise ImportWarning('Geopandas library not found!\n')
-            gpd = importlib.import_module('geopandas')
-
-        elif lib_name.lower() == 'esri':
-            global GeoAccessor
-            global GeoSeriesAccessor
-            gpd_spec = importlib.util.find_spec('geopandas')
-            if not gpd_spec:
-                raise ImportWarning(
-                    'GeoPandas library not found!\nSpatially Enabled DataFrame depends on GeoPandas to read directly from PostGIS!\n\nIn the Python Terminal type: conda install geopandas and try again\n\n')
-
-            gpd = importlib.import_module('geopandas') if gpd is None else gpd
-            feats = importlib.import_module('arcgis', 'arcgis.features')
-            GeoAccessor = getattr(feats, 'GeoAccessor')
-            GeoSeriesAccessor = getattr(feats, 'GeoSeriesAccessor')
+        for module_name, hint in DATAFRAME_LIBS[lib_name]:
+            if not lazy.is_available(module_name):
+                raise ImportWarning(f'{module_name} library not found!\n{hint}')
+
+        for module in DATAFRAME_PROXIES[lib_name]:
+            lazy.load(module)
 
     # TODO replace current error handling, too generic
     # noinspection PyUnresolvedReferences
@@ -199,7 +379,8 @@ class ODW:
 
         if flavor == 'pandas':
             try:
-                data = pd.read_sql(query, con=self.connection)
+                with self.pooledConnection() as conn:
+                    data = pd.read_sql(query, con=conn)
                 return data
             except Exception as e:
                 if self._logger:
@@ -209,7 +390,8 @@ class ODW:
         elif flavor == 'geopandas':
 
             try:
-                data = gpd.GeoDataFrame.from_postgis(query, con=self.engine.connect(), geom_col=geometry_column)
+                with self.engine.connect() as con:
+                    data = gpd.GeoDataFrame.from_postgis(query, con=con, geom_col=geometry_column)
                 return data
             except Exception as e:
                 print(e)
@@ -217,7 +399,156 @@ class ODW:
         elif flavor == 'esri':
 
             try:
-                data = gpd.GeoDataFrame.from_postgis(query, con=self.engine.connect(), geom_col=geometry_column)
+                with self.engine.connect() as con:
+                    data = gpd.GeoDataFrame.from_postgis(query, con=con, geom_col=geometry_column)
                 return GeoAccessor.from_geodataframe(data)
             except Exception as e:
-                print(e)
\ No newline at end of file
+                print(e)
+
+    # noinspection PyUnresolvedReferences
+    def streamQueryToDataFrame(self,
+                               query: str,
+                               flavor: str = 'pandas',
+                               geometry_column: Optional[str] = None,
+                               fetch_size: int = 10000,
+                               params=None,
+                               crs=None) -> Iterator:
+        """
+        Run a query through a named (server-side) cursor and yield the result set as DataFrame chunks of at most
+        fetch_size rows. Only one chunk is held client side at a time, so peak memory is bounded by fetch_size rather
+        than by the size of the result set.
+
+        for chunk in odw.streamQueryToDataFrame('select * from ospi.ne_dw_buildings', fetch_size=50000):
+            ...
+
+        :param query: SQL string, may contain psycopg2 placeholders supplied through params
+        :param flavor: ['pandas', 'geopandas']
+        :param geometry_column: Name of the geometry column (required for geopandas)
+        :param fetch_size: Number of rows pulled from the server per round trip / per yielded chunk
+        :param params: Optional query parameters
+        :param crs: CRS assigned to GeoDataFrame chunks, inferred from the geometry SRID when omitted
+        """
+        if flavor not in ('pandas', 'geopandas'):
+            raise ValueError(f"{flavor} is not a member of (pandas, geopandas)")
+        if flavor == 'geopandas' and not geometry_column:
+            raise ValueError('geometry_column is required when streaming GeoDataFrame chunks')
+        if fetch_size < 1:
+            raise ValueError(f"fetch_size must be a positive integer, got {fetch_size}")
+
+        self.importDataFrameLib(flavor)
+
+        cursor_name = f"fw_stream_{uuid.uuid4().hex[:12]}"
+
+        with self.pooledConnection() as conn:
+            # a named cursor issues DECLARE ... CURSOR on the server, rows are only transferred on fetchmany
+            with conn.cursor(cursor_name) as cur:
+                cur.itersize = fetch_size
+                cur.execute(query, params)
+                columns = None
+                while True:
+                    rows = cur.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    if columns is None:
+                        columns = [col.name for col in cur.description]
+
+                    chunk = pd.DataFrame.from_records(rows, columns=columns)
+
+                    if flavor == 'geopandas':
+                        if crs is None:
+                            first = chunk[geometry_column].dropna()
+                            srid = _wkb_srid(first.iat[0]) if not first.empty else None
+                            crs = f"EPSG:{srid}" if srid else None
+                        chunk[geometry_column] = gpd.GeoSeries.from_wkb(chunk[geometry_column], index=chunk.index)
+                        chunk = gpd.GeoDataFrame(chunk, geometry=geometry_column, crs=crs)
+
+                    self._debug(f"{cursor_name} streamed {len(chunk.index)} rows")
+                    yield chunk
+
+    def copyQueryToDataFrame(self, query: str, params=None, copy_format: str = 'csv'):
+        """
+        Bulk fetch path: wraps the query in COPY (...) TO STDOUT and parses the buffered stream straight into a typed
+        pandas DataFrame. Much faster than read_sql for wide or long result sets (see benchmarks/copy_transfer.py).
+
+        :param query: SELECT statement
+        :param params: Optional psycopg2 parameters, rendered client side because COPY cannot bind them
+        :param copy_format: ['csv', 'binary']
+        """
+        from FixedWireless.postgis import bulk
+
+        with self.pooledConnection() as conn:
+            return bulk.copy_query_to_dataframe(conn, query, params=params, copy_format=copy_format)
+
+    def preparedQueryToDataFrame(self, bound_statement, prepare: bool = True):
+        """
+        Execute a queries.bind_* statement on a pooled connection. The statement is PREPAREd the first time it runs on
+        a given connection and EXECUTEd with the bound values from then on, reusing the server side plan.
+
+        :param bound_statement: prepared.BoundStatement
+        :param prepare: False sends the SQL with bind parameters but without a server side prepared statement
+        """
+        from FixedWireless.postgis import prepared
+
+        with self.pooledConnection() as conn:
+            return prepared.prepared_to_dataframe(conn, bound_statement, prepare=prepare)
+
+    def idListQueryToDataFrame(self, bound_id_list, prepare: bool = True):
+        """
+        Execute a queries.build_*_rank_query / build_cc_scrub_query statement on a pooled connection, the ids bound as
+        one array or COPYed into a session temp table depending on bound_id_list.method.
+
+        :param bound_id_list: id_lists.BoundIdList
+        :param prepare: PREPARE the array form once per connection
+        """
+        from FixedWireless.postgis import id_lists
+
+        with self.pooledConnection() as conn:
+            return id_lists.id_list_to_dataframe(conn, bound_id_list, prepare=prepare)
+
+    def batchSearchToDataFrame(self, targets, limits: Dict[str, int], distance: Optional[float] = None,
+                               include_non_lit: bool = False, method: str = 'array'):
+        """
+        Initial search candidates for many targets in one statement, tagged with target_id. See
+        batch_search.batch_search for the arguments.
+        """
+        from FixedWireless.postgis import batch_search
+
+        with self.pooledConnection() as conn:
+            return batch_search.batch_search(
+                conn, targets, limits, distance=distance, include_non_lit=include_non_lit, method=method
+            )
+
+    def fetchDataFrame(self, statement, params=None):
+        """
+        Fetch a pandas DataFrame on a pooled connection, raising on failure (unlike queryToDataFrame). Accepts either
+        a SQL string (optionally with params), a queries.bind_* BoundStatement, which runs as a prepared statement, or
+        an id list statement from the queries.build_*_rank_query functions.
+        """
+        from FixedWireless.postgis import id_lists, prepared
+
+        if isinstance(statement, prepared.BoundStatement):
+            return self.preparedQueryToDataFrame(statement)
+        if isinstance(statement, id_lists.BoundIdList):
+            return self.idListQueryToDataFrame(statement)
+
+        self.importDataFrameLib('pandas')
+        with self.pooledConnection() as conn:
+            return pd.read_sql(statement, con=conn, params=params)
+
+    def _debug(self, message: str) -> None:
+        if self._logger:
+            self._logger.debug(message)
+
+
+def _wkb_srid(value) -> Optional[int]:
+    """
+    Extract the SRID embedded in a (hex) EWKB value as returned by psycopg2 for PostGIS geometry columns.
+    """
+    raw = bytes.fromhex(value) if isinstance(value, str) else bytes(value)
+    if len(raw) < 9:
+        return None
+    byteorder = 'little' if raw[0] == 1 else 'big'
+    geom_type = int.from_bytes(raw[1:5], byteorder)
+    if not geom_type & 0x20000000:
+        return None
+    return int.from_bytes(raw[5:9], byteorder)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+__all__ = [
+    'ID_LIST_METHODS', 'TEMP_TABLE_THRESHOLD', 'IdListStatement', 'BoundIdList', 'array_literal', 'id_list_to_dataframe'
+]
+
+import io
+from collections import OrderedDict
+from typing import Iterable, List, NamedTuple, Optional
+
+from FixedWireless.postgis.prepared import PreparedStatement, prepared_to_dataframe
+from FixedWireless.utils import lazy
+
+pd = lazy.lazy_import('pandas')
+
+ID_LIST_METHODS = ('array', 'temp_table')
+
+# Above this many ids the list is COPYed into a temp table instead of being bound as one array value, which keeps the
+# bind value small and gives the planner a row estimate for the semi join (see benchmarks/id_lists.py).
+TEMP_TABLE_THRESHOLD = 10000
+
+_ARRAY_FILTER = '= any(%(ids)s)'
+_TEMP_TABLE_FILTER = 'in (select id from fw_id_list)'
+
+
+def array_literal(ids: Iterable) -> str:
+    """
+    PostgreSQL array literal, '{"1","2"}'. It is bound as an untyped value, so the server casts it to an array of the
+    compared column's type (= any($1)) whatever that type is and the column's index stays usable.
+    """
+    elements = []
+    for value in ids:
+        if value is None:
+            elements.append('NULL')
+        else:
+            elements.append('"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"')
+    return '{' + ','.join(elements) + '}'
+
+
+def _copy_value(value) -> str:
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+
+
+class IdListStatement(NamedTuple):
+    """
+    SQL filtered by a list of ids. The filter on the id column is written as {ids}, "where n.buildingid {ids}", and
+    becomes = any(<bound array>) or a semi join against the fw_id_list temp table. relation & column name what the ids
+    are compared with, the temp table column is created with the same type.
+    """
+    name: str
+    sql: str
+    relation: str
+    column: str
+
+    @property
+    def array_statement(self) -> PreparedStatement:
+        return PreparedStatement(self.name, self.sql.format(ids=_ARRAY_FILTER), (('ids', None),))
+
+    def temp_table_sql(self) -> str:
+        return self.sql.format(ids=_TEMP_TABLE_FILTER)
+
+    def temp_table_ddl(self) -> str:
+        return (
+            f"create temp table fw_id_list on commit drop as "
+            f"select {self.column} as id from {self.relation} with no data"
+        )
+
+    def bind(self, ids: Iterable, method: Optional[str] = None) -> 'BoundIdList':
+        """
+        :param ids: Ids to filter on, duplicates are dropped (first occurrence kept)
+        :param method: ['array', 'temp_table'], None picks temp_table above TEMP_TABLE_THRESHOLD ids
+        """
+        ids = list(OrderedDict.fromkeys(ids))
+        if method is None:
+            method = 'temp_table' if len(ids) > TEMP_TABLE_THRESHOLD else 'array'
+        if method not in ID_LIST_METHODS:
+            raise ValueError(f"method must be one of {ID_LIST_METHODS}, got {method!r}")
+        return BoundIdList(self, ids, method)
+
+
+class BoundIdList(NamedTuple):
+    statement: IdListStatement
+    ids: List[object]
+    method: str
+
+    @property
+    def sql(self) -> str:
+        if self.method == 'array':
+            return self.statement.array_statement.sql
+        return self.statement.temp_table_sql()
+
+
+def id_list_to_dataframe(conn, bound: BoundIdList, prepare: bool = True) -> pd.DataFrame:
+    """
+    Run an IdListStatement bound to its ids.
+
+    :param conn: psycopg2 connection (typically checked out from ODW.pooledConnection)
+    :param bound: BoundIdList from IdListStatement.bind
+    :param prepare: PREPARE the array form once per connection (see prepared.execute_prepared)
+    """
+    if bound.method == 'array':
+        statement = bound.statement.array_statement
+        return prepared_to_dataframe(conn, statement.bind(ids=array_literal(bound.ids)), prepare=prepare)
+
+    buffer = io.StringIO(''.join(_copy_value(value) + '\n' for value in bound.ids))
+
+    with conn.cursor() as cur:
+        cur.execute('drop table if exists fw_id_list')
+        cur.execute(bound.statement.temp_table_ddl())
+        cur.copy_expert('copy fw_id_list (id) from stdin', buffer)
+        cur.execute('analyze fw_id_list')
+        # empty params so %% is unescaped the same way as in the array form
+        cur.execute(bound.statement.temp_table_sql(), {})
+        columns = [col.name for col in cur.description]
+        rows = cur.fetchall()
+    conn.commit()
+
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
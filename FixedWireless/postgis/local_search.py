@@ -0,0 +1,291 @@
+__all__ = [
+    'LocalCandidateSearch', 'SphereIndex', 'SNAPSHOT_QUERIES', 'SNAPSHOT_FIELDS', 'FUNCTION_CANDIDATE_TYPES',
+    'building_vertex_snapshot'
+]
+
+import os
+import time
+from collections import OrderedDict
+from os import path
+from threading import RLock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from FixedWireless.postgis.connect import ODW
+from FixedWireless.postgis.queries import CANDIDATE_FIELDS
+from FixedWireless.utils import geodesy as geodesy
+from FixedWireless.utils import lazy as lazy
+from FixedWireless.utils.cache import DEFAULT_CACHE_DIR
+
+# scipy is optional, without it SphereIndex falls back to a vectorised brute force scan
+spatial = lazy.lazy_import('scipy.spatial')
+
+# Geodesic (ellipsoid) and spherical distances differ by well under 1%, the index is searched with this much headroom
+# and the exact distance filter is applied afterwards.
+_INDEX_MARGIN = 1.01
+
+# Every snapshot row carries the point its distance is measured from (anchor_long/anchor_lat) and the coordinates
+# reported for the candidate (long/lat). They differ for lit buildings, whose distance is measured from the building
+# location while one row is returned per cardinal vertex of the footprint.
+SNAPSHOT_FIELDS = ['candidate_type', 'id', 'anchor_long', 'anchor_lat', 'long', 'lat', 'height', 'is_lit']
+
+SNAPSHOT_QUERIES = OrderedDict([
+    ('ospi', """
+    select
+        'ospi' as candidate_type,
+        o.buildingid::text as id,
+        st_x(o.location) as anchor_long,
+        st_y(o.location) as anchor_lat,
+        st_x(vertices.geom) as long,
+        st_y(vertices.geom) as lat,
+        30::double precision as height,
+        true as is_lit
+    from
+        ospi.ne_dw_buildings o
+    join lateral
+        (
+            select
+                x.name,
+                (public.cc_cardinal_vertices_from_polygon(st_buffer(x.wkt_geometry,-0.000012))).geom
+            from ospi.ne_dw_buildings x
+            where st_intersects(x.location, o.wkt_geometry)
+        ) as vertices on o.name = vertices.name
+    """),
+    ('cci_sites', """
+    select
+        'cci_sites' as candidate_type,
+        s_bus_unit::text as id,
+        st_x(geom) as anchor_long,
+        st_y(geom) as anchor_lat,
+        s_long_dec::double precision as long,
+        s_lat_dec::double precision as lat,
+        s_hgt_no_appurt::double precision as height,
+        coalesce(s_bus_unit in (
+            select
+                bus_unit
+            from
+                gis_dw_private.private_cci_sites_scrubbing_vw
+            where
+                fiber_provider like '%FPL%'
+                or fiber_provider like '%CROWN CASTLE%'
+                or fiber_provider like '%LIGHTOWER%'), false) as is_lit
+    from gis_dw_private.private_cci_sites_vw c
+    where
+        s_bu_type_code in ('TW','RT') and
+        s_external_flag = 1 and
+        s_open_space is not null
+    """),
+    ('re_asd', """
+    select
+        're_asd' as candidate_type,
+        mastersiteid::text as id,
+        st_x(st_transform(geom, 4326)) as anchor_long,
+        st_y(st_transform(geom, 4326)) as anchor_lat,
+        londec::double precision as long,
+        latdec::double precision as lat,
+        height::double precision as height,
+        false as is_lit
+    from gis_dw_private.private_site_alt_asd_vw
+    """),
+    ('re_mgt', """
+    select
+        're_mgt' as candidate_type,
+        esri_prinx::text as id,
+        st_x(st_transform(geom, 4326)) as anchor_long,
+        st_y(st_transform(geom, 4326)) as anchor_lat,
+        lng_num::double precision as long,
+        lat_num::double precision as lat,
+        bld_hgt_num::double precision as height,
+        false as is_lit
+    from gis_dw_private.private_site_alt_mgt_vw
+    """)
+])
+
+# queries.bind_* function used by IdentifyCandidates.initial_search -> snapshot answering it locally
+FUNCTION_CANDIDATE_TYPES = {
+    'bind_lit_building_query': 'ospi',
+    'bind_lit_building_vertex_query': 'ospi',
+    'bind_asd_real_estate_query': 're_asd',
+    'bind_mgt_real_estate_query': 're_mgt',
+    'bind_macro_cci_sites_query': 'cci_sites'
+}
+
+
+def _unit_vectors(longitude, latitude) -> np.ndarray:
+    lon, lat = np.radians(longitude), np.radians(latitude)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def building_vertex_snapshot(ids, anchor_long, anchor_lat, rings: geodesy.Rings) -> pd.DataFrame:
+    """
+    ospi snapshot rows built client side from building footprints (e.g. pulled with st_asgeojson) instead of running
+    cc_cardinal_vertices_from_polygon on the server. Buildings whose footprint collapses under the buffer are dropped,
+    as the lateral join in the server query drops them.
+
+    :param ids: Building ids, one per ring
+    :param anchor_long: Building location longitudes, one per ring
+    :param anchor_lat: Building location latitudes, one per ring
+    :param rings: Footprint exterior rings
+    """
+    vertices = geodesy.cardinal_vertices(rings)
+    count = len(geodesy.CARDINAL_DIRECTIONS)
+
+    frame = pd.DataFrame({
+        'candidate_type': 'ospi',
+        'id': np.repeat(np.asarray(ids).astype(str), count),
+        'anchor_long': np.repeat(np.asarray(anchor_long, dtype='float64'), count),
+        'anchor_lat': np.repeat(np.asarray(anchor_lat, dtype='float64'), count),
+        'long': vertices[:, :, 0].ravel(),
+        'lat': vertices[:, :, 1].ravel(),
+        'height': 30.0,
+        'is_lit': True
+    })
+    return frame.dropna(subset=['long', 'lat']).reset_index(drop=True)
+
+
+class SphereIndex:
+    """
+    Radius search over WGS84 points. Points are stored as unit vectors so a great circle radius becomes a fixed chord
+    length, answered by a scipy cKDTree when scipy is installed and by a vectorised scan otherwise.
+    """
+
+    def __init__(self, longitudes: np.ndarray, latitudes: np.ndarray, use_tree: Optional[bool] = None):
+        """
+        :param longitudes: Point longitudes in decimal degrees
+        :param latitudes: Point latitudes in decimal degrees
+        :param use_tree: Force (True) or skip (False) the cKDTree, defaults to using it when scipy is available
+        """
+        self.longitudes = np.ascontiguousarray(longitudes, dtype='float64')
+        self.latitudes = np.ascontiguousarray(latitudes, dtype='float64')
+        self.vectors = _unit_vectors(self.longitudes, self.latitudes)
+
+        if use_tree is None:
+            use_tree = lazy.is_available('scipy')
+        self.tree = spatial.cKDTree(self.vectors) if use_tree and len(self.vectors) else None
+
+    def __len__(self) -> int:
+        return len(self.longitudes)
+
+    def query(self, longitude: float, latitude: float, distance: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param distance: Search radius in km, points strictly closer than this are returned
+        :return: (row positions, distances in km), unordered
+        """
+        if not len(self):
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+
+        angle = min(distance * 1000 * _INDEX_MARGIN / geodesy.EARTH_RADIUS_M, np.pi)
+        chord = 2 * np.sin(angle / 2)
+        target = _unit_vectors(longitude, latitude)[0]
+
+        if self.tree is not None:
+            positions = np.asarray(self.tree.query_ball_point(target, chord), dtype='int64')
+        else:
+            positions = np.flatnonzero(((self.vectors - target) ** 2).sum(axis=1) <= chord * chord)
+
+        # WGS84 ellipsoid distance, the same measure as st_distance on geography
+        distances = geodesy.vincenty(longitude, latitude, self.longitudes[positions], self.latitudes[positions]) / 1000
+        within = distances < distance
+        return positions[within], distances[within]
+
+
+class LocalCandidateSearch:
+    """
+    In-memory replacement for the initial search candidate queries. The four candidate sources are pulled from ODW
+    once (see SNAPSHOT_QUERIES), kept as coordinate arrays behind a SphereIndex per source, and radius + limit
+    searches are answered locally in the queries.CANDIDATE_FIELDS schema.
+    """
+
+    _shared = dict()
+    _shared_lock = RLock()
+
+    def __init__(self, snapshots: Dict[str, pd.DataFrame], use_tree: Optional[bool] = None):
+        """
+        :param snapshots: {candidate_type: DataFrame with SNAPSHOT_FIELDS}
+        :param use_tree: Passed on to SphereIndex
+        """
+        self.snapshots = dict()
+        self.indexes = dict()
+
+        for candidate_type, frame in snapshots.items():
+            frame = frame.dropna(subset=['anchor_long', 'anchor_lat']).reset_index(drop=True)
+            self.snapshots[candidate_type] = frame
+            self.indexes[candidate_type] = SphereIndex(
+                frame['anchor_long'].to_numpy('float64'), frame['anchor_lat'].to_numpy('float64'), use_tree=use_tree
+            )
+
+    @classmethod
+    def from_odw(cls, odw: ODW, copy_format: str = 'csv') -> 'LocalCandidateSearch':
+        """
+        Snapshot every candidate source through ODW.copyQueryToDataFrame.
+        """
+        return cls(OrderedDict(
+            (candidate_type, odw.copyQueryToDataFrame(query, copy_format=copy_format))
+            for candidate_type, query in SNAPSHOT_QUERIES.items()
+        ))
+
+    @classmethod
+    def load(cls, filepath: str) -> 'LocalCandidateSearch':
+        return cls(pd.read_pickle(filepath))
+
+    def save(self, filepath: str) -> None:
+        folder = path.dirname(path.abspath(filepath))
+        if not path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        pd.to_pickle(self.snapshots, filepath)
+
+    @classmethod
+    def shared(cls, odw: ODW, filepath: Optional[str] = None,
+               max_age: Optional[float] = 24 * 3600) -> 'LocalCandidateSearch':
+        """
+        Process wide engine for an ODW environment/user. The snapshot is read from filepath while it is younger than
+        max_age seconds, otherwise it is pulled from ODW again and written back to filepath.
+
+        :param filepath: Snapshot pickle, defaults to <FW_CACHE_DIR>/candidate_snapshot_<environment>.pkl
+        :param max_age: Seconds a snapshot file is reused, None reuses it indefinitely
+        """
+        with cls._shared_lock:
+            if odw.pool_key in cls._shared:
+                return cls._shared[odw.pool_key]
+
+            filepath = filepath or path.join(DEFAULT_CACHE_DIR, f"candidate_snapshot_{odw.environment}.pkl")
+            fresh = path.isfile(filepath) and (max_age is None or time.time() - path.getmtime(filepath) < max_age)
+
+            if fresh:
+                engine = cls.load(filepath)
+            else:
+                engine = cls.from_odw(odw)
+                engine.save(filepath)
+
+            cls._shared[odw.pool_key] = engine
+            return engine
+
+    @classmethod
+    def clear_shared(cls) -> None:
+        with cls._shared_lock:
+            cls._shared.clear()
+
+    def search(self, candidate_type: str, longitude: float, latitude: float, distance: float, limit: int,
+               include_non_lit: bool = False) -> pd.DataFrame:
+        """
+        Local equivalent of the queries.bind_* candidate statements: rows whose anchor lies strictly within distance
+        km of the search point, nearest first, at most limit rows.
+
+        :param candidate_type: One of queries.CANDIDATE_TYPES
+        :param include_non_lit: cci_sites only, keep sites without a lit fiber provider
+        """
+        frame = self.snapshots[candidate_type]
+        positions, distances = self.indexes[candidate_type].query(longitude, latitude, distance)
+
+        if candidate_type == 'cci_sites' and not include_non_lit:
+            lit = frame['is_lit'].to_numpy(dtype=bool, na_value=False)[positions]
+            positions, distances = positions[lit], distances[lit]
+
+        order = np.argsort(distances, kind='stable')[:max(int(limit), 0)]
+
+        results = frame.iloc[positions[order]].reset_index(drop=True)
+        results['cand_dist_km'] = np.round(distances[order], 2)
+        return results[CANDIDATE_FIELDS]
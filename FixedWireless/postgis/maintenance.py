@@ -0,0 +1,54 @@
+"""
+Scheduled maintenance of the derived tables in the workspace schema.
+
+Usage:
+    python -m FixedWireless.postgis.maintenance --environment ODW_DEV
+"""
+__all__ = ['MIGRATIONS_FOLDER', 'refresh_lit_building_vertices', 'refresh_building_fcc_counts']
+
+import argparse
+from os import path
+from typing import Dict
+
+from FixedWireless.postgis.connect import ODW
+
+MIGRATIONS_FOLDER = path.join(path.dirname(__file__), 'sql', 'migrations')
+
+
+def _call_refresh(odw: ODW, function_name: str) -> Dict[str, int]:
+    with odw.pooledConnection() as conn, conn.cursor() as cur:
+        cur.execute(f"select * from {function_name}()")
+        counts = dict(zip([col.name for col in cur.description], cur.fetchone()))
+        conn.commit()
+    return counts
+
+
+def refresh_lit_building_vertices(odw: ODW) -> Dict[str, int]:
+    """
+    Bring workspace.fw_lit_building_vertices up to date, recomputing only the building name groups whose footprints
+    or locations changed since the last refresh (see migrations/002_lit_building_vertices.sql).
+
+    :return: {'refreshed_groups': n, 'removed_groups': n, 'vertex_rows': n}
+    """
+    return _call_refresh(odw, 'workspace.fw_refresh_lit_building_vertices')
+
+
+def refresh_building_fcc_counts(odw: ODW) -> Dict[str, int]:
+    """
+    Bring workspace.fw_building_fcc_counts up to date, recounting only buildings whose footprint changed or that are
+    near FCC license locations added or removed since the last refresh (see migrations/003_building_fcc_counts.sql).
+
+    :return: {'changed_license_points': n, 'changed_buildings': n, 'recounted_buildings': n}
+    """
+    return _call_refresh(odw, 'workspace.fw_refresh_building_fcc_counts')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--environment', default='ODW_DEV')
+    parser.add_argument('--username', default='CC_GEO_PRIVATE')
+    args = parser.parse_args()
+
+    odw = ODW(environment=args.environment, username=args.username)
+    for refresh in (refresh_lit_building_vertices, refresh_building_fcc_counts):
+        print(refresh.__name__, refresh(odw))
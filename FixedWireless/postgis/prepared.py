@@ -0,0 +1,140 @@
+__all__ = [
+    'PreparedStatement', 'BoundStatement', 'ensure_prepared', 'execute_prepared', 'prepared_to_dataframe', 'prepared_names'
+]
+
+import hashlib
+import re
+from threading import Lock
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+from psycopg2 import errors
+
+from FixedWireless.utils import lazy
+
+pd = lazy.lazy_import('pandas')
+
+_PLACEHOLDER = re.compile(r'%\((\w+)\)s')
+
+_NUMERIC_TYPES = ('int2', 'int4', 'int8', 'float4', 'float8', 'numeric')
+
+# connection -> names of the statements already PREPAREd in that session. Prepared statements live as long as the
+# server session, so the cache is keyed on the (pooled) connection object and disappears with it.
+_PREPARED: 'WeakKeyDictionary[object, Set[str]]' = WeakKeyDictionary()
+_PREPARED_LOCK = Lock()
+
+
+class PreparedStatement(NamedTuple):
+    """
+    Parameterised SQL that can be executed ad hoc with psycopg2 bind parameters or PREPAREd once per connection and
+    then EXECUTEd with new values, reusing the server side parse/plan.
+
+    sql uses psycopg2 named placeholders, %(longitude)s, and %% for literal percent signs. param_types lists every
+    placeholder with its PostgreSQL type, None lets the server infer it from context.
+    """
+    name: str
+    sql: str
+    param_types: Tuple[Tuple[str, Optional[str]], ...]
+
+    @property
+    def server_name(self) -> str:
+        # the hash ties the server side statement to this exact SQL text, edits produce a new statement name
+        digest = hashlib.sha1(self.sql.encode('utf-8')).hexdigest()[:10]
+        return f"{self.name}_{digest}"
+
+    @property
+    def param_names(self) -> List[str]:
+        return [name for name, _ in self.param_types]
+
+    def prepare_sql(self) -> str:
+        positions = {name: idx for idx, name in enumerate(self.param_names, start=1)}
+
+        def positional(match):
+            try:
+                return f"${positions[match.group(1)]}"
+            except KeyError:
+                raise KeyError(f"Placeholder {match.group(1)} missing from param_types of {self.name}")
+
+        body = _PLACEHOLDER.sub(positional, self.sql).replace('%%', '%')
+        # 'unknown' asks the server to infer the parameter type from context
+        types = [pg_type or 'unknown' for _, pg_type in self.param_types]
+        type_list = f" ({', '.join(types)})" if types else ''
+        return f"prepare {self.server_name}{type_list} as {body}"
+
+    def execute_sql(self) -> str:
+        arguments = ', '.join(f"%({name})s" for name in self.param_names)
+        return f"execute {self.server_name} ({arguments})" if arguments else f"execute {self.server_name}"
+
+    def render(self, **params) -> str:
+        """
+        Literal SQL with the values inlined, for EXPLAIN output, benchmarks and the f-string style builders. Only
+        numeric parameters can be rendered, everything else should go through bind.
+        """
+        self.bind(**params)
+        literals = dict()
+        for name, pg_type in self.param_types:
+            if pg_type not in _NUMERIC_TYPES:
+                raise TypeError(f"{self.name}.{name} ({pg_type}) cannot be rendered as a literal, use bind instead")
+            value = params[name]
+            literals[name] = repr(float(value)) if pg_type in ('float4', 'float8', 'numeric') else str(int(value))
+        return self.sql % literals
+
+    def bind(self, **params) -> 'BoundStatement':
+        missing = set(self.param_names) - set(params)
+        extra = set(params) - set(self.param_names)
+        if missing or extra:
+            raise ValueError(f"{self.name} parameter mismatch, missing: {sorted(missing)} unexpected: {sorted(extra)}")
+        return BoundStatement(self, params)
+
+
+class BoundStatement(NamedTuple):
+    statement: PreparedStatement
+    params: Dict[str, object]
+
+    @property
+    def sql(self) -> str:
+        return self.statement.sql
+
+
+def prepared_names(conn) -> Set[str]:
+    with _PREPARED_LOCK:
+        return set(_PREPARED.get(conn, ()))
+
+
+def ensure_prepared(conn, cursor, statement: PreparedStatement) -> None:
+    with _PREPARED_LOCK:
+        known = _PREPARED.setdefault(conn, set())
+        if statement.server_name in known:
+            return
+
+    try:
+        cursor.execute(statement.prepare_sql())
+    except errors.DuplicatePreparedStatement:
+        # prepared by an earlier owner of this pooled session, the failed PREPARE aborted the transaction
+        conn.rollback()
+
+    with _PREPARED_LOCK:
+        _PREPARED.setdefault(conn, set()).add(statement.server_name)
+
+
+def execute_prepared(conn, bound: BoundStatement, prepare: bool = True):
+    """
+    Execute a bound statement and return (column names, rows).
+
+    :param conn: psycopg2 connection, normally from ODW.pooledConnection
+    :param bound: BoundStatement from PreparedStatement.bind
+    :param prepare: PREPARE/EXECUTE on the server (default) or send the SQL with bind parameters only
+    """
+    with conn.cursor() as cur:
+        if prepare:
+            ensure_prepared(conn, cur, bound.statement)
+            cur.execute(bound.statement.execute_sql(), bound.params)
+        else:
+            cur.execute(bound.statement.sql, bound.params)
+
+        columns = [col.name for col in cur.description]
+        return columns, cur.fetchall()
+
+
+def prepared_to_dataframe(conn, bound: BoundStatement, prepare: bool = True):
+    columns, rows = execute_prepared(conn, bound, prepare=prepare)
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
@@ -5,9 +5,24 @@ __all__ = [
     'build_asd_real_estate_rank_query', 'build_mgt_real_estate_rank_query',
     'build_cc_scrub_query','optimized_build_lit_building_query', 'CANDIDATE_TYPES', 'CANDIDATE_FIELDS',
     'CCI_SITES_RANKING_FIELDS', 'LIT_BUILDING_RANKING_FIELDS',
-    'REAL_ESTATE_ASD_RANKING_FIELDS','REAL_ESTATE_MGT_RANKING_FIELDS'
+    'REAL_ESTATE_ASD_RANKING_FIELDS','REAL_ESTATE_MGT_RANKING_FIELDS',
+    'LIT_BUILDING_STATEMENT', 'ASD_REAL_ESTATE_STATEMENT', 'MGT_REAL_ESTATE_STATEMENT',
+    'MACRO_CCI_SITES_STATEMENT', 'MACRO_CCI_SITES_NON_LIT_STATEMENT',
+    'bind_lit_building_query', 'bind_asd_real_estate_query', 'bind_mgt_real_estate_query',
+    'bind_macro_cci_sites_query', 'knn_build_lit_building_query', 'knn_build_asd_real_estate_query',
+    'knn_build_mgt_real_estate_query', 'knn_build_macro_cci_sites_query', 'LIT_BUILDING_VERTEX_STATEMENT',
+    'bind_lit_building_vertex_query', 'build_lit_building_vertex_query', 'build_lit_building_rank_fcc_query',
+    'LIT_BUILDING_RANKED_STATEMENT', 'LIT_BUILDING_RANKED_FCC_STATEMENT', 'ASD_REAL_ESTATE_RANKED_STATEMENT',
+    'MGT_REAL_ESTATE_RANKED_STATEMENT', 'MACRO_CCI_SITES_RANKED_STATEMENT', 'MACRO_CCI_SITES_NON_LIT_RANKED_STATEMENT',
+    'bind_lit_building_ranked_query', 'bind_lit_building_ranked_fcc_query', 'bind_asd_real_estate_ranked_query',
+    'bind_mgt_real_estate_ranked_query', 'bind_macro_cci_sites_ranked_query', 'LIT_BUILDING_RANK_STATEMENT',
+    'LIT_BUILDING_RANK_FCC_STATEMENT', 'MACRO_CCI_SITES_RANK_STATEMENT', 'ASD_REAL_ESTATE_RANK_STATEMENT',
+    'MGT_REAL_ESTATE_RANK_STATEMENT', 'CC_SCRUB_STATEMENT'
 ]
 
+from FixedWireless.postgis.prepared import PreparedStatement
+from FixedWireless.postgis.id_lists import IdListStatement
+
 # CONSTANTS
 CANDIDATE_TYPES = ['ospi', 'cci_sites', 're_asd', 're_mgt']
 
@@ -214,9 +229,487 @@ def build_macro_cci_sites_query(longitude, latitude, distance, limit, include_no
     return macro_query
 
 
+# PREPARED CANDIDATE STATEMENTS
+# Same results as the build_*_query functions above with the search point, distance and limit supplied as bind
+# parameters. ODW.preparedQueryToDataFrame PREPAREs each statement once per pooled connection, so searches that only
+# differ by coordinates skip parsing/planning on the server.
+_SEARCH_PARAM_TYPES = (('longitude', 'float8'), ('latitude', 'float8'), ('distance', 'float8'), ('limit', 'int4'))
+
+# Radius filters use st_dwithin on the geography expression and the limit is taken in KNN order (<->), both of which
+# can be answered from the GiST expression indexes created by sql/migrations/001_candidate_knn_indexes.sql instead of
+# scanning the whole table. KNN ranks on the sphere, the rows returned are re-ordered by the spheroidal cand_dist_km.
+# The lit building limit counts vertex rows as in build_lit_building_query: the vertex lateral runs inside the KNN
+# ordered query so buildings without vertices (or without a name to join them on) never use up the limit, and the
+# vertices are still only computed for the buildings read before the limit is reached.
+LIT_BUILDING_STATEMENT = PreparedStatement(
+    'fw_lit_building',
+    """
+    select * from (
+        select
+            'ospi' as candidate_type,
+            o.buildingid::text as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, o.location::geography)/1000)::numeric, 2) as cand_dist_km,
+            st_x(vertices.geom) as long,
+            st_y(vertices.geom) as lat,
+            30::double precision as height,
+            vertices.geom as pnt_geom
+        from ospi.ne_dw_buildings o
+        -- the lateral join below returns the cardinal extremities (N,S,E,W) of each polygon as points (returns n * 4 rows)
+        join lateral
+            (
+                select
+                    x.name,
+                    (public.cc_cardinal_vertices_from_polygon(st_buffer(x.wkt_geometry,-0.000012))).geom
+
+                from ospi.ne_dw_buildings x
+
+                where st_intersects(x.location, o.wkt_geometry)
+
+            ) as vertices on o.name = vertices.name
+        where
+            st_dwithin(o.location::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, o.location::geography) < (%(distance)s * 1000)
+        order by o.location::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+ASD_REAL_ESTATE_STATEMENT = PreparedStatement(
+    'fw_asd_real_estate',
+    """
+    select * from (
+        select
+            're_asd' as candidate_type,
+            mastersiteid as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, st_transform(geom, 4326)::geography)/1000)::numeric, 2) as cand_dist_km,
+            londec as long,
+            latdec as lat,
+            height
+        from gis_dw_private.private_site_alt_asd_vw
+        where
+            st_dwithin(st_transform(geom, 4326)::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(
+                st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography,
+                st_transform(geom, 4326)::geography
+                ) < (%(distance)s * 1000)
+        order by st_transform(geom, 4326)::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+MGT_REAL_ESTATE_STATEMENT = PreparedStatement(
+    'fw_mgt_real_estate',
+    """
+    select * from (
+        select
+            're_mgt' as candidate_type,
+            esri_prinx as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, st_transform(geom, 4326)::geography)/1000)::numeric, 2) as cand_dist_km,
+            lng_num as long,
+            lat_num as lat,
+            bld_hgt_num as height
+        from gis_dw_private.private_site_alt_mgt_vw
+        where
+            st_dwithin(st_transform(geom, 4326)::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(
+                st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography,
+                st_transform(geom, 4326)::geography
+                ) < (%(distance)s * 1000)
+        order by st_transform(geom, 4326)::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+MACRO_CCI_SITES_STATEMENT = PreparedStatement(
+    'fw_macro_cci_sites',
+    """
+    select * from (
+        select
+            'cci_sites' as candidate_type,
+            s_bus_unit as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, geom::geography)/1000)::numeric, 2) as cand_dist_km,
+            s_long_dec long,
+            s_lat_dec lat,
+            s_hgt_no_appurt height
+        from gis_dw_private.private_cci_sites_vw c
+        where
+            s_bu_type_code in ('TW','RT') and
+            s_external_flag = 1 and
+            s_open_space is not null and
+            s_bus_unit in (
+                            select
+                                bus_unit
+                            from
+                                gis_dw_private.private_cci_sites_scrubbing_vw
+                            where
+                                fiber_provider like '%%FPL%%'
+                                or fiber_provider like '%%CROWN CASTLE%%'
+                                or fiber_provider like '%%LIGHTOWER%%') and
+            st_dwithin(geom::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(
+                st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography,
+                geom::geography
+            ) < (%(distance)s * 1000)
+        order by geom::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+MACRO_CCI_SITES_NON_LIT_STATEMENT = PreparedStatement(
+    'fw_macro_cci_sites_non_lit',
+    """
+    select * from (
+        select
+            'cci_sites' as candidate_type,
+            s_bus_unit as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, geom::geography)/1000)::numeric, 2) as cand_dist_km,
+            s_long_dec long,
+            s_lat_dec lat,
+            s_hgt_no_appurt height
+        from gis_dw_private.private_cci_sites_vw c
+        where
+            s_bu_type_code in ('TW','RT') and
+            s_external_flag = 1 and
+            s_open_space is not null and
+            st_dwithin(geom::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(
+                st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography,
+                geom::geography
+            ) < (%(distance)s * 1000)
+        order by geom::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+
+# Reads the cardinal vertices precomputed by sql/migrations/002_lit_building_vertices.sql (one row per vertex, carrying
+# the building location), so the lit building search is a single indexed KNN lookup with no per building geometry work.
+LIT_BUILDING_VERTEX_STATEMENT = PreparedStatement(
+    'fw_lit_building_vertex',
+    """
+    select * from (
+        select
+            'ospi' as candidate_type,
+            v.buildingid::text as id,
+            round((st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, v.location::geography)/1000)::numeric, 2) as cand_dist_km,
+            st_x(v.geom) as long,
+            st_y(v.geom) as lat,
+            30::double precision as height,
+            v.geom as pnt_geom
+        from workspace.fw_lit_building_vertices v
+        where
+            st_dwithin(v.location::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, v.location::geography) < (%(distance)s * 1000)
+        order by v.location::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ) as nearest
+    order by cand_dist_km
+    """,
+    _SEARCH_PARAM_TYPES
+)
+
+
+def bind_lit_building_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_lit_building_vertex_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_VERTEX_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_asd_real_estate_query(longitude, latitude, distance, limit):
+    return ASD_REAL_ESTATE_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_mgt_real_estate_query(longitude, latitude, distance, limit):
+    return MGT_REAL_ESTATE_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_macro_cci_sites_query(longitude, latitude, distance, limit, include_non_lit=False):
+    statement = MACRO_CCI_SITES_NON_LIT_STATEMENT if include_non_lit else MACRO_CCI_SITES_STATEMENT
+    return statement.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def knn_build_lit_building_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_STATEMENT.render(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def build_lit_building_vertex_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_VERTEX_STATEMENT.render(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def knn_build_asd_real_estate_query(longitude, latitude, distance, limit):
+    return ASD_REAL_ESTATE_STATEMENT.render(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def knn_build_mgt_real_estate_query(longitude, latitude, distance, limit):
+    return MGT_REAL_ESTATE_STATEMENT.render(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def knn_build_macro_cci_sites_query(longitude, latitude, distance, limit, include_non_lit=False):
+    statement = MACRO_CCI_SITES_NON_LIT_STATEMENT if include_non_lit else MACRO_CCI_SITES_STATEMENT
+    return statement.render(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+# SINGLE PASS CANDIDATE + RANKING STATEMENTS
+# Each statement returns the candidates of one type together with the attributes the matching build_*_rank_query
+# would return for them (joined on the raw candidate key inside the statement), so a search needs one round trip per
+# candidate type and no id lists are sent back to ODW. Rank attributes are computed after the KNN limit, only for the
+# candidates returned. Used by IdentifyCandidates(pipeline=True).
+# As in LIT_BUILDING_STATEMENT the limit counts vertex rows, the rank attributes are computed once per building
+_LIT_BUILDING_RANKED_SQL = """
+    with vertex_rows as (
+        select
+            o.buildingid,
+            o.name,
+            o.clli,
+            o.street,
+            o.city,
+            o.state,
+            o.building_type,
+            o.pop_tf,
+            o.wkt_geometry,
+            st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, o.location::geography) as distance_m,
+            vertices.geom
+        from ospi.ne_dw_buildings o
+        join lateral
+            (
+                select
+                    x.name,
+                    (public.cc_cardinal_vertices_from_polygon(st_buffer(x.wkt_geometry,-0.000012))).geom
+                from ospi.ne_dw_buildings x
+                where st_intersects(x.location, o.wkt_geometry)
+            ) as vertices on o.name = vertices.name
+        where
+            st_dwithin(o.location::geography, st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, %(distance)s * 1000) and
+            st_distance(st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography, o.location::geography) < (%(distance)s * 1000)
+        order by o.location::geography <-> st_setsrid(st_makepoint(%(longitude)s, %(latitude)s), 4326)::geography
+        limit %(limit)s
+    ),
+    ranked as (
+        select
+            nearest.buildingid,
+            case when (lit.building_type is null or nearest.pop_tf = true) then nearest.building_type else lit.building_type end as structure,
+            lit.on_net_status,
+            case when lit.clli is not null then 'True' else 'False' end as data_consistency,
+            {fcc_count} as fcc_cnt
+        from (select distinct on (v.buildingid) v.* from vertex_rows v) as nearest
+        left join lateral
+            (
+                select l.clli, l.building_type, l.on_net_status
+                from gis_dw_private.private_lit_buildings_vw l
+                where l.clli = nearest.name
+                limit 1
+            ) as lit on true
+    )
+    select
+        'ospi' as candidate_type,
+        vertex_rows.buildingid::text as id,
+        round((vertex_rows.distance_m/1000)::numeric, 2) as cand_dist_km,
+        st_x(vertex_rows.geom) as long,
+        st_y(vertex_rows.geom) as lat,
+        30::double precision as height,
+        vertex_rows.geom as pnt_geom,
+        vertex_rows.name,
+        vertex_rows.clli,
+        vertex_rows.street,
+        vertex_rows.city,
+        vertex_rows.state,
+        ranked.structure,
+        ranked.on_net_status,
+        ranked.data_consistency,
+        ranked.fcc_cnt
+    from vertex_rows
+    join ranked on ranked.buildingid = vertex_rows.buildingid
+    order by cand_dist_km
+    """
+
+LIT_BUILDING_RANKED_STATEMENT = PreparedStatement(
+    'fw_lit_building_ranked',
+    _LIT_BUILDING_RANKED_SQL.format(fcc_count="""(
+                    select count(*)
+                    from gis_dw_private.private_fcc_active_license_activities_vw as fcc
+                    where st_intersects(st_buffer(nearest.wkt_geometry, 0.000278), fcc.geom)
+                )"""),
+    _SEARCH_PARAM_TYPES
+)
+
+# fcc_cnt read from workspace.fw_building_fcc_counts (sql/migrations/003_building_fcc_counts.sql)
+LIT_BUILDING_RANKED_FCC_STATEMENT = PreparedStatement(
+    'fw_lit_building_ranked_fcc',
+    _LIT_BUILDING_RANKED_SQL.format(fcc_count="""coalesce((
+                    select counts.fcc_cnt
+                    from workspace.fw_building_fcc_counts as counts
+                    where counts.buildingid = nearest.buildingid
+                ), 0)"""),
+    _SEARCH_PARAM_TYPES
+)
+
+_CCI_SITES_RANKS = """
+            select
+                crown_ae,
+                s_bu_type_code as structure,
+                revshare,
+                s_site_name as name,
+                open_levels,
+                current_tower_capacity,
+                last_sa_tia_code_revision,
+                fiber_on_site,
+                fiber_provider,
+                is_cci_power_available,
+                if_no_cci_power_is_meter_avail,
+                power_company,
+                active_apps_count_on_site,
+                s_pop_tier_id::int4 pt_id,
+                s_pop_tier_name poptier,
+                site_address as street,
+                site_city as city,
+                site_county,
+                site_state as state,
+                score::int4
+            from gis_dw_private.private_cci_sites_scrubbing_vw as scrub_sites
+            left join gis_dw_private.private_cci_sites_vw as raw_sites on bus_unit = s_bus_unit
+            left join workspace.fw_building_rankings as c_ranks on s_bu_type_code = c_ranks.candidate_type
+            where candidate_source = 'cci_sites' and scrub_sites.bus_unit = nearest.id
+            group by
+                crown_ae,
+                s_bu_type_code,
+                revshare,
+                s_site_name,
+                open_levels,
+                current_tower_capacity,
+                last_sa_tia_code_revision,
+                fiber_on_site,
+                fiber_provider,
+                is_cci_power_available,
+                if_no_cci_power_is_meter_avail,
+                power_company,
+                active_apps_count_on_site,
+                s_pop_tier_id,
+                s_pop_tier_name,
+                site_address,
+                site_city,
+                site_county,
+                site_state,
+                score
+"""
+
+_ASD_REAL_ESTATE_RANKS = """
+            select
+                macrodealstatus as UID2,
+                sourcesitename as name,
+                streetaddress as street,
+                city,
+                state,
+                structuretype as structure,
+                fiberdistance as Fi_Dist,
+                score::int4
+            from gis_dw_private.private_site_alt_asd_vw asd
+            left join workspace.fw_building_rankings as c_ranks on structuretype = c_ranks.candidate_type
+            where candidate_source = 'cci_sites' and asd.mastersiteid = nearest.id
+            group by
+                macrodealstatus,
+                sourcesitename,
+                streetaddress,
+                city,
+                state,
+                structuretype,
+                fiberdistance,
+                score
+"""
+
+_MGT_REAL_ESTATE_RANKS = """
+            select
+                partner as UID2,
+                alt_site_name as name,
+                city,
+                state,
+                bu_type as structure,
+                nearest_cci_any_fib_dist_m as Fi_Dist
+            from gis_dw_private.private_site_alt_mgt_vw mgt
+            where mgt.esri_prinx = nearest.id
+"""
+
+
+def _ranked_statement(name: str, candidates: PreparedStatement, ranks: str) -> PreparedStatement:
+    # candidate statement as the outer rows (nearest.id is the raw key, before any cast) and the rank attributes of
+    # each candidate from a lateral subquery, rows without rank attributes are kept with nulls like the merge did
+    return PreparedStatement(
+        name,
+        f"""
+    select nearest.*, ranks.*
+    from ({candidates.sql}) as nearest
+    left join lateral ({ranks}        ) as ranks on true
+    order by nearest.cand_dist_km
+    """,
+        candidates.param_types
+    )
+
+
+ASD_REAL_ESTATE_RANKED_STATEMENT = _ranked_statement(
+    'fw_asd_real_estate_ranked', ASD_REAL_ESTATE_STATEMENT, _ASD_REAL_ESTATE_RANKS
+)
+
+MGT_REAL_ESTATE_RANKED_STATEMENT = _ranked_statement(
+    'fw_mgt_real_estate_ranked', MGT_REAL_ESTATE_STATEMENT, _MGT_REAL_ESTATE_RANKS
+)
+
+MACRO_CCI_SITES_RANKED_STATEMENT = _ranked_statement(
+    'fw_macro_cci_sites_ranked', MACRO_CCI_SITES_STATEMENT, _CCI_SITES_RANKS
+)
+
+MACRO_CCI_SITES_NON_LIT_RANKED_STATEMENT = _ranked_statement(
+    'fw_macro_cci_sites_non_lit_ranked', MACRO_CCI_SITES_NON_LIT_STATEMENT, _CCI_SITES_RANKS
+)
+
+
+def bind_lit_building_ranked_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_RANKED_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_lit_building_ranked_fcc_query(longitude, latitude, distance, limit):
+    return LIT_BUILDING_RANKED_FCC_STATEMENT.bind(
+        longitude=longitude, latitude=latitude, distance=distance, limit=limit
+    )
+
+
+def bind_asd_real_estate_ranked_query(longitude, latitude, distance, limit):
+    return ASD_REAL_ESTATE_RANKED_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_mgt_real_estate_ranked_query(longitude, latitude, distance, limit):
+    return MGT_REAL_ESTATE_RANKED_STATEMENT.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+def bind_macro_cci_sites_ranked_query(longitude, latitude, distance, limit, include_non_lit=False):
+    statement = MACRO_CCI_SITES_NON_LIT_RANKED_STATEMENT if include_non_lit else MACRO_CCI_SITES_RANKED_STATEMENT
+    return statement.bind(longitude=longitude, latitude=latitude, distance=distance, limit=limit)
+
+
+# RANKING & SCRUB STATEMENTS
+# Filtered by candidate id lists (id_lists.IdListStatement). The build_* functions return a BoundIdList that
+# ODW.fetchDataFrame runs with the ids bound as a single array value, or COPYed into a temp table for very large lists,
+# so the statement text no longer grows with the number of ids.
+
 # TODO projected coordinate system instead of using WGS84
-def build_lit_building_rank_query(building_id_list):
-    lit_rank_query = f"""
+LIT_BUILDING_RANK_STATEMENT = IdListStatement(
+    'fw_lit_building_rank',
+    """
         with lit as (
                 select distinct on (n.buildingid)
                     n.buildingid as id,
@@ -231,7 +724,7 @@ def build_lit_building_rank_query(building_id_list):
                     l.on_net_status
                 from ospi.ne_dw_buildings n
                 left join gis_dw_private.private_lit_buildings_vw l on l.clli = n.name
-                where n.buildingid in {tuple(building_id_list)}
+                where n.buildingid {ids}
                 
                 ),
             
@@ -269,13 +762,65 @@ def build_lit_building_rank_query(building_id_list):
                 lit.structure,
                 lit.on_net_status,
                 data_consistency
-                """
-    return lit_rank_query
+                """,
+    'ospi.ne_dw_buildings',
+    'buildingid'
+)
 
 
-def build_macro_cci_sites_rank_query(cci_site_id_list):
+def build_lit_building_rank_query(building_id_list, method=None):
+    return LIT_BUILDING_RANK_STATEMENT.bind(building_id_list, method)
+
+
+# same output as build_lit_building_rank_query with fcc_cnt read from workspace.fw_building_fcc_counts (migration
+# 003) and data_consistency checked per ranked building instead of joining every ospi building
+LIT_BUILDING_RANK_FCC_STATEMENT = IdListStatement(
+    'fw_lit_building_rank_fcc',
+    """
+        with lit as (
+                select distinct on (n.buildingid)
+                    n.buildingid as id,
+                    n.name,
+                    n.clli,
+                    n.street,
+                    n.city,
+                    n.state,
+                    case when (l.building_type is null or n.pop_tf = true) then n.building_type else l.building_type end as structure,
+                    l.on_net_status
+                from ospi.ne_dw_buildings n
+                left join gis_dw_private.private_lit_buildings_vw l on l.clli = n.name
+                where n.buildingid {ids}
+                )
 
-    cci_rank_query = f"""
+            select
+                lit.id,
+                lit.name,
+                lit.clli,
+                lit.street,
+                lit.city,
+                lit.state,
+                lit.structure,
+                lit.on_net_status,
+                case when exists (
+                    select 1 from gis_dw_private.private_lit_buildings_vw p where p.clli = lit.name
+                ) then 'True' else 'False' end as data_consistency,
+                coalesce(counts.fcc_cnt, 0) as fcc_cnt
+            from lit
+            left join workspace.fw_building_fcc_counts as counts on counts.buildingid = lit.id
+            where lit.name is not null
+                """,
+    'ospi.ne_dw_buildings',
+    'buildingid'
+)
+
+
+def build_lit_building_rank_fcc_query(building_id_list, method=None):
+    return LIT_BUILDING_RANK_FCC_STATEMENT.bind(building_id_list, method)
+
+
+MACRO_CCI_SITES_RANK_STATEMENT = IdListStatement(
+    'fw_macro_cci_sites_rank',
+    """
             select
                 bus_unit as id,
                 crown_ae,
@@ -301,7 +846,7 @@ def build_macro_cci_sites_rank_query(cci_site_id_list):
             from gis_dw_private.private_cci_sites_scrubbing_vw as scrub_sites
             left join gis_dw_private.private_cci_sites_vw as raw_sites on bus_unit = s_bus_unit
             left join workspace.fw_building_rankings as c_ranks on s_bu_type_code = c_ranks.candidate_type
-            where candidate_source = 'cci_sites' and scrub_sites.bus_unit in {str(tuple(cci_site_id_list)).replace(',)', ')')}
+            where candidate_source = 'cci_sites' and scrub_sites.bus_unit {ids}
                 group by
                 bus_unit,
                 crown_ae,
@@ -324,13 +869,19 @@ def build_macro_cci_sites_rank_query(cci_site_id_list):
                 site_county,
                 site_state,
                 score
-                """
+                """,
+    'gis_dw_private.private_cci_sites_scrubbing_vw',
+    'bus_unit'
+)
 
-    return cci_rank_query
 
+def build_macro_cci_sites_rank_query(cci_site_id_list, method=None):
+    return MACRO_CCI_SITES_RANK_STATEMENT.bind(cci_site_id_list, method)
 
-def build_asd_real_estate_rank_query(alt_real_estate_id_list):
-    re_asd_rank_query = f"""
+
+ASD_REAL_ESTATE_RANK_STATEMENT = IdListStatement(
+    'fw_asd_real_estate_rank',
+    """
             select
                 asd.mastersiteid as id,
                 macrodealstatus as UID2,
@@ -347,7 +898,7 @@ def build_asd_real_estate_rank_query(alt_real_estate_id_list):
                 structuretype = c_ranks.candidate_type
             where
                 candidate_source = 'cci_sites'
-                and asd.mastersiteid in {str(tuple(alt_real_estate_id_list)).replace(',)', ')')}
+                and asd.mastersiteid {ids}
             group by
                 asd.mastersiteid,
                 macrodealstatus,
@@ -358,13 +909,19 @@ def build_asd_real_estate_rank_query(alt_real_estate_id_list):
                 structuretype,
                 fiberdistance,
                 score
-            """
+            """,
+    'gis_dw_private.private_site_alt_asd_vw',
+    'mastersiteid'
+)
 
-    return re_asd_rank_query
 
+def build_asd_real_estate_rank_query(alt_real_estate_id_list, method=None):
+    return ASD_REAL_ESTATE_RANK_STATEMENT.bind(alt_real_estate_id_list, method)
 
-def build_mgt_real_estate_rank_query(mgt_real_estate_id_list):
-    re_mgt_rank_query = f"""
+
+MGT_REAL_ESTATE_RANK_STATEMENT = IdListStatement(
+    'fw_mgt_real_estate_rank',
+    """
             select
                 mgt.esri_prinx as id,
                 partner as UID2,
@@ -378,15 +935,21 @@ def build_mgt_real_estate_rank_query(mgt_real_estate_id_list):
 
             where
 
-                mgt.esri_prinx in {str(tuple(mgt_real_estate_id_list)).replace(',)', ')')}
+                mgt.esri_prinx {ids}
 
-            """
+            """,
+    'gis_dw_private.private_site_alt_mgt_vw',
+    'esri_prinx'
+)
 
-    return re_mgt_rank_query
 
+def build_mgt_real_estate_rank_query(mgt_real_estate_id_list, method=None):
+    return MGT_REAL_ESTATE_RANK_STATEMENT.bind(mgt_real_estate_id_list, method)
 
-def build_cc_scrub_query(id_list):
-    cc_scrub_query = f"""
+
+CC_SCRUB_STATEMENT = IdListStatement(
+    'fw_cc_scrub',
+    """
             select
                 bus_unit,
                 crown_area ,
@@ -414,9 +977,15 @@ def build_cc_scrub_query(id_list):
             from
                 gis_dw_private.private_cci_sites_scrubbing_vw
             where
-                bus_unit in {str(tuple(id_list)).replace(',)', ')')}
-            """
-    return cc_scrub_query
+                bus_unit {ids}
+            """,
+    'gis_dw_private.private_cci_sites_scrubbing_vw',
+    'bus_unit'
+)
+
+
+def build_cc_scrub_query(id_list, method=None):
+    return CC_SCRUB_STATEMENT.bind(id_list, method)
 
 
 def get_vector_sales_query(id_list):
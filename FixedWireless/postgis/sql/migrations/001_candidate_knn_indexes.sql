@@ -0,0 +1,92 @@
+-- 001_candidate_knn_indexes.sql
+--
+-- GiST expression indexes behind the st_dwithin radius filters and <-> KNN ordering of the candidate statements in
+-- FixedWireless/postgis/queries.py. Each candidate relation is resolved (through any number of views) to the table
+-- that owns the geometry column and the index is built on that table with the same expression the statement uses,
+-- so the planner can match it after the view is expanded. Views that rename or compute the geometry column cannot be
+-- resolved and are reported with a NOTICE instead.
+--
+-- Idempotent, run as the owner of the base tables:
+--     psql -d odw -f FixedWireless/postgis/sql/migrations/001_candidate_knn_indexes.sql
+--
+-- create index takes a SHARE lock on each table (writes wait, reads do not) for the duration of the build.
+
+do $migration$
+declare
+    target record;
+    relation oid;
+    attribute text;
+    resolved record;
+    matches integer;
+    index_name text;
+begin
+    for target in
+        select *
+        from (values
+            ('ospi.ne_dw_buildings', 'location', '(%I)'),
+            ('ospi.ne_dw_buildings', 'location', '((%I::geography))'),
+            ('gis_dw_private.private_cci_sites_vw', 'geom', '((%I::geography))'),
+            ('gis_dw_private.private_site_alt_asd_vw', 'geom', '((st_transform(%I, 4326)::geography))'),
+            ('gis_dw_private.private_site_alt_mgt_vw', 'geom', '((st_transform(%I, 4326)::geography))')
+        ) as t(relation_name, column_name, expression)
+    loop
+        relation := to_regclass(target.relation_name);
+        attribute := target.column_name;
+
+        if relation is null then
+            raise notice '% does not exist, skipped', target.relation_name;
+            continue;
+        end if;
+
+        -- follow the view's rewrite rule to the relation the column is read from, until a table is reached
+        while (select relkind from pg_class where oid = relation) = 'v' loop
+            select count(distinct d.refobjid) into matches
+            from pg_rewrite r
+            join pg_depend d on d.objid = r.oid
+                and d.classid = 'pg_rewrite'::regclass
+                and d.refclassid = 'pg_class'::regclass
+                and d.refobjsubid > 0
+            join pg_attribute a on a.attrelid = d.refobjid and a.attnum = d.refobjsubid
+            where r.ev_class = relation and d.refobjid <> relation and a.attname = attribute;
+
+            if matches <> 1 then
+                relation := null;
+                exit;
+            end if;
+
+            select d.refobjid into relation
+            from pg_rewrite r
+            join pg_depend d on d.objid = r.oid
+                and d.classid = 'pg_rewrite'::regclass
+                and d.refclassid = 'pg_class'::regclass
+                and d.refobjsubid > 0
+            join pg_attribute a on a.attrelid = d.refobjid and a.attnum = d.refobjsubid
+            where r.ev_class = relation and d.refobjid <> relation and a.attname = attribute
+            limit 1;
+        end loop;
+
+        if relation is null then
+            raise notice 'could not resolve %.% to a single base table column, skipped', target.relation_name, attribute;
+            continue;
+        end if;
+
+        select n.nspname as schema_name, c.relname as table_name into resolved
+        from pg_class c
+        join pg_namespace n on n.oid = c.relnamespace
+        where c.oid = relation;
+
+        index_name := left(format(
+            'fw_%s_%s_%s', resolved.table_name, attribute,
+            case when target.expression like '%geography%' then 'geog' else 'geom' end
+        ), 63);
+
+        execute format(
+            'create index if not exists %I on %I.%I using gist %s',
+            index_name, resolved.schema_name, resolved.table_name, format(target.expression, attribute)
+        );
+        execute format('analyze %I.%I', resolved.schema_name, resolved.table_name);
+
+        raise notice '% -> %.% (%)', target.relation_name, resolved.schema_name, resolved.table_name, index_name;
+    end loop;
+end
+$migration$;
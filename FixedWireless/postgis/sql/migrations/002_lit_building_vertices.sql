@@ -0,0 +1,100 @@
+-- 002_lit_building_vertices.sql
+--
+-- Precomputed cardinal vertices of every ospi.ne_dw_buildings footprint, read by queries.LIT_BUILDING_VERTEX_STATEMENT
+-- instead of running st_intersects / st_buffer / cc_cardinal_vertices_from_polygon per building on every search.
+--
+-- A building's vertices come from the buildings sharing its name whose location falls inside its footprint (see the
+-- lateral join in queries.build_lit_building_query), so rows are maintained per name group. Each group is fingerprinted
+-- from the ids, locations and footprints of its buildings; workspace.fw_refresh_lit_building_vertices() recomputes
+-- only the groups whose fingerprint changed and drops groups that no longer exist. The first call fills the table.
+--
+-- Idempotent, run once and then schedule the refresh (postgis/maintenance.py):
+--     psql -d odw -f FixedWireless/postgis/sql/migrations/002_lit_building_vertices.sql
+--     psql -d odw -c "select * from workspace.fw_refresh_lit_building_vertices()"
+
+create table if not exists workspace.fw_lit_building_vertices as
+    select
+        o.buildingid,
+        o.name,
+        o.location,
+        o.location as geom
+    from ospi.ne_dw_buildings o
+    with no data;
+
+create table if not exists workspace.fw_lit_building_vertex_groups (
+    name text primary key,
+    group_hash text not null,
+    refreshed timestamptz not null default now()
+);
+
+create index if not exists fw_lit_building_vertices_name on workspace.fw_lit_building_vertices (name);
+create index if not exists fw_lit_building_vertices_location_geog
+    on workspace.fw_lit_building_vertices using gist ((location::geography));
+
+create or replace function workspace.fw_refresh_lit_building_vertices()
+    returns table (refreshed_groups bigint, removed_groups bigint, vertex_rows bigint)
+    language plpgsql
+as $refresh$
+begin
+    drop table if exists fw_vertex_group_hashes, fw_vertex_stale_groups, fw_vertex_changed_groups;
+
+    create temp table fw_vertex_group_hashes on commit drop as
+        select
+            o.name::text as name,
+            md5(string_agg(
+                concat_ws(':', o.buildingid, encode(st_asewkb(o.location), 'hex'), encode(st_asewkb(o.wkt_geometry), 'hex')),
+                ',' order by o.buildingid
+            )) as group_hash
+        from ospi.ne_dw_buildings o
+        where o.name is not null
+        group by o.name;
+
+    create temp table fw_vertex_stale_groups on commit drop as
+        select g.name
+        from workspace.fw_lit_building_vertex_groups g
+        left join fw_vertex_group_hashes h on h.name = g.name
+        where h.group_hash is distinct from g.group_hash;
+
+    create temp table fw_vertex_changed_groups on commit drop as
+        select h.name, h.group_hash
+        from fw_vertex_group_hashes h
+        left join workspace.fw_lit_building_vertex_groups g on g.name = h.name
+        where g.group_hash is distinct from h.group_hash;
+
+    delete from workspace.fw_lit_building_vertices v
+    using fw_vertex_stale_groups s
+    where v.name::text = s.name;
+
+    delete from workspace.fw_lit_building_vertex_groups g
+    using fw_vertex_stale_groups s
+    where g.name = s.name;
+
+    insert into workspace.fw_lit_building_vertices (buildingid, name, location, geom)
+    select
+        o.buildingid,
+        o.name,
+        o.location,
+        vertices.geom
+    from ospi.ne_dw_buildings o
+    join fw_vertex_changed_groups c on c.name = o.name::text
+    join lateral
+        (
+            select
+                x.name,
+                (public.cc_cardinal_vertices_from_polygon(st_buffer(x.wkt_geometry,-0.000012))).geom
+            from ospi.ne_dw_buildings x
+            where st_intersects(x.location, o.wkt_geometry)
+        ) as vertices on o.name = vertices.name;
+
+    insert into workspace.fw_lit_building_vertex_groups (name, group_hash)
+    select name, group_hash from fw_vertex_changed_groups;
+
+    return query
+        select
+            (select count(*) from fw_vertex_changed_groups),
+            (select count(*) from fw_vertex_stale_groups s where not exists (
+                select 1 from fw_vertex_changed_groups c where c.name = s.name
+            )),
+            (select count(*) from workspace.fw_lit_building_vertices);
+end
+$refresh$;
@@ -0,0 +1,117 @@
+-- 003_building_fcc_counts.sql
+--
+-- Number of active FCC license activities within 0.000278 degrees (~30 m) of every ospi.ne_dw_buildings footprint,
+-- read by queries.build_lit_building_rank_fcc_query instead of buffering each ranked building and intersecting it
+-- with gis_dw_private.private_fcc_active_license_activities_vw at query time.
+--
+-- workspace.fw_fcc_license_points keeps a snapshot of the license locations (one row per distinct location with its
+-- license count). workspace.fw_refresh_building_fcc_counts() diffs the view against that snapshot and the buildings
+-- against their stored footprint hashes, then recounts only the buildings whose footprint changed or whose search
+-- area touches a license location that was added, removed or changed count. The first call fills both tables.
+--
+-- Idempotent, run once and then schedule the refresh (postgis/maintenance.py):
+--     psql -d odw -f FixedWireless/postgis/sql/migrations/003_building_fcc_counts.sql
+--     psql -d odw -c "select * from workspace.fw_refresh_building_fcc_counts()"
+
+create table if not exists workspace.fw_fcc_license_points (
+    geom_hash text primary key,
+    geom geometry not null,
+    licenses integer not null
+);
+
+create index if not exists fw_fcc_license_points_geom on workspace.fw_fcc_license_points using gist (geom);
+
+create table if not exists workspace.fw_building_fcc_counts as
+    select
+        o.buildingid,
+        ''::text as footprint_hash,
+        st_buffer(o.wkt_geometry, 0.000278) as search_area,
+        0::bigint as fcc_cnt,
+        now() as refreshed
+    from ospi.ne_dw_buildings o
+    with no data;
+
+create unique index if not exists fw_building_fcc_counts_buildingid on workspace.fw_building_fcc_counts (buildingid);
+create index if not exists fw_building_fcc_counts_search_area
+    on workspace.fw_building_fcc_counts using gist (search_area);
+
+create or replace function workspace.fw_refresh_building_fcc_counts()
+    returns table (changed_license_points bigint, changed_buildings bigint, recounted_buildings bigint)
+    language plpgsql
+as $refresh$
+declare
+    footprint_changes bigint;
+begin
+    drop table if exists fw_fcc_current, fw_fcc_changed, fw_fcc_buildings_current, fw_fcc_buildings_dirty;
+
+    -- license locations as they are now, collapsed to one row per distinct location
+    create temp table fw_fcc_current on commit drop as
+        select
+            md5(st_asewkb(geom)) as geom_hash,
+            (array_agg(geom))[1] as geom,
+            count(*)::integer as licenses
+        from gis_dw_private.private_fcc_active_license_activities_vw
+        where geom is not null
+        group by 1;
+
+    create temp table fw_fcc_changed on commit drop as
+        select coalesce(c.geom, p.geom) as geom
+        from fw_fcc_current c
+        full join workspace.fw_fcc_license_points p on p.geom_hash = c.geom_hash
+        where c.licenses is distinct from p.licenses;
+
+    delete from workspace.fw_fcc_license_points p
+    where not exists (select 1 from fw_fcc_current c where c.geom_hash = p.geom_hash);
+
+    insert into workspace.fw_fcc_license_points (geom_hash, geom, licenses)
+    select geom_hash, geom, licenses from fw_fcc_current
+    on conflict (geom_hash) do update set licenses = excluded.licenses
+    where fw_fcc_license_points.licenses is distinct from excluded.licenses;
+
+    -- buildings as they are now
+    create temp table fw_fcc_buildings_current on commit drop as
+        select o.buildingid, md5(st_asewkb(o.wkt_geometry)) as footprint_hash, o.wkt_geometry
+        from ospi.ne_dw_buildings o
+        where o.wkt_geometry is not null;
+
+    delete from workspace.fw_building_fcc_counts b
+    where not exists (select 1 from fw_fcc_buildings_current c where c.buildingid = b.buildingid);
+
+    create temp table fw_fcc_buildings_dirty on commit drop as
+        select c.buildingid
+        from fw_fcc_buildings_current c
+        left join workspace.fw_building_fcc_counts b on b.buildingid = c.buildingid
+        where b.footprint_hash is distinct from c.footprint_hash;
+
+    select count(*) into footprint_changes from fw_fcc_buildings_dirty;
+
+    insert into workspace.fw_building_fcc_counts (buildingid, footprint_hash, search_area, fcc_cnt, refreshed)
+    select c.buildingid, c.footprint_hash, st_buffer(c.wkt_geometry, 0.000278), 0, now()
+    from fw_fcc_buildings_current c
+    join fw_fcc_buildings_dirty d on d.buildingid = c.buildingid
+    on conflict (buildingid) do update set
+        footprint_hash = excluded.footprint_hash,
+        search_area = excluded.search_area;
+
+    insert into fw_fcc_buildings_dirty (buildingid)
+    select distinct b.buildingid
+    from workspace.fw_building_fcc_counts b
+    join fw_fcc_changed f on st_intersects(b.search_area, f.geom);
+
+    update workspace.fw_building_fcc_counts b
+    set
+        fcc_cnt = coalesce((
+            select sum(p.licenses)
+            from workspace.fw_fcc_license_points p
+            where st_intersects(b.search_area, p.geom)
+        ), 0),
+        refreshed = now()
+    where b.buildingid in (select buildingid from fw_fcc_buildings_dirty);
+
+    return query
+        select
+            (select count(*) from fw_fcc_changed),
+            footprint_changes,
+            (select count(distinct buildingid) from fw_fcc_buildings_dirty);
+end
+$refresh$;
@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class StubServer:
+    """
+    Local HTTP server for client tests. handler(path, query) returns (status, payload) and can inspect/modify the
+    shared state. Every request waits latency seconds and is recorded with the client port (one per connection).
+    """
+
+    def __init__(self, handler, latency: float = 0.0):
+        self.handler = handler
+        self.latency = latency
+        self.requests = []
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                with stub.lock:
+                    stub.requests.append((self.client_address[1], parsed.path, parse_qs(parsed.query)))
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    time.sleep(stub.latency)
+                    status, payload = stub.handler(parsed.path, parse_qs(parsed.query))
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(handler, latency: float = 0.0) -> StubServer:
+        server = StubServer(handler, latency).__enter__()
+        servers.append(server)
+        return server
+
+    yield start
+
+    for server in servers:
+        server.__exit__(None, None, None)
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+import time
+import pytest
+from FixedWireless.postgis.async_connect import AsyncODW, run_sync
+
+
+class SlowODW:
+    """Stands in for ODW: every fetch takes the same simulated round trip."""
+
+    max_connections = 4
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+
+    def fetchDataFrame(self, statement, params=None):
+        time.sleep(self.latency)
+        if statement == 'fail':
+            raise RuntimeError('query failed')
+        return statement.upper()
+
+
+@pytest.fixture
+def async_odw():
+    client = AsyncODW(SlowODW())
+    yield client
+    client.close()
+
+
+class TestAsyncODW:
+
+    def test_gather_runs_concurrently(self, async_odw):
+        statements = {'lit': 'ospi', 'asd': 're_asd', 'mgt': 're_mgt', 'cci': 'cci_sites'}
+
+        start = time.perf_counter()
+        results = run_sync(async_odw.gatherDataFrames(statements))
+        elapsed = time.perf_counter() - start
+
+        assert list(results) == ['lit', 'asd', 'mgt', 'cci']
+        assert results['cci'] == 'CCI_SITES'
+        assert elapsed < 2 * SlowODW().latency
+
+    def test_gather_raises_first_error(self, async_odw):
+        with pytest.raises(RuntimeError):
+            run_sync(async_odw.gatherDataFrames({'ok': 'ospi', 'bad': 'fail'}))
+
+    def test_run_sync_inside_running_loop(self, async_odw):
+        async def caller():
+            return run_sync(async_odw.gatherDataFrames({'lit': 'ospi', 'cci': 'cci_sites'}))
+
+        assert asyncio.run(caller()) == {'lit': 'OSPI', 'cci': 'CCI_SITES'}
+
+    def test_close_stops_workers(self, async_odw):
+        run_sync(async_odw.gatherDataFrames({'lit': 'ospi', 'cci': 'cci_sites'}))
+        workers = [thread for thread in threading.enumerate() if thread.name.startswith('odw_')]
+        assert workers
+
+        async_odw.close()
+
+        assert not any(thread.is_alive() for thread in workers)
+        assert run_sync(async_odw.gatherDataFrames({'lit': 'ospi'})) == {'lit': 'OSPI'}
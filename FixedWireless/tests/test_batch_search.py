@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from FixedWireless.postgis.batch_search import CANDIDATE_LATERALS, targets_frame, build_batch_query, batch_params
+
+
+@pytest.fixture
+def targets():
+    return pd.DataFrame({
+        'target_id': [101, 102, 103],
+        'longitude': [-73.9913778, -73.982144, -73.960157],
+        'latitude': [40.7390831, 40.763967, 40.760557]
+    })
+
+
+class TestBatchSearch:
+
+    def test_targets_frame(self, targets):
+        frame = targets_frame(targets, distance=2)
+
+        assert frame.columns.tolist() == ['target_id', 'longitude', 'latitude', 'distance']
+        assert frame['target_id'].tolist() == ['101', '102', '103']
+        assert (frame['distance'] == 2.0).all()
+
+        from_tuples = targets_frame(list(targets.itertuples(index=False, name=None)), distance=2)
+        assert from_tuples.equals(frame)
+
+    def test_targets_frame_validation(self, targets):
+        with pytest.raises(ValueError):
+            targets_frame(targets)
+        with pytest.raises(ValueError):
+            targets_frame(pd.concat([targets, targets]), distance=2)
+
+    def test_query_composition(self):
+        query = build_batch_query(['ospi', 're_asd', 'cci_sites'])
+
+        assert query.count('cross join lateral') == 3
+        assert query.count('union all') == 2
+        assert '%(re_mgt_limit)s' not in query
+        assert query.index('ospi_limit') < query.index('re_asd_limit') < query.index('cci_sites_limit')
+        assert 'fw_batch_targets' in build_batch_query(['ospi'], method='temp_table')
+
+        with pytest.raises(ValueError):
+            build_batch_query(['towers'])
+        with pytest.raises(ValueError):
+            build_batch_query(['ospi'], method='csv')
+
+    def test_params(self, targets):
+        frame = targets_frame(targets, distance=3)
+        params = batch_params(frame, {'ospi': 40, 'cci_sites': 10}, include_non_lit=True)
+
+        assert params['ospi_limit'] == 40 and params['cci_sites_limit'] == 10
+        assert params['include_non_lit'] is True
+        assert params['target_ids'] == ['101', '102', '103']
+        assert 'target_ids' not in batch_params(frame, {'ospi': 40}, method='temp_table')
+
+    @pytest.mark.parametrize('candidate_type, expression', [
+        ('ospi', 'o.location::geography'),
+        ('cci_sites', 'geom::geography'),
+        ('re_asd', 'st_transform(geom, 4326)::geography'),
+        ('re_mgt', 'st_transform(geom, 4326)::geography')
+    ])
+    def test_laterals_use_indexed_expressions(self, candidate_type, expression):
+        lateral = ' '.join(CANDIDATE_LATERALS[candidate_type].split())
+
+        assert f"st_dwithin({expression}, t.geog, t.distance * 1000)" in lateral
+        assert f"order by {expression} <-> t.geog limit %({candidate_type}_limit)s" in lateral
@@ -0,0 +1,78 @@
+import io
+import struct
+from datetime import datetime
+import pytest
+from FixedWireless.postgis.bulk import read_pgcopy_binary, _parse_csv
+
+COLUMNS = [('id', 23), ('name', 25), ('score', 701), ('fi_dist', 1700), ('fiber_on_site', 16), ('pnt_geom', 99999)]
+
+
+def _field(value: bytes) -> bytes:
+    return struct.pack('>i', len(value)) + value
+
+
+def _null() -> bytes:
+    return struct.pack('>i', -1)
+
+
+def _numeric(weight, sign, digits) -> bytes:
+    return struct.pack('>hhHh', len(digits), weight, sign, 2) + struct.pack(f'>{len(digits)}h', *digits)
+
+
+@pytest.fixture
+def pgcopy_payload():
+    rows = [
+        [_field(struct.pack('>i', 7)), _field(b'abc'), _field(struct.pack('>d', 1.5)),
+         _field(_numeric(0, 0, [12, 3400])), _field(b'\x01'), _field(bytes.fromhex('0101000020e6100000'))],
+        [_null(), _field(b''), _null(), _field(_numeric(0, 0x4000, [5])), _null(), _null()]
+    ]
+    payload = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+    for row in rows:
+        payload += struct.pack('>h', len(row)) + b''.join(row)
+    return payload + struct.pack('>h', -1)
+
+
+@pytest.fixture
+def csv_payload():
+    return io.BytesIO(b'id,name,score,fi_dist,fiber_on_site\n7,abc,1.5,12.34,t\n\\N,"",\\N,-5,\\N\n')
+
+
+class TestBulk:
+
+    def test_read_pgcopy_binary(self, pgcopy_payload):
+        df = read_pgcopy_binary(pgcopy_payload, COLUMNS)
+
+        assert df.shape == (2, 6)
+        assert str(df['id'].dtype) == 'Int32'
+        assert df['fi_dist'].tolist() == [12.34, -5.0]
+        assert df['fiber_on_site'].tolist()[0] is True
+        assert df['pnt_geom'].iloc[0] == '0101000020E6100000'
+        assert df['name'].iloc[1] == ''
+        assert df['id'].isna().iloc[1]
+
+    def test_read_pgcopy_binary_bad_header(self):
+        with pytest.raises(ValueError):
+            read_pgcopy_binary(b'not a pgcopy stream', COLUMNS)
+
+    def test_parse_csv_keeps_empty_strings_and_nulls_apart(self, csv_payload):
+        df = _parse_csv(csv_payload, COLUMNS[:5])
+
+        assert str(df['fiber_on_site'].dtype) == 'boolean'
+        assert df['name'].tolist()[1] == ''
+        assert df['score'].isna().iloc[1]
+        assert df['id'].isna().iloc[1]
+
+    def test_timestamptz_is_utc_in_both_formats(self):
+        columns = [('ts', 1184)]
+        microseconds = int((datetime(2024, 7, 1, 16) - datetime(2000, 1, 1)).total_seconds() * 1e6)
+        payload = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+        payload += struct.pack('>h', 1) + _field(struct.pack('>q', microseconds))
+        payload += struct.pack('>h', 1) + _null() + struct.pack('>h', -1)
+
+        binary = read_pgcopy_binary(payload, columns)
+        text = _parse_csv(io.BytesIO(b'ts\n2024-07-01 12:00:00-04\n\\N\n'), columns)
+
+        assert binary['ts'].dtype == text['ts'].dtype
+        assert str(binary['ts'].dt.tz) == 'UTC'
+        assert binary['ts'].iloc[0] == text['ts'].iloc[0]
+        assert binary['ts'].isna().iloc[1] and text['ts'].isna().iloc[1]
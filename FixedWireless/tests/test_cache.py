@@ -0,0 +1,161 @@
+import re
+import time
+import pandas as pd
+import pytest
+from FixedWireless.utils.cache import DiskCache
+from FixedWireless.postgis import queries
+from FixedWireless.postgis.candidate_cache import CandidateCache, SOURCE_RELATIONS
+
+
+@pytest.fixture
+def store(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache.sqlite'), max_bytes=10 * 1024, ttl=60)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def candidates():
+    return pd.DataFrame({
+        'candidate_type': ['ospi', 'cci_sites'], 'id': ['63647367', '815871'], 'cand_dist_km': [0.42, 1.3],
+        'long': [-73.982144, -73.95], 'lat': [40.763967, 40.75], 'height': [30.0, 120.0]
+    })
+
+
+class TestDiskCache:
+
+    def test_round_trip(self, store, candidates):
+        store.set('lit', candidates)
+
+        assert 'lit' in store
+        assert store.get('lit').equals(candidates)
+        assert store.get('missing', 'default') == 'default'
+
+    def test_persists_between_instances(self, tmp_path, candidates):
+        filepath = str(tmp_path / 'cache.sqlite')
+        DiskCache(filepath).set('lit', candidates)
+
+        assert DiskCache(filepath).get('lit').equals(candidates)
+
+    def test_ttl_expiry(self, store):
+        store.ttl = 0.05
+        store.set('short_lived', 1)
+        time.sleep(0.1)
+
+        assert store.get('short_lived') is None
+        assert len(store) == 0
+
+    def test_lru_eviction(self, store):
+        payload = b'x' * 3000
+        for key in ['a', 'b', 'c']:
+            store.set(key, payload)
+            time.sleep(0.01)
+
+        store.get('a')  # a is now more recent than b
+        store.set('d', payload)
+
+        assert store.size <= store.max_bytes
+        assert 'b' not in store
+        assert 'a' in store and 'd' in store
+
+    def test_invalidate(self, store):
+        assert not store.invalidate('v1')
+        store.set('lit', 1)
+
+        assert not store.invalidate('v1')
+        assert 'lit' in store
+
+        assert store.invalidate('v2')
+        assert len(store) == 0
+
+
+class TestCandidateCacheKey:
+
+    def test_rounds_location(self, tmp_path):
+        cache = CandidateCache(odw=None, filepath=str(tmp_path / 'candidates.sqlite'), precision=4)
+
+        near = cache.key('bind_lit_building_query', -73.99137781, 40.73908311, 2, 100)
+        same = cache.key('bind_lit_building_query', -73.99138, 40.73908, 2, 100)
+        other_limit = cache.key('bind_lit_building_query', -73.99138, 40.73908, 2, 50)
+        non_lit = cache.key('bind_lit_building_query', -73.99138, 40.73908, 2, 100, include_non_lit=True)
+
+        assert near == same
+        assert len({same, other_limit, non_lit}) == 3
+
+    def test_separates_environments(self, tmp_path):
+        class FakeODW:
+            def __init__(self, environment):
+                self.pool_key = (environment, 'CC_GEO_PRIVATE')
+
+        filepath = str(tmp_path / 'candidates.sqlite')
+        prod = CandidateCache(FakeODW('ODW_PROD'), filepath=filepath)
+        dev = CandidateCache(FakeODW('ODW_DEV'), filepath=filepath)
+
+        assert prod.key('bind_lit_building_query', -73.99, 40.73, 2, 100) != \
+            dev.key('bind_lit_building_query', -73.99, 40.73, 2, 100)
+        assert CandidateCache.default_filepath(FakeODW('ODW_PROD')).endswith('candidate_cache_odw-prod_cc-geo-private.sqlite')
+        assert CandidateCache.default_filepath(None).endswith('candidate_cache.sqlite')
+
+
+class TestCandidateCacheValidate:
+
+    def test_one_fingerprint_per_interval_across_instances(self, tmp_path, monkeypatch):
+        calls = []
+        monkeypatch.setattr(CandidateCache, '_checked_at', {})
+        monkeypatch.setattr(CandidateCache, 'source_version', lambda self: calls.append(1) or 'v1')
+        filepath = str(tmp_path / 'candidates.sqlite')
+
+        first = CandidateCache(odw=None, filepath=filepath, version_check_interval=60)
+        first.validate()
+        second = CandidateCache(odw=None, filepath=filepath, version_check_interval=60)
+        second.validate()
+
+        assert len(calls) == 1
+
+        second.validate(force=True)
+        CandidateCache(odw=None, filepath=str(tmp_path / 'other.sqlite')).validate()
+        assert len(calls) == 3
+
+    @pytest.mark.parametrize('function_name', [
+        name for name in queries.__all__ if name.startswith('bind_')
+    ])
+    def test_fingerprint_covers_cached_statements(self, function_name):
+        statement = getattr(queries, function_name)(-73.98, 40.76, 2, 25)
+        relations = set(re.findall(r'(?:from|join)\s+(\w+\.\w+)', statement.sql))
+
+        assert relations and relations <= set(SOURCE_RELATIONS)
+
+
+class TestDiskCacheBulk:
+
+    def test_get_many_set_many(self, store):
+        store.set_many({'a': 1, 'b': [2], 'c': {'x': 3}})
+
+        assert store.get_many(['a', 'c', 'missing', 'a']) == {'a': 1, 'c': {'x': 3}}
+        assert len(store) == 3
+
+    def test_stats(self, store):
+        store.set('a', 1)
+        store.get('a')
+        store.get('b')
+        store.get_many(['a', 'b', 'c'])
+
+        stats = store.stats
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 3, 1)
+        assert stats['hit_rate'] == pytest.approx(0.4)
+
+    def test_get_many_expiry_and_size_bound(self, store):
+        store.set_many({key: b'x' * 3000 for key in 'abcde'})
+        assert store.size <= store.max_bytes
+
+        store.ttl = 0.05
+        time.sleep(0.1)
+        assert store.get_many('abcde') == {}
+        assert len(store) == 0
+
+    def test_get_many_large_batches(self, store):
+        store.max_bytes = 10 * 1024 ** 2
+        store.set_many({str(i): i for i in range(1200)})
+
+        found = store.get_many(str(i) for i in range(0, 1500, 3))
+        assert len(found) == 400 and found['999'] == 999
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from FixedWireless.postgis.queries import CANDIDATE_FIELDS
+from FixedWireless.utils import lazy
+from FixedWireless.utils.candidate_table import CandidateTable
+
+
+@pytest.fixture(params=[
+    pytest.param(True, id='arrow', marks=pytest.mark.skipif(not lazy.is_available('pyarrow'), reason='no pyarrow')),
+    pytest.param(False, id='pandas')
+])
+def table(request):
+    table = CandidateTable.from_pandas(pd.DataFrame(columns=CANDIDATE_FIELDS), arrow=request.param)
+    table.append(pd.DataFrame({
+        'candidate_type': ['ospi', 'ospi'], 'id': [63647367, 63647368], 'cand_dist_km': [0.42, 0.5],
+        'long': [-73.982144, -73.98], 'lat': [40.763967, 40.76], 'height': [None, 45.0]
+    }))
+    table.append(pd.DataFrame({
+        'candidate_type': ['cci_sites'], 'id': ['815871'], 'cand_dist_km': [1.3], 'long': [-73.95], 'lat': [40.75],
+        'height': [120.0], 'pnt_geom': ['POINT(-73.95 40.75)']
+    }))
+    return table
+
+
+@pytest.fixture
+def ranks():
+    return [
+        pd.DataFrame({'id': ['63647368', '63647367'], 'name': ['Tower B', 'Tower A'], 'fcc_cnt': [2, 0],
+                      'state': ['NY', 'NY'], 'height': [1.0, 2.0]}),
+        pd.DataFrame({'id': [815871], 'name': ['Site'], 'revshare': [0.3], 'structure': ['MONOPOLE']}),
+    ]
+
+
+class TestCandidateTable:
+
+    def test_batches_and_key_normalisation(self, table):
+        assert len(table) == 3
+        assert table.columns == CANDIDATE_FIELDS + ['pnt_geom']
+        assert table.column('id').tolist() == ['63647367', '63647368', '815871']
+        assert table.groups('candidate_type') == {'ospi': ['63647367', '63647368'], 'cci_sites': ['815871']}
+
+    def test_dictionary_encoded_columns(self, table):
+        frame = table.to_pandas()
+
+        assert isinstance(frame['candidate_type'].dtype, pd.CategoricalDtype)
+        assert frame['candidate_type'].tolist() == ['ospi', 'ospi', 'cci_sites']
+        assert table.column('candidate_type').tolist() == ['ospi', 'ospi', 'cci_sites']
+
+    def test_fill_set_filter(self, table):
+        table.fill_null('height', 30.0)
+        assert table.column('height').tolist() == [30.0, 45.0, 120.0]
+
+        table.set_column('Clearance_Score', np.array(['Pass', 'Delete', 'Fail'], dtype=object))
+        kept = table.filter(table.column('Clearance_Score') != 'Delete')
+
+        assert kept.column('id').tolist() == ['63647367', '815871']
+        assert len(table) == 3
+
+    def test_projection(self, table):
+        projected = table.select(['id', 'lat'])
+
+        assert projected.columns == ['id', 'lat']
+        assert projected.to_pandas().equals(table.to_pandas(['id', 'lat']))
+        if table.arrow:
+            # the projection shares the column buffers
+            assert projected.table.column('lat').chunk(0).buffers()[1].address == \
+                table.table.column('lat').chunk(0).buffers()[1].address
+
+    def test_join_keeps_order_and_suffixes_clashes(self, table, ranks):
+        combined = CandidateTable(arrow=table.arrow)
+        for frame in ranks:
+            combined.append(CandidateTable.from_pandas(frame, arrow=table.arrow))
+
+        joined = table.join(combined).to_pandas()
+
+        assert joined['id'].tolist() == ['63647367', '63647368', '815871']
+        assert joined['name'].tolist() == ['Tower A', 'Tower B', 'Site']
+        assert joined['height_Drop'].tolist()[:2] == [2.0, 1.0]
+        assert joined['fcc_cnt'].tolist()[:2] == [0, 2] and pd.isna(joined['fcc_cnt'].iloc[2])
+        assert 'key_0' not in joined and 'id_Drop' not in joined
+
+    def test_join_matches_pandas_merge(self, table, ranks):
+        candidates = table.to_pandas()
+        combined_ranks = pd.concat(ranks, ignore_index=True, sort=False)
+        expected = candidates.merge(
+            combined_ranks, left_on=candidates.id.astype(str), right_on=combined_ranks.id.astype(str), how='left',
+            sort=False, suffixes=['', '_Drop']
+        ).drop(['key_0', 'id_Drop'], axis=1)
+
+        rank_table = CandidateTable(arrow=table.arrow)
+        for frame in ranks:
+            rank_table.append(frame)
+        joined = table.join(rank_table).to_pandas()
+
+        assert joined.columns.tolist() == expected.columns.tolist()
+        for column in ('id', 'name', 'fcc_cnt', 'revshare', 'height_Drop'):
+            assert joined[column].astype(object).where(joined[column].notna(), None).tolist() == \
+                expected[column].astype(object).where(expected[column].notna(), None).tolist()
+
+    def test_mixed_column_types_become_text(self, table):
+        table.append(pd.DataFrame({'candidate_type': ['re_asd'], 'id': ['x1'], 'pnt_geom': [7]}))
+
+        assert str(table.column('pnt_geom').tolist()[-1]) == '7'
+        assert table.column('pnt_geom').tolist()[-2] == 'POINT(-73.95 40.75)'
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from FixedWireless.utils.clearance import (
+    EFFECTIVE_EARTH_RADIUS_FACTOR, classify, classify_paths, clearances, earth_bulge, fresnel_radius, min_clearances
+)
+from FixedWireless.utils.geodesy import EARTH_RADIUS_M
+from FixedWireless.utils.google import get_min_clearance
+
+
+@pytest.fixture
+def profiles():
+    rng = np.random.default_rng(7)
+    return rng.uniform(0, 60, (300, 101))
+
+
+class TestClearance:
+
+    def test_fresnel_radius(self):
+        assert fresnel_radius(0.5, 0.5, 80) == pytest.approx(17.32 * np.sqrt(0.25 / 80))
+        assert fresnel_radius(0.0, 2.0, 80) == 0.0
+        assert fresnel_radius(0.0, 0.0, 80) == 0.0
+
+    def test_earth_bulge(self):
+        expected = 5000 * 5000 / (2 * EFFECTIVE_EARTH_RADIUS_FACTOR * EARTH_RADIUS_M)
+        assert earth_bulge(5000, 5000) == pytest.approx(expected)
+        assert earth_bulge(5000, 5000) == pytest.approx(1.4715, abs=1e-3)
+
+    def test_flat_path_lowest_at_midpoint(self):
+        values = clearances(np.zeros((1, 101)), 0.0, 10.0, frequency_ghz=80, fresnel_fraction=1.0)[0]
+
+        assert values[0] == 0 and values[-1] == 0
+        assert values.argmin() == 50
+        assert values[50] == pytest.approx(-(earth_bulge(5000, 5000) + fresnel_radius(5, 5, 80)))
+
+    def test_straight_line_matches_scalar(self, profiles):
+        heights = np.linspace(10, 40, len(profiles))
+        expected = [get_min_clearance(profile.tolist(), height) for profile, height in zip(profiles, heights)]
+
+        assert min_clearances(profiles, heights, 5.0, k=None, fresnel_fraction=0) == pytest.approx(expected)
+
+    def test_curvature_and_fresnel_only_reduce_clearance(self, profiles):
+        straight = min_clearances(profiles, 30.0, 8.0, k=None, fresnel_fraction=0)
+        modelled = min_clearances(profiles, 30.0, 8.0)
+
+        assert (modelled <= straight).all() and (modelled < straight).any()
+
+    def test_classify(self):
+        labels = classify([5.0, 0.0, -1.0, -299.0, -301.0, np.nan])
+        assert labels.tolist() == ['Pass', 'Pass', 'Fail', 'Fail', 'Delete', 'No Data']
+
+    def test_classify_paths_batch(self, profiles):
+        target_heights = np.full(len(profiles), 30.0)
+        labels = classify_paths(profiles, np.linspace(0, 120, len(profiles)), 3.0, target_heights=target_heights)
+
+        assert labels.shape == (300,)
+        assert set(labels) <= {'Pass', 'Fail', 'Delete'}
+        assert labels[-1] == 'Pass' and labels[0] == 'Fail'
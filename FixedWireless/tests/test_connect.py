@@ -1,5 +1,10 @@
 import pytest
 import os
+import threading
+import time
+import pandas as pd
+from psycopg2.pool import PoolError
+from FixedWireless.postgis import connect as connect_module
 from FixedWireless.postgis.connect import ODW
 from FixedWireless.postgis.queries import build_lit_building_query  # , optimized_build_lit_building_query
 
@@ -40,6 +45,114 @@ def limit_five():
     return "select buildingid, name, clli from ospi.ne_dw_buildings limit 5"
 
 
+class FakeConnection:
+
+    closed = 0
+
+    def get_transaction_status(self):
+        return 0
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool:
+    """Stands in for ThreadedConnectionPool: raises PoolError when exhausted like psycopg2 does."""
+
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.maxconn = maxconn
+        self.closed = False
+        self.used = set()
+        self.idle = []
+
+    def getconn(self):
+        if len(self.used) >= self.maxconn:
+            raise PoolError('connection pool exhausted')
+        conn = self.idle.pop() if self.idle else FakeConnection()
+        self.used.add(id(conn))
+        return conn
+
+    def putconn(self, conn, close=False):
+        if self.closed:
+            raise PoolError('connection pool is closed')
+        if id(conn) not in self.used:
+            raise PoolError('trying to put unkeyed connection')
+        self.used.discard(id(conn))
+        if not close:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.closed = True
+
+
+@pytest.fixture
+def offline_odw(monkeypatch):
+    monkeypatch.setattr(connect_module.os, 'getlogin', lambda: 'tester')
+    monkeypatch.setenv('ODW_DEV', 'localhost;5432;odw')
+    monkeypatch.setenv('CC_GEO_PUBLIC', 'secret')
+    monkeypatch.setattr(connect_module, 'ThreadedConnectionPool', FakePool)
+    ODW.closePools()
+    yield ODW(environment='ODW_DEV', username='CC_GEO_PUBLIC', max_connections=2)
+    ODW.closePools()
+
+
+class TestConnectionPool:
+
+    def test_checkout_waits_for_returned_connection(self, offline_odw):
+        first, second = offline_odw.getPooledConnection(), offline_odw.getPooledConnection()
+
+        def give_back():
+            time.sleep(0.2)
+            offline_odw.returnPooledConnection(first)
+
+        threading.Thread(target=give_back).start()
+        start = time.perf_counter()
+        third = offline_odw.getPooledConnection(timeout=5)
+
+        assert third is first
+        assert time.perf_counter() - start >= 0.15
+        offline_odw.returnPooledConnection(second)
+        offline_odw.returnPooledConnection(third)
+
+    def test_checkout_timeout(self, offline_odw):
+        held = [offline_odw.getPooledConnection() for _ in range(2)]
+
+        with pytest.raises(PoolError):
+            offline_odw.getPooledConnection(timeout=0.1)
+
+        for conn in held:
+            offline_odw.returnPooledConnection(conn)
+
+    def test_concurrent_checkouts_beyond_pool_size(self, offline_odw):
+        errors = []
+
+        def borrow():
+            try:
+                with offline_odw.pooledConnection():
+                    time.sleep(0.05)
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=borrow) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+
+    def test_return_to_closed_pool(self, offline_odw):
+        conn = offline_odw.getPooledConnection()
+        old_pool = offline_odw.pool
+        ODW.closePools()
+
+        offline_odw.returnPooledConnection(conn)
+
+        assert conn.closed
+        assert offline_odw.pool is not old_pool
+        assert offline_odw.pool.used == set()
+
+
 class TestODW:
     def test__init(self, conn_params):
         assert conn_params.get('user') == 'cc_geo_private'
@@ -93,4 +206,75 @@ class TestODW:
 
         assert int(sedf.shape[0]) == 25
         assert all([col_name in sedf.columns.values for col_name in ['candidate_type', 'id', 'cand_dist_km', 'long', 'lat', 'height', 'SHAPE']])
-        assert sedf.iloc[0]['candidate_type'] == 'ospi'
\ No newline at end of file
+        assert sedf.iloc[0]['candidate_type'] == 'ospi'
+
+    def test_pooled_connection(self, odw, limit_five):
+        with odw.pooledConnection() as conn:
+            assert not conn.closed
+            with conn.cursor() as cur:
+                cur.execute(limit_five)
+                assert len(cur.fetchall()) == 5
+
+        # connection went back to the pool and is handed out again instead of opening a new one
+        reused = odw.getPooledConnection()
+        assert reused is conn
+        odw.returnPooledConnection(reused)
+
+    def test_discard_closed_pooled_connection(self, odw):
+        conn = odw.getPooledConnection()
+        conn.close()
+        odw.returnPooledConnection(conn)
+
+        with odw.pooledConnection() as fresh:
+            assert fresh is not conn
+            assert not fresh.closed
+
+    def test_engine_cached_per_environment(self, odw):
+        assert odw.engine is odw.engine
+        assert ODW(environment='ODW_PROD', username='CC_GEO_PRIVATE').engine is odw.engine
+
+    def test_invalid_pool_size(self):
+        with pytest.raises(ValueError):
+            ODW(environment='ODW_PROD', username='CC_GEO_PRIVATE', min_connections=4, max_connections=2)
+
+    def test_stream_query_to_pandas_chunks(self, odw, non_spatial_query):
+        chunks = list(odw.streamQueryToDataFrame(non_spatial_query, fetch_size=10))
+        assert [int(chunk.shape[0]) for chunk in chunks] == [10, 10, 5]
+        assert all(list(chunk.columns) == list(chunks[0].columns) for chunk in chunks)
+
+    def test_stream_query_to_geopandas_chunks(self, odw, lit_building_query):
+        chunks = list(odw.streamQueryToDataFrame(
+            lit_building_query, flavor='geopandas', geometry_column='pnt_geom', fetch_size=10
+        ))
+        assert sum(int(chunk.shape[0]) for chunk in chunks) == 25
+        assert chunks[0].geometry.name == 'pnt_geom'
+        assert chunks[0].crs.to_epsg() == 4326
+
+    def test_stream_query_early_exit_returns_connection(self, odw, non_spatial_query):
+        stream = odw.streamQueryToDataFrame(non_spatial_query, fetch_size=5)
+        next(stream)
+        stream.close()
+
+        with odw.pooledConnection() as conn:
+            assert conn.get_transaction_status() == 0
+
+        with pytest.raises(ValueError):
+            next(odw.streamQueryToDataFrame(non_spatial_query, flavor='geopandas'))
+
+    @pytest.mark.parametrize('copy_format', ['csv', 'binary'])
+    def test_copy_query_to_data_frame(self, odw, lit_building_query, copy_format):
+        with odw.pooledConnection() as conn:
+            expected = pd.read_sql(lit_building_query, conn)
+
+        df = odw.copyQueryToDataFrame(lit_building_query, copy_format=copy_format)
+
+        assert list(df.columns) == list(expected.columns)
+        assert int(df.shape[0]) == int(expected.shape[0])
+        assert df['id'].tolist() == expected['id'].tolist()
+
+    def test_fetch_data_frame_raises(self, odw):
+        with pytest.raises(Exception):
+            odw.fetchDataFrame('select * from table_that_does_not_exist')
+
+        # the failed query rolled back and the connection is reusable
+        assert int(odw.fetchDataFrame('select 1 as one').shape[0]) == 1
@@ -0,0 +1,145 @@
+import struct
+
+import numpy as np
+import pytest
+from FixedWireless.utils.dem import ElevationModel, GeoTiff, clearance_scores, elevation_profiles
+from FixedWireless.utils.google import get_min_clearance, get_min_clearances
+
+PIXEL = 0.001  # degrees
+
+
+def write_geotiff(filepath, array, west, north, nodata=None, tile=None, byte_order='<'):
+    """
+    Minimal single band GeoTIFF writer (uncompressed, stripped or tiled) for synthetic DEMs.
+    """
+    array = np.asarray(array)
+    height, width = array.shape
+    data = array.astype(array.dtype.newbyteorder(byte_order))
+    sample_format = {'u': 1, 'i': 2, 'f': 3}[array.dtype.kind]
+
+    if tile:
+        padded = np.zeros((-(-height // tile) * tile, -(-width // tile) * tile), dtype=data.dtype)
+        padded[:height, :width] = data
+        blocks = [
+            padded[r:r + tile, c:c + tile].tobytes()
+            for r in range(0, padded.shape[0], tile) for c in range(0, padded.shape[1], tile)
+        ]
+    else:
+        blocks = [data[r:r + 3].tobytes() for r in range(0, height, 3)]
+
+    offsets, payload = [], b''
+    for block in blocks:
+        offsets.append(8 + len(payload))
+        payload += block
+
+    extra = b''
+    ifd_start = 8 + len(payload)
+    entries = [
+        (256, 4, [width]), (257, 4, [height]), (258, 3, [array.dtype.itemsize * 8]), (259, 3, [1]),
+        (277, 3, [1]), (339, 3, [sample_format]),
+        (33550, 12, [PIXEL, PIXEL, 0.0]), (33922, 12, [0.0, 0.0, 0.0, west, north, 0.0]),
+        (34735, 3, [1, 1, 0, 1, 1024, 0, 1, 2])
+    ]
+    if tile:
+        entries += [(322, 3, [tile]), (323, 3, [tile]), (324, 4, offsets), (325, 4, [len(b) for b in blocks])]
+    else:
+        entries += [(273, 4, offsets), (278, 4, [3]), (279, 4, [len(b) for b in blocks])]
+    if nodata is not None:
+        entries.append((42113, 2, list(str(nodata).encode('ascii') + b'\x00')))
+    entries.sort()
+
+    codes = {2: 'B', 3: 'H', 4: 'I', 12: 'd'}
+    extra_start = ifd_start + 2 + 12 * len(entries) + 4
+    ifd = struct.pack(byte_order + 'H', len(entries))
+    for tag, field_type, values in entries:
+        packed = struct.pack(byte_order + codes[field_type] * len(values), *values)
+        if len(packed) <= 4:
+            ifd += struct.pack(byte_order + 'HHI', tag, field_type, len(values)) + packed.ljust(4, b'\x00')
+        else:
+            ifd += struct.pack(byte_order + 'HHII', tag, field_type, len(values), extra_start + len(extra))
+            extra += packed
+    ifd += struct.pack(byte_order + 'I', 0)
+
+    header = (b'II' if byte_order == '<' else b'MM') + struct.pack(byte_order + 'HI', 42, ifd_start)
+    with open(filepath, 'wb') as handle:
+        handle.write(header + payload + ifd + extra)
+    return filepath
+
+
+@pytest.fixture
+def terrain():
+    rows, cols = np.mgrid[0:20, 0:30]
+    return (rows * 10 + cols).astype('float32')
+
+
+@pytest.fixture
+def ridge_dem(tmp_path):
+    # flat 10 m plain 0.05 degrees wide with a north-south ridge in the middle column band
+    elevations = np.full((40, 50), 10, dtype='int16')
+    elevations[:, 24:27] = 330
+    return ElevationModel.from_paths(write_geotiff(str(tmp_path / 'ridge.tif'), elevations, -74.0, 40.75))
+
+
+class TestGeoTiff:
+
+    @pytest.mark.parametrize('tile, byte_order', [(None, '<'), (None, '>'), (16, '<'), (16, '>')])
+    def test_layouts(self, tmp_path, terrain, tile, byte_order):
+        dem = GeoTiff(write_geotiff(str(tmp_path / 'dem.tif'), terrain, -74.0, 40.75, tile=tile, byte_order=byte_order))
+
+        assert (dem.width, dem.height) == (30, 20)
+        assert np.array_equal(dem.read_window(0, 0, 20, 30), terrain)
+        assert np.array_equal(dem.read_window(5, 17, 3, 4), terrain[5:8, 17:21])
+
+    def test_sample_centres_and_bilinear(self, tmp_path, terrain):
+        dem = GeoTiff(write_geotiff(str(tmp_path / 'dem.tif'), terrain, -74.0, 40.75, tile=16))
+        west, north = dem.origin
+
+        assert west == pytest.approx(-74.0 + PIXEL / 2) and north == pytest.approx(40.75 - PIXEL / 2)
+        assert dem.sample(west + 3 * PIXEL, north - 2 * PIXEL) == pytest.approx(terrain[2, 3])
+        assert dem.sample(west + 3.5 * PIXEL, north - 2.5 * PIXEL) == pytest.approx(terrain[2:4, 3:5].mean())
+        assert np.isnan(dem.sample(-75.0, 40.7))
+
+    def test_nodata(self, tmp_path, terrain):
+        terrain[4, 4] = -9999
+        dem = GeoTiff(write_geotiff(str(tmp_path / 'dem.tif'), terrain, -74.0, 40.75, nodata=-9999))
+
+        assert np.isnan(dem.read_window(4, 4, 1, 1)).all()
+        assert np.isnan(dem.sample(dem.origin[0] + 4.2 * PIXEL, dem.origin[1] - 3.7 * PIXEL))
+
+    def test_rejects_non_tiff(self, tmp_path):
+        filepath = tmp_path / 'dem.tif'
+        filepath.write_bytes(b'not a tiff at all')
+        with pytest.raises(ValueError):
+            GeoTiff(str(filepath))
+
+
+class TestElevationModel:
+
+    def test_mosaic(self, tmp_path, terrain):
+        west_tile = write_geotiff(str(tmp_path / 'a.tif'), terrain, -74.0, 40.75)
+        east_tile = write_geotiff(str(tmp_path / 'b.tif'), terrain + 1000, -74.0 + 30 * PIXEL, 40.75)
+        model = ElevationModel.from_paths(str(tmp_path))
+
+        assert len(model.tiles) == 2
+        north = 40.75 - PIXEL / 2
+        values = model.sample([-74.0 + 0.5 * PIXEL, -74.0 + 30.5 * PIXEL], [north, north])
+        assert values.tolist() == [terrain[0, 0], terrain[0, 0] + 1000]
+
+    def test_profiles_match_scalar_clearance(self, ridge_dem):
+        profiles = elevation_profiles(ridge_dem, [40.73, 40.73], [-73.998, -73.975], 40.73, -73.952, samples=50)
+        heights = np.array([30.0, 30.0])
+
+        assert profiles.shape == (2, 50)
+        expected = [get_min_clearance(profile.tolist(), height) for profile, height in zip(profiles, heights)]
+        assert get_min_clearances(profiles, heights) == pytest.approx(expected)
+
+    def test_clearance_scores(self, ridge_dem):
+        scores = clearance_scores(
+            ridge_dem,
+            lat=[40.73, 40.73, 40.73, 40.73],
+            lon=[-73.998, -73.998, -73.960, -74.5],
+            target_lat=40.73, target_lon=-73.952,
+            height=[30.0, 0.0, 30.0, 30.0]
+        )
+        # over the ridge: 30 m masts fail, bare ground falls below the delete threshold; same side passes; no DEM
+        assert scores.tolist() == ['Fail', 'Delete', 'Pass', 'No Data']
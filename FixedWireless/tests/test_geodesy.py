@@ -0,0 +1,82 @@
+from os import path
+
+import numpy as np
+import pytest
+from FixedWireless.utils import geodesy
+from FixedWireless.postgis.local_search import building_vertex_snapshot
+
+SAMPLE_GEOJSON = path.join(path.dirname(path.dirname(__file__)), 'postgis', 'Sample_GeoJson.json')
+
+
+def _dms(degrees, minutes, seconds):
+    return degrees + minutes / 60 + seconds / 3600
+
+
+class TestDistances:
+
+    def test_vincenty_reference_line(self):
+        # Flinders Peak -> Buninyong, the worked example from Vincenty (1975) / Geoscience Australia
+        distance = geodesy.vincenty(
+            _dms(144, 25, 29.52440), -_dms(37, 57, 3.72030), _dms(143, 55, 35.38390), -_dms(37, 39, 10.15610)
+        )
+        assert distance == pytest.approx(54972.271, abs=0.001)
+
+    def test_broadcast_and_degenerate_pairs(self):
+        longitudes = np.array([-73.9913778, -73.9913778, 0.0, 0.0])
+        latitudes = np.array([40.7390831, 40.7390831, 0.0, 0.0])
+        distances = geodesy.vincenty(-73.9913778, 40.7390831, longitudes + [0, 0.01, 0, 0], latitudes)
+
+        assert distances.shape == (4,)
+        assert distances[0] == 0
+        assert np.isfinite(distances).all()
+
+    def test_haversine_close_to_vincenty(self):
+        rng = np.random.default_rng(7)
+        lon, lat = rng.uniform(-125, -65, 1000), rng.uniform(25, 50, 1000)
+        spherical = geodesy.haversine(-73.99, 40.74, lon, lat)
+        ellipsoidal = geodesy.vincenty(-73.99, 40.74, lon, lat)
+
+        assert np.abs(spherical / ellipsoidal - 1).max() < 0.006
+
+
+class TestCardinalVertices:
+
+    def test_square_and_diamond(self):
+        rings = geodesy.Rings.from_sequences([
+            [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]],  # counter-clockwise
+            [[0, 1], [1, 2], [2, 1], [1, 0], [0, 1]]  # clockwise
+        ])
+        vertices = geodesy.cardinal_vertices(rings, buffer=-0.1)
+
+        np.testing.assert_allclose(vertices[0], [[0.9, 0.9], [0.1, 0.1], [0.9, 0.1], [0.1, 0.1]])
+        inset = 0.1 * np.sqrt(2)
+        np.testing.assert_allclose(vertices[1], [[1, 2 - inset], [1, inset], [2 - inset, 1], [inset, 1]])
+
+    def test_collapsed_ring(self):
+        rings = geodesy.Rings.from_sequences([[[0, 0], [0.00001, 0], [0.00001, 0.00001], [0, 0.00001]]])
+        assert np.isnan(geodesy.cardinal_vertices(rings)).all()
+
+    def test_sample_footprints(self):
+        rings, properties = geodesy.rings_from_geojson(SAMPLE_GEOJSON)
+        vertices = geodesy.cardinal_vertices(rings)
+
+        assert len(rings) == len(properties) == vertices.shape[0]
+        valid = ~np.isnan(vertices).any(axis=(1, 2))
+        assert valid.mean() > 0.95
+
+        # every buffered extremity stays inside its footprint's bounding box, pulled in by at most a few metres
+        for ring_id in np.flatnonzero(valid)[:200]:
+            ring = rings.coords[rings.offsets[ring_id]:rings.offsets[ring_id + 1]]
+            low, high = ring.min(axis=0), ring.max(axis=0)
+            assert (vertices[ring_id] >= low).all() and (vertices[ring_id] <= high).all()
+            north, south, east, west = vertices[ring_id]
+            assert high[1] - north[1] < 0.0001 and south[1] - low[1] < 0.0001
+            assert high[0] - east[0] < 0.0001 and west[0] - low[0] < 0.0001
+
+    def test_building_vertex_snapshot(self):
+        rings, properties = geodesy.rings_from_geojson(SAMPLE_GEOJSON)
+        anchors = np.array([rings.coords[start] for start in rings.offsets[:-1]])
+        snapshot = building_vertex_snapshot([p['id'] for p in properties], anchors[:, 0], anchors[:, 1], rings)
+
+        assert snapshot.groupby('id').size().eq(4).all()
+        assert snapshot[['long', 'lat']].notna().all().all()
@@ -1,7 +1,8 @@
 import pytest
 import pandas as pd
+import numpy as np
 from numpy import arange
-from time import sleep
+from time import sleep, time
 from FixedWireless.utils.google import get_elevation_path, get_min_clearance
 
 
@@ -26,3 +27,166 @@ def test_get_elevation_path(sample_candidates):
         results.append(result)
 
     assert not any([x == 'Delete' for x in results])
+
+
+def _elevation_handler(failures=None):
+    """
+    Elevation API stub: each sample's elevation is the path's start latitude * 1000 plus its index, so results can be
+    matched back to the request. failures maps a start latitude to the number of 503s served before it succeeds.
+    """
+    failures = dict(failures or {})
+
+    def handler(path, query):
+        lat1 = float(query['path'][0].split('|')[0].split(',')[0])
+        if failures.get(lat1, 0) > 0:
+            failures[lat1] -= 1
+            return 503, {}
+        samples = int(query['samples'][0])
+        return 200, {'status': 'OK', 'results': [{'elevation': lat1 * 1000 + i} for i in range(samples)]}
+
+    return handler
+
+
+class TestElevationFetcher:
+
+    def test_results_aligned_and_concurrent(self, stub_server):
+        from FixedWireless.utils.google import ElevationFetcher
+
+        server = stub_server(_elevation_handler(), latency=0.1)
+        paths = [(40.0 + i / 1000, -73.99, 40.74, -73.99) for i in range(16)]
+
+        with ElevationFetcher(api_key='test', url=server.url, max_workers=8, rate=1000) as fetcher:
+            start = time()
+            results = fetcher.fetch_paths(paths, samples=5)
+            elapsed = time() - start
+
+        assert [result[0] for result in results] == pytest.approx([path[0] * 1000 for path in paths])
+        assert all(len(result) == 5 for result in results)
+        # 16 requests of 100 ms on 8 workers, serially this would take 1.6 s
+        assert elapsed < 0.8
+        assert server.peak > 1
+        # keep-alive: connections are reused rather than opened per request
+        assert len(set(port for port, _, _ in server.requests)) <= 8
+
+    def test_retries_and_failed_paths(self, stub_server):
+        from FixedWireless.utils.google import ElevationFetcher
+
+        server = stub_server(_elevation_handler({40.001: 2, 40.002: 10}))
+        paths = [(40.0, -73.99, 40.74, -73.99), (40.001, -73.99, 40.74, -73.99), (40.002, -73.99, 40.74, -73.99)]
+
+        with ElevationFetcher(url=server.url, retries=2, backoff=0.01, rate=1000) as fetcher:
+            profiles = fetcher.profiles([p[0] for p in paths], [p[1] for p in paths], 40.74, -73.99, samples=4)
+
+        assert profiles[0].tolist() == [40000.0, 40001.0, 40002.0, 40003.0]
+        assert profiles[1, 0] == pytest.approx(40001.0)
+        assert np.isnan(profiles[2]).all()
+
+    def test_rate_limited(self, stub_server):
+        from FixedWireless.utils.google import ElevationFetcher
+
+        server = stub_server(_elevation_handler())
+        paths = [(40.0, -73.99, 40.74, -73.99)] * 12
+
+        with ElevationFetcher(url=server.url, max_workers=6, rate=20, burst=2) as fetcher:
+            start = time()
+            fetcher.fetch_paths(paths, samples=2)
+            elapsed = time() - start
+
+        # 2 burst tokens, the remaining 10 requests at 20/s
+        assert elapsed >= 0.45
+
+
+def _terrain_handler(path, query):
+    """
+    Elevation API stub over a plane rising 1 m per 0.001 degree of latitude, answering path & locations requests.
+    """
+    if 'locations' in query:
+        points = [tuple(map(float, query['locations'][0].split(',')))]
+    else:
+        (lat1, lon1), (lat2, lon2) = (map(float, point.split(',')) for point in query['path'][0].split('|'))
+        samples = int(query['samples'][0])
+        points = [(lat1 + (lat2 - lat1) * i / (samples - 1), lon1) for i in range(samples)]
+    return 200, {'status': 'OK', 'results': [{'elevation': 100 + (lat - 40) * 1000} for lat, _ in points]}
+
+
+class TestElevationCache:
+
+    def test_lookup_and_persistence(self, tmp_path):
+        from FixedWireless.utils.google import ElevationCache
+
+        filepath = str(tmp_path / 'elevation.sqlite')
+        cache = ElevationCache(filepath)
+        cache.update([40.0, 40.02, 40.02004], [-73.99, -73.99, -73.99], [10.0, 20.0, np.nan])
+        cache.close()
+
+        cache = ElevationCache(filepath)
+        # snapped to the 1e-4 degree grid, the NaN sample was not stored
+        assert cache.lookup([40.00003, 40.02, 40.0205], [-73.99, -73.99, -73.99]).tolist()[:2] == [10.0, 20.0]
+        assert np.isnan(cache.lookup([40.0205], [-73.99])).all()
+        assert len(cache.store) == 2  # one entry per 0.01 degree tile
+
+    def test_size_bound(self, tmp_path):
+        from FixedWireless.utils.google import ElevationCache
+
+        cache = ElevationCache(str(tmp_path / 'elevation.sqlite'), max_bytes=4096)
+        for tile in range(20):
+            lat = 40 + tile / 100 + np.arange(50) / 1e4
+            cache.update(lat, np.full(50, -73.99), lat)
+
+        assert cache.store.size <= 4096
+        assert not np.isnan(cache.lookup(lat, np.full(50, -73.99))).any()
+
+    def test_fetches_only_missing_samples(self, stub_server, tmp_path):
+        from FixedWireless.utils.google import ElevationCache, ElevationFetcher
+
+        server = stub_server(_terrain_handler)
+        cache = ElevationCache(str(tmp_path / 'elevation.sqlite'))
+
+        with ElevationFetcher(url=server.url, cache=cache, rate=1000) as fetcher:
+            first = fetcher.fetch_path(40.0, -73.99, 40.01, -73.99, samples=101)
+            assert fetcher.fetch_path(40.0, -73.99, 40.01, -73.99, samples=101) == first
+            assert len(server.requests) == 1
+
+            # twice as long, the first half is already cached
+            longer = fetcher.fetch_path(40.0, -73.99, 40.02, -73.99, samples=201)
+
+        assert len(server.requests) == 2
+        _, _, query = server.requests[-1]
+        assert int(query['samples'][0]) < 201
+        assert longer == pytest.approx([100 + 0.1 * i for i in range(201)], abs=0.06)
+        cache.close()
+
+    def test_cached_middle_not_requested(self, stub_server, tmp_path):
+        from FixedWireless.utils.google import ElevationCache, ElevationFetcher
+
+        server = stub_server(_terrain_handler)
+        cache = ElevationCache(str(tmp_path / 'elevation.sqlite'))
+        middle = 40 + np.arange(40, 61) / 1e4
+        cache.update(middle, np.full(len(middle), -73.99), 100 + np.arange(40, 61) * 0.1)
+
+        with ElevationFetcher(url=server.url, cache=cache, rate=1000) as fetcher:
+            elevations = fetcher.fetch_path(40.0, -73.99, 40.01, -73.99, samples=101)
+
+        # samples 0 - 39 and 61 - 100, one request each
+        assert sorted(int(query['samples'][0]) for _, _, query in server.requests) == [40, 40]
+        assert elevations == pytest.approx([100 + 0.1 * i for i in range(101)], abs=0.06)
+        cache.close()
+
+    def test_runs_stay_within_max_workers(self, stub_server, tmp_path):
+        from FixedWireless.utils.google import ElevationCache, ElevationFetcher
+
+        server = stub_server(_terrain_handler, latency=0.02)
+        cache = ElevationCache(str(tmp_path / 'elevation.sqlite'))
+        paths = [(40.0, -73.99 + 0.01 * path, 40.01, -73.99 + 0.01 * path) for path in range(4)]
+        for _, lon, _, _ in paths:
+            for start in (20, 60):  # two cached sections, three missing runs per path
+                lat = 40 + np.arange(start, start + 10) / 1e4
+                cache.update(lat, np.full(len(lat), lon), 100 + (lat - 40) * 1000)
+
+        with ElevationFetcher(url=server.url, cache=cache, rate=1000, max_workers=2) as fetcher:
+            fetcher.fetch_paths(paths, samples=101)
+
+        assert len(server.requests) == 12
+        assert server.peak <= 2
+        assert len({port for port, _, _ in server.requests}) <= 2  # keep-alive connections reused
+        cache.close()
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+from FixedWireless.utils.http_client import TokenBucket, get_json, pooled_session, run_concurrently
+
+
+class TestTokenBucket:
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, capacity=5)
+        start = time.monotonic()
+        for _ in range(15):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+
+        # 5 tokens up front, the other 10 at 50/s
+        assert 0.18 <= elapsed < 0.6
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(0)
+
+
+class TestGetJson:
+
+    def test_retries_throttled_responses(self, stub_server):
+        calls = []
+
+        def handler(path, query):
+            calls.append(path)
+            return (503, {}) if len(calls) < 3 else (200, {'ok': True})
+
+        server = stub_server(handler)
+        payload = get_json(pooled_session(2), server.url + '/api', retries=3, backoff=0.01)
+
+        assert payload == {'ok': True}
+        assert len(calls) == 3
+
+    def test_retry_if_payload_and_give_up(self, stub_server):
+        server = stub_server(lambda path, query: (200, {'status': 'OVER_QUERY_LIMIT'}))
+
+        with pytest.raises(ConnectionError):
+            get_json(
+                pooled_session(1), server.url, retries=2, backoff=0.01,
+                retry_if=lambda payload: payload['status'] == 'OVER_QUERY_LIMIT'
+            )
+        assert len(server.requests) == 3
+
+    def test_client_errors_are_not_retried(self, stub_server):
+        server = stub_server(lambda path, query: (400, {'error': 'bad request'}))
+
+        with pytest.raises(Exception):
+            get_json(pooled_session(1), server.url, retries=3, backoff=0.01)
+        assert len(server.requests) == 1
+
+
+class TestRunConcurrently:
+
+    def test_order_and_errors_in_place(self):
+        def work(value):
+            time.sleep(0.01 * (5 - value))
+            if value == 2:
+                raise ValueError(value)
+            return value * 10
+
+        results = run_concurrently(work, range(5), max_workers=5)
+
+        assert results[:2] == [0, 10] and results[3:] == [30, 40]
+        assert isinstance(results[2], ValueError)
@@ -0,0 +1,86 @@
+import pytest
+from FixedWireless.postgis import queries
+from FixedWireless.postgis.id_lists import IdListStatement, TEMP_TABLE_THRESHOLD, array_literal, id_list_to_dataframe
+
+
+class RecordingCursor:
+
+    def __init__(self, log):
+        self.log = log
+        self.description = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.log.append(('execute', sql, params))
+
+    def copy_expert(self, sql, buffer):
+        self.log.append(('copy', sql, buffer.getvalue()))
+
+    def fetchall(self):
+        return []
+
+
+class RecordingConnection:
+
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return RecordingCursor(self.log)
+
+    def commit(self):
+        self.log.append(('commit',))
+
+
+@pytest.fixture
+def statement():
+    return IdListStatement('fw_test_ids', "select id from t where t.id {ids} and name like '%%LIT%%'", 'public.t', 'id')
+
+
+class TestIdLists:
+
+    def test_array_literal_escapes(self):
+        assert array_literal(['1', 2, None]) == '{"1","2",NULL}'
+        assert array_literal(['a"b', 'c\\d', 'e,f']) == '{"a\\"b","c\\\\d","e,f"}'
+        assert array_literal([]) == '{}'
+
+    def test_bind_dedupes_and_picks_method(self, statement):
+        bound = statement.bind(['3', '1', '3'])
+        assert bound.ids == ['3', '1'] and bound.method == 'array'
+
+        assert statement.bind(range(TEMP_TABLE_THRESHOLD + 1)).method == 'temp_table'
+        assert statement.bind(['1'], method='temp_table').method == 'temp_table'
+        with pytest.raises(ValueError):
+            statement.bind(['1'], method='tuple')
+
+    def test_sql_forms(self, statement):
+        array_sql = statement.bind(['1']).statement.array_statement.prepare_sql()
+        assert 't.id = any($1)' in array_sql and '(unknown)' in array_sql
+
+        assert 't.id in (select id from fw_id_list)' in statement.bind(['1'], method='temp_table').sql
+        assert statement.temp_table_ddl().endswith('select id as id from public.t with no data')
+
+    def test_temp_table_round_trip(self, statement):
+        conn = RecordingConnection()
+        id_list_to_dataframe(conn, statement.bind(['1', 'tab\there', None], method='temp_table'))
+
+        kinds = [entry[0] for entry in conn.log]
+        assert kinds == ['execute', 'execute', 'copy', 'execute', 'execute', 'commit']
+        assert conn.log[2][2] == '1\ntab\\there\n\\N\n'
+        assert conn.log[4][2] == {}
+
+    @pytest.mark.parametrize('function_name', [
+        'build_lit_building_rank_query', 'build_lit_building_rank_fcc_query', 'build_macro_cci_sites_rank_query',
+        'build_asd_real_estate_rank_query', 'build_mgt_real_estate_rank_query', 'build_cc_scrub_query'
+    ])
+    def test_rank_queries_single_id(self, function_name):
+        bound = getattr(queries, function_name)(['809402'])
+        sql = bound.statement.array_statement.prepare_sql()
+
+        assert '= any($1)' in sql and '809402' not in sql
+        assert 'fw_id_list' in bound.statement.temp_table_sql()
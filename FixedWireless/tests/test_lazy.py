@@ -0,0 +1,37 @@
+import subprocess
+import sys
+import pytest
+from FixedWireless.utils import lazy
+
+
+class TestLazy:
+
+    def test_deferred_until_first_attribute(self):
+        sys.modules.pop('colorsys', None)
+        proxy = lazy.lazy_import('colorsys')
+
+        assert not lazy.is_loaded('colorsys')
+        assert proxy.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert lazy.is_loaded('colorsys')
+        assert 'colorsys' in lazy.import_times()
+
+    def test_attribute_proxy(self):
+        ordered = lazy.lazy_import('collections', 'OrderedDict')
+
+        assert list(ordered(a=1)) == ['a']
+        assert lazy.load(ordered) is sys.modules['collections'].OrderedDict
+
+    def test_missing_module(self):
+        proxy = lazy.lazy_import('fw_module_that_does_not_exist', hint='conda install it')
+
+        assert not lazy.is_available('fw_module_that_does_not_exist')
+        with pytest.raises(ImportError, match='conda install it'):
+            proxy.anything
+
+    @pytest.mark.parametrize('module', ['pandas', 'requests', 'pyarrow', 'sqlalchemy', 'tqdm'])
+    def test_search_import_leaves_heavy_modules_unloaded(self, module):
+        # fresh interpreter, this one already has them loaded by other tests
+        script = f"import sys, FixedWireless.Search; sys.exit({module!r} in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr or f"importing FixedWireless.Search loaded {module}"
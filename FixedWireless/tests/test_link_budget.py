@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from FixedWireless.utils import link_budget
+from FixedWireless.utils.siklu import SIKLU_FIELDS
+
+
+@pytest.fixture
+def candidates():
+    # roughly 0.5, 2.4, 6.5 and 10.3 km from the target
+    return pd.DataFrame(
+        {'id': ['a', 'b', 'c', 'd'], 'lat': [40.745, 40.76, 40.79, 40.70], 'long': [-73.99, -73.98, -73.95, -74.1]},
+        index=[10, 11, 12, 13]
+    )
+
+
+class TestItuModels:
+
+    @pytest.mark.parametrize('frequency, pol, k, alpha', [
+        (10, 'h', 0.01217, 1.2571), (10, 'v', 0.01129, 1.2156), (20, 'h', 0.09164, 1.0568), (80, 'v', 1.1668, 0.7021)
+    ])
+    def test_rain_coefficients_match_p838_table(self, frequency, pol, k, alpha):
+        fitted_k, fitted_alpha = link_budget.rain_coefficients(frequency, pol)
+
+        assert fitted_k == pytest.approx(k, rel=2e-3)
+        assert fitted_alpha == pytest.approx(alpha, abs=2e-4)
+
+    def test_gaseous_attenuation(self):
+        oxygen = link_budget.oxygen_attenuation([71.0, 81.0, 86.0])
+
+        # falls off the 60 GHz oxygen complex across E-band
+        assert np.all(np.diff(oxygen) < 0)
+        assert 0.2 < oxygen[0] < 0.4 and 0.03 < oxygen[-1] < 0.1
+        assert 0.2 < link_budget.water_vapour_attenuation(73.5) < 0.4
+        with pytest.raises(ValueError):
+            link_budget.oxygen_attenuation(60)
+
+    def test_rain_path_attenuation(self):
+        distances = np.array([0.5, 1.0, 3.0, 10.0])
+        rain = link_budget.rain_path_attenuation(distances, 73.5, availability=99.9)
+
+        assert np.all(np.diff(rain) > 0)
+        # the path reduction factor shrinks the effective length of long paths
+        assert np.all(np.diff(rain / distances) < 0)
+        assert np.all(link_budget.rain_path_attenuation(distances, 73.5, availability=99.99) > rain)
+        # at 0.01% the scaling factor is 1
+        a001 = link_budget.rain_path_attenuation(1.0, 73.5, availability=99.99)
+        assert a001 == pytest.approx(link_budget.rain_specific_attenuation(73.5, 42.0) * min(
+            1 / (0.477 * 42.0 ** (0.073 * link_budget.rain_coefficients(73.5)[1]) * 73.5 ** 0.123
+                 - 10.579 * (1 - np.exp(-0.024))), 2.5
+        ), rel=0.01)
+
+
+class TestLinkBudgets:
+
+    def test_fields_and_alignment(self, candidates):
+        reports = link_budget.evaluate_many(candidates, 40.74, -73.99, 1000)
+
+        assert list(reports.columns) == SIKLU_FIELDS
+        assert reports.index.equals(candidates.index)
+        assert reports['d_km'].is_monotonic_increasing
+        assert (reports['model'] == 'EtherHaul-8010F/FX').all()
+
+    def test_capacity_falls_with_distance(self, candidates):
+        reports = link_budget.evaluate_many(candidates, 40.74, -73.99, 1000)
+        closed = reports.dropna(subset=['capacity'])
+
+        assert closed['capacity'].is_monotonic_decreasing
+        assert (closed['link_margin'] >= 2).all()
+        # the 10 km path does not close at 99.9%, its margin is reported against the slowest mode
+        assert np.isnan(reports.loc[13, 'capacity']) and pd.isna(reports.loc[13, 'modulation'])
+        assert reports.loc[13, 'link_margin'] < 2
+
+    def test_smallest_antenna_meeting_capacity(self, candidates):
+        modest = link_budget.evaluate_many(candidates, 40.74, -73.99, 1000)
+        demanding = link_budget.evaluate_many(candidates, 40.74, -73.99, 10000)
+
+        assert modest.loc[10, 'antenna'] == 1.0
+        assert (demanding['antenna'] >= modest['antenna']).all()
+        assert demanding.loc[11, 'antenna'] == 2.0
+
+    def test_empty_and_unknown(self, candidates):
+        assert link_budget.evaluate_many(candidates.iloc[:0], 40.74, -73.99, 1000).empty
+        with pytest.raises(KeyError):
+            link_budget.link_budgets(40.75, -73.99, 40.74, -73.99, 1000, model_name='EtherHaul-1200')
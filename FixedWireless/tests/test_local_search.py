@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from FixedWireless.postgis.queries import CANDIDATE_FIELDS
+from FixedWireless.postgis.local_search import LocalCandidateSearch, SphereIndex
+from FixedWireless.utils.geodesy import vincenty
+
+SEARCH_POINT = (-73.9913778, 40.7390831)
+
+
+def _points(count, seed, spread=0.1):
+    rng = np.random.default_rng(seed)
+    return SEARCH_POINT[0] + rng.uniform(-spread, spread, count), SEARCH_POINT[1] + rng.uniform(-spread, spread, count)
+
+
+@pytest.fixture
+def snapshots():
+    lon, lat = _points(500, 1)
+    buildings = pd.DataFrame({
+        'candidate_type': 'ospi',
+        'id': np.repeat(np.arange(500).astype(str), 4),
+        'anchor_long': np.repeat(lon, 4),
+        'anchor_lat': np.repeat(lat, 4),
+        'long': np.repeat(lon, 4) + np.tile([0.0, 0.0, 0.0001, -0.0001], 500),
+        'lat': np.repeat(lat, 4) + np.tile([0.0001, -0.0001, 0.0, 0.0], 500),
+        'height': 30.0,
+        'is_lit': True
+    })
+
+    lon, lat = _points(300, 2)
+    sites = pd.DataFrame({
+        'candidate_type': 'cci_sites', 'id': np.arange(300).astype(str), 'anchor_long': lon, 'anchor_lat': lat,
+        'long': lon, 'lat': lat, 'height': np.where(np.arange(300) % 7, 100.0, np.nan), 'is_lit': np.arange(300) % 2 == 0
+    })
+    return {'ospi': buildings, 'cci_sites': sites}
+
+
+class TestSphereIndex:
+
+    @pytest.mark.parametrize('distance', [0.5, 2, 11])
+    def test_matches_brute_force(self, distance):
+        lon, lat = _points(2000, 3)
+        positions, distances = SphereIndex(lon, lat, use_tree=False).query(*SEARCH_POINT, distance)
+
+        expected = np.flatnonzero(vincenty(*SEARCH_POINT, lon, lat) / 1000 < distance)
+        assert sorted(positions) == expected.tolist()
+        assert (distances < distance).all()
+
+    def test_empty(self):
+        positions, distances = SphereIndex(np.empty(0), np.empty(0)).query(*SEARCH_POINT, 5)
+        assert positions.size == 0 and distances.size == 0
+
+
+class TestLocalCandidateSearch:
+
+    def test_schema_order_and_limit(self, snapshots):
+        results = LocalCandidateSearch(snapshots).search('ospi', *SEARCH_POINT, 3, 40)
+
+        assert list(results.columns) == CANDIDATE_FIELDS
+        assert len(results) == 40
+        assert results['cand_dist_km'].is_monotonic_increasing
+        assert (results['cand_dist_km'] <= 3).all()
+
+    def test_vertices_share_building_distance(self, snapshots):
+        results = LocalCandidateSearch(snapshots).search('ospi', *SEARCH_POINT, 5, 400)
+
+        assert (results.groupby('id')['cand_dist_km'].nunique() == 1).all()
+        assert (results.groupby('id').size() == 4).all()
+
+    def test_non_lit_filter(self, snapshots):
+        engine = LocalCandidateSearch(snapshots)
+        lit_ids = set(snapshots['cci_sites'].loc[snapshots['cci_sites']['is_lit'], 'id'])
+
+        lit = engine.search('cci_sites', *SEARCH_POINT, 5, 1000)
+        everything = engine.search('cci_sites', *SEARCH_POINT, 5, 1000, include_non_lit=True)
+
+        assert set(lit['id']) <= lit_ids
+        assert len(everything) > len(lit)
+        assert everything['height'].isna().any()
+
+    def test_save_load(self, snapshots, tmp_path):
+        filepath = str(tmp_path / 'snapshot.pkl')
+        engine = LocalCandidateSearch(snapshots)
+        engine.save(filepath)
+
+        loaded = LocalCandidateSearch.load(filepath).search('cci_sites', *SEARCH_POINT, 4, 25)
+        assert loaded.equals(engine.search('cci_sites', *SEARCH_POINT, 4, 25))
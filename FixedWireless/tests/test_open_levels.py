@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from FixedWireless.utils.open_levels import DEFAULT_TX_AGL, Intervals, parse, tx_agl
+
+LEVELS = '30 - 115 FT , 117 - 125 FT , 129 - 150 FT'
+
+
+@pytest.fixture
+def values():
+    return pd.Series([LEVELS, None, 'NULL', np.nan, '115 FT', LEVELS, 'FT', '20-60FT'], index=np.arange(8) * 3)
+
+
+class TestParse:
+
+    def test_intervals(self, values):
+        intervals = parse(values)
+
+        assert intervals.counts.tolist() == [3, 0, 0, 0, 1, 3, 0, 1]
+        assert intervals.lower[:3].tolist() == [30, 117, 129]
+        assert intervals.upper[:3].tolist() == [115, 125, 150]
+        assert (intervals.lower[3], intervals.upper[3]) == (115, 115)
+        assert (intervals.lower[-1], intervals.upper[-1]) == (20, 60)
+
+    def test_reversed_and_decimal_levels(self):
+        intervals = parse(['115 - 30.5 FT'])
+
+        assert (intervals.lower[0], intervals.upper[0]) == (30.5, 115)
+
+    def test_nothing_parsable(self):
+        assert parse([None, 'NULL']).counts.tolist() == [0, 0]
+        assert len(parse([]).offsets) == 1
+
+
+class TestTxAgl:
+
+    def test_highest_mount(self, values):
+        expected = [145, DEFAULT_TX_AGL, DEFAULT_TX_AGL, DEFAULT_TX_AGL, 110, 145, DEFAULT_TX_AGL, 55]
+
+        assert tx_agl(values).tolist() == expected
+        assert tx_agl(parse(values)).tolist() == expected
+
+    def test_matches_legacy_parser_on_ascending_levels(self):
+        legacy = [float(''.join(c for c in value.split('-')[-1] if c.isnumeric())) - 5 for value in [LEVELS, '40 FT']]
+
+        assert tx_agl([LEVELS, '40 FT']).tolist() == legacy
+
+    def test_highest_level_not_last_listed(self):
+        assert tx_agl(['129 - 150 FT , 30 - 115 FT', '115 - 30 FT']).tolist() == [145, 110]
+
+    def test_required_clearance(self, values):
+        result = tx_agl(values, 100)
+
+        assert result[0] == 100  # inside 30 - 110
+        assert result[4] == 110  # single level at 115
+        assert result[7] == 55  # never reaches 100, highest mount instead
+        assert result[1] == DEFAULT_TX_AGL
+
+    def test_required_between_levels(self):
+        assert tx_agl([LEVELS], 112).tolist() == [117]  # first level tops out at 110, next one starts at 117
+        assert tx_agl([LEVELS], 130).tolist() == [130]
+        assert tx_agl([LEVELS], 121).tolist() == [129]  # 117 - 120 usable, 121 > 120
+
+    def test_per_site_required(self):
+        result = tx_agl([LEVELS, LEVELS, LEVELS], [50, np.nan, 200])
+
+        assert result.tolist() == [50, 145, 145]
+
+    def test_empty(self):
+        assert tx_agl(Intervals(np.empty(0), np.empty(0), np.zeros(1, dtype='int64'))).shape == (0,)
@@ -0,0 +1,79 @@
+import pytest
+from FixedWireless.postgis.prepared import PreparedStatement
+from FixedWireless.postgis import queries
+
+
+@pytest.fixture
+def statement():
+    return PreparedStatement(
+        'fw_test',
+        "select * from t where name like '%%LIT%%' and st_dwithin(geom, st_makepoint(%(longitude)s, %(latitude)s), %(distance)s) limit %(limit)s",
+        (('longitude', 'float8'), ('latitude', 'float8'), ('distance', 'float8'), ('limit', None))
+    )
+
+
+class TestPreparedStatement:
+
+    def test_prepare_sql_positional(self, statement):
+        sql = statement.prepare_sql()
+
+        assert sql.startswith(f"prepare {statement.server_name} (float8, float8, float8, unknown) as select")
+        assert 'st_makepoint($1, $2), $3) limit $4' in sql
+        assert "like '%LIT%'" in sql
+
+    def test_execute_sql(self, statement):
+        assert statement.execute_sql() == (
+            f"execute {statement.server_name} (%(longitude)s, %(latitude)s, %(distance)s, %(limit)s)"
+        )
+
+    def test_server_name_tracks_sql(self, statement):
+        edited = statement._replace(sql=statement.sql.replace('limit', 'order by 1 limit'))
+        assert edited.server_name != statement.server_name
+        assert edited.server_name.startswith('fw_test_')
+
+    def test_bind_validates_parameters(self, statement):
+        with pytest.raises(ValueError):
+            statement.bind(longitude=1, latitude=2, distance=3)
+
+        bound = statement.bind(longitude=1, latitude=2, distance=3, limit=4)
+        assert bound.params['limit'] == 4
+
+    def test_candidate_statements_render(self):
+        for function_name in ['bind_lit_building_query', 'bind_asd_real_estate_query', 'bind_mgt_real_estate_query',
+                              'bind_macro_cci_sites_query', 'bind_lit_building_vertex_query']:
+            bound = getattr(queries, function_name)(-73.9913778, 40.7390831, 2, 25)
+            sql = bound.statement.prepare_sql()
+            assert '%(' not in sql and '$4' in sql
+
+    def test_render_literal_sql(self, statement):
+        with pytest.raises(TypeError):
+            statement.render(longitude=1, latitude=2, distance=3, limit=4)
+
+        numeric = statement._replace(param_types=statement.param_types[:3] + (('limit', 'int4'),))
+        sql = numeric.render(longitude=-73.99, latitude=40.73, distance=2, limit='25')
+        assert 'st_makepoint(-73.99, 40.73), 2.0) limit 25' in sql
+        assert "like '%LIT%'" in sql
+
+    def test_knn_builders_use_index_operators(self):
+        for function_name in ['knn_build_lit_building_query', 'knn_build_asd_real_estate_query',
+                              'knn_build_mgt_real_estate_query', 'knn_build_macro_cci_sites_query',
+                              'build_lit_building_vertex_query']:
+            sql = getattr(queries, function_name)(-73.9913778, 40.7390831, 2, 25)
+            assert 'st_dwithin(' in sql and '<->' in sql and 'limit 25' in sql
+
+    def test_ranked_statements_keep_candidate_parameters(self):
+        for function_name in ['bind_lit_building_ranked_query', 'bind_lit_building_ranked_fcc_query',
+                              'bind_asd_real_estate_ranked_query', 'bind_mgt_real_estate_ranked_query',
+                              'bind_macro_cci_sites_ranked_query']:
+            bound = getattr(queries, function_name)(-73.9913778, 40.7390831, 2, 25)
+            sql = bound.statement.prepare_sql()
+            assert '%(' not in sql and '{' not in sql and '$4' in sql
+            assert 'lateral' in sql and '<->' in sql
+
+        lit = queries.LIT_BUILDING_RANKED_STATEMENT.sql
+        assert 'private_fcc_active_license_activities_vw' in lit
+        assert 'fw_building_fcc_counts' in queries.LIT_BUILDING_RANKED_FCC_STATEMENT.sql
+
+        non_lit = queries.bind_macro_cci_sites_ranked_query(-73.99, 40.73, 2, 25, include_non_lit=True)
+        assert non_lit.statement is queries.MACRO_CCI_SITES_NON_LIT_RANKED_STATEMENT
+        assert queries.MACRO_CCI_SITES_NON_LIT_STATEMENT.sql in non_lit.sql
@@ -1,5 +1,11 @@
 import pytest
 from FixedWireless.postgis.queries import build_macro_cci_sites_rank_query, build_lit_building_query, optimized_build_lit_building_query, build_asd_real_estate_query, optimized_build_asd_real_estate_query, build_lit_building_rank_query
+from FixedWireless.postgis.queries import bind_lit_building_query, bind_macro_cci_sites_query, bind_lit_building_vertex_query
+from FixedWireless.postgis.queries import build_lit_building_rank_fcc_query
+from FixedWireless.postgis.queries import bind_lit_building_ranked_fcc_query, bind_macro_cci_sites_ranked_query
+from FixedWireless.postgis.queries import build_macro_cci_sites_query, knn_build_asd_real_estate_query, knn_build_macro_cci_sites_query
+from FixedWireless.postgis.prepared import execute_prepared, prepared_names
+from FixedWireless.postgis.batch_search import batch_params, build_batch_query, targets_frame
 from FixedWireless.postgis.connect import ODW
 from pandas.io.sql import read_sql
 
@@ -73,7 +79,7 @@ class TestQueries:
 
         query = build_macro_cci_sites_rank_query(bus_unit_numbers)
 
-        result = read_sql(query, odw.connection)
+        result = odw.fetchDataFrame(query)
 
         assert int(result.shape[0]) > 1
 
@@ -87,7 +93,7 @@ class TestQueries:
 
         query = build_lit_building_rank_query(building_id_values)
 
-        result = read_sql(query, odw.connection)
+        result = odw.fetchDataFrame(query)
 
         assert int(result.shape[0]) == len(building_id_values)
 
@@ -108,3 +114,127 @@ class TestQueries:
 
         assert int(result.shape[0]) > 1
 
+
+    def test_prepared_lit_building_query_matches_builder(self, odw, lit_building_query):
+        expected = read_sql(lit_building_query, odw.connection)
+
+        bound = bind_lit_building_query(-73.9913778, 40.7390831, 2, 250)
+        first = odw.preparedQueryToDataFrame(bound)
+        second = odw.preparedQueryToDataFrame(bound)
+
+        assert first['id'].tolist() == expected['id'].tolist()
+        assert second['id'].tolist() == expected['id'].tolist()
+
+    @pytest.mark.parametrize('limit', [1, 7, 25])
+    def test_prepared_lit_building_query_limits_vertex_rows(self, odw, limit):
+        nameless = odw.fetchDataFrame(
+            "select st_x(location) as long, st_y(location) as lat from ospi.ne_dw_buildings "
+            "where name is null and location is not null limit 1"
+        )
+        if nameless.empty:
+            pytest.skip('every building has a name')
+        longitude, latitude = float(nameless['long'][0]), float(nameless['lat'][0])
+
+        # nearest building has no name to join its vertices on, it must not use up the limit
+        expected = read_sql(build_lit_building_query(longitude, latitude, 2, limit), odw.connection)
+        result = odw.preparedQueryToDataFrame(bind_lit_building_query(longitude, latitude, 2, limit))
+
+        assert len(result) == len(expected) == limit
+        assert sorted(result['id']) == sorted(expected['id'])
+
+    def test_prepared_statement_cached_per_connection(self, odw):
+        bound = bind_macro_cci_sites_query(-73.9913778, 40.7390831, 2, 25)
+
+        with odw.pooledConnection() as conn:
+            execute_prepared(conn, bound)
+            assert bound.statement.server_name in prepared_names(conn)
+            columns, rows = execute_prepared(conn, bound)
+
+        assert columns == ['candidate_type', 'id', 'cand_dist_km', 'long', 'lat', 'height']
+
+    @pytest.mark.parametrize('method', ['array', 'temp_table'])
+    def test_batch_search_matches_single_searches(self, odw, method):
+        targets = [('chelsea', -73.9913778, 40.7390831), ('midtown', -73.982144, 40.763967)]
+
+        batch = odw.batchSearchToDataFrame(targets, {'ospi': 40, 'cci_sites': 25}, distance=2, method=method)
+
+        for target_id, longitude, latitude in targets:
+            found = batch[batch['target_id'] == target_id]
+            lit = read_sql(build_lit_building_query(longitude, latitude, 2, 40), odw.connection)
+            assert sorted(found.loc[found['candidate_type'] == 'ospi', 'id']) == sorted(lit['id'])
+
+    def test_batch_search_plan_uses_index_scans(self, odw):
+        limits = {'ospi': 40, 'cci_sites': 25, 're_asd': 25, 're_mgt': 25}
+        targets = targets_frame([('chelsea', -73.9913778, 40.7390831), ('midtown', -73.982144, 40.763967)], distance=2)
+
+        with odw.pooledConnection() as conn, conn.cursor() as cur:
+            cur.execute(f"explain (format json) {build_batch_query(limits)}", batch_params(targets, limits))
+            plan = cur.fetchone()[0][0]['Plan']
+
+        def nodes(node):
+            yield node
+            for child in node.get('Plans', []):
+                yield from nodes(child)
+
+        # one KNN index scan per lateral on the 001 migration indexes (fw_<table>_<column>_geog)
+        index_scans = [node['Index Name'] for node in nodes(plan) if node['Node Type'] == 'Index Scan']
+        assert 'fw_ne_dw_buildings_location_geog' in index_scans
+        assert sum(name.startswith('fw_') and name.endswith('_geom_geog') for name in index_scans) == 3
+        assert 'ne_dw_buildings' not in [
+            node.get('Relation Name') for node in nodes(plan) if node['Node Type'] == 'Seq Scan'
+        ]
+
+    @pytest.mark.parametrize('builder, knn_builder', [
+        (build_asd_real_estate_query, knn_build_asd_real_estate_query),
+        (build_macro_cci_sites_query, knn_build_macro_cci_sites_query)
+    ])
+    def test_knn_query_matches_builder(self, odw, builder, knn_builder):
+        expected = read_sql(builder(-73.9913778, 40.7390831, 2, 25), odw.connection)
+        result = read_sql(knn_builder(-73.9913778, 40.7390831, 2, 25), odw.connection)
+
+        assert result['cand_dist_km'].tolist() == expected['cand_dist_km'].tolist()
+        assert set(result['id']) == set(expected['id'])
+
+    def test_vertex_table_query_matches_builder(self, odw, lit_building_query):
+        expected = read_sql(lit_building_query, odw.connection)
+        result = odw.preparedQueryToDataFrame(bind_lit_building_vertex_query(-73.9913778, 40.7390831, 2, 250))
+
+        assert sorted(zip(result['id'], result['long'], result['lat'])) == \
+            sorted(zip(expected['id'], expected['long'], expected['lat']))
+
+    def test_lit_building_rank_fcc_query(self, odw, building_id_values):
+        result = odw.fetchDataFrame(build_lit_building_rank_fcc_query(building_id_values))
+
+        assert int(result.shape[0]) == len(building_id_values)
+        assert (result['fcc_cnt'] >= 0).all()
+
+        single = odw.fetchDataFrame(build_lit_building_rank_fcc_query(building_id_values[:1]))
+        assert int(single.shape[0]) == 1
+
+    def test_ranked_lit_building_query_matches_two_pass(self, odw, lit_building_query):
+        candidates = read_sql(lit_building_query, odw.connection)
+        ranks = odw.fetchDataFrame(build_lit_building_rank_fcc_query(candidates['id'].unique().tolist()))
+
+        result = odw.preparedQueryToDataFrame(bind_lit_building_ranked_fcc_query(-73.9913778, 40.7390831, 2, 250))
+
+        assert sorted(result['id']) == sorted(candidates['id'])
+        merged = result.drop_duplicates('id').merge(ranks.assign(id=ranks['id'].astype(str)), on='id')
+        assert (merged['fcc_cnt_x'] == merged['fcc_cnt_y']).all()
+
+    def test_ranked_cci_sites_query_matches_two_pass(self, odw, bus_unit_numbers):
+        candidates = odw.preparedQueryToDataFrame(bind_macro_cci_sites_query(-73.9913778, 40.7390831, 2, 25))
+        ranks = odw.fetchDataFrame(build_macro_cci_sites_rank_query(candidates['id'].tolist()))
+
+        result = odw.preparedQueryToDataFrame(bind_macro_cci_sites_ranked_query(-73.9913778, 40.7390831, 2, 25))
+
+        assert result['id'].tolist() == candidates['id'].tolist()
+        assert set(result.dropna(subset=['score'])['id']) == set(ranks['id'])
+
+    def test_rank_query_id_list_methods_agree(self, odw, building_id_values):
+        by_array = odw.fetchDataFrame(build_lit_building_rank_query(building_id_values, method='array'))
+        by_table = odw.fetchDataFrame(build_lit_building_rank_query(building_id_values, method='temp_table'))
+
+        assert sorted(by_array['id'].astype(str)) == sorted(by_table['id'].astype(str))
+
+        single = odw.fetchDataFrame(build_lit_building_rank_query(building_id_values[:1]))
+        assert int(single.shape[0]) == 1
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+from FixedWireless.utils.ranking import RankKey, active_keys, encode, rank_order
+
+CCI = ['fiber_on_site', 'is_cci_power_available', 'if_no_cci_power_is_meter_avail', 'pt_id', 'score', 'antenna',
+       'revshare', 'Speed']
+
+# sort_values keys of the former output_dataframe_ranker branches
+LEGACY_KEYS = [
+    ({'cci_sites', 'ospi', 're_asd'}, CCI + ['fi_dist', 'fcc_cnt']),
+    ({'cci_sites', 're_mgt'}, CCI + ['fi_dist']),
+    ({'cci_sites', 'ospi'}, CCI + ['fcc_cnt']),
+    ({'cci_sites'}, CCI),
+    ({'ospi', 're_asd', 're_mgt'}, ['score', 'antenna', 'Speed', 'fi_dist', 'fcc_cnt']),
+    ({'ospi'}, ['score', 'antenna', 'Speed', 'fcc_cnt']),
+    ({'re_asd'}, ['antenna', 'Speed', 'fi_dist']),
+    ({'ospi_non_lit'}, ['antenna', 'Speed']),
+]
+
+DESCENDING = {'Clearance_Score', 'pt_id', 'revshare', 'Speed', 'fcc_cnt'}
+
+
+@pytest.fixture
+def candidates():
+    rng = np.random.default_rng(11)
+    rows = 5000
+    frame = pd.DataFrame({
+        'Clearance_Score': rng.choice(['Pass', 'Fail', None], rows),
+        'fiber_on_site': rng.choice([True, False], rows),
+        'is_cci_power_available': rng.choice(['Y', 'N', None], rows),
+        'if_no_cci_power_is_meter_avail': rng.choice(['Y', 'N'], rows),
+        'pt_id': rng.integers(0, 40, rows).astype(float),
+        'score': rng.integers(0, 10, rows),
+        'antenna': rng.choice([1, 2, 3], rows),
+        'revshare': rng.random(rows).round(2),
+        'Speed': rng.choice([500.0, 1000.0, 2000.0], rows),
+        'fi_dist': rng.random(rows) * 1000,
+        'fcc_cnt': rng.integers(0, 5, rows),
+    })
+    for field in ('pt_id', 'revshare', 'Speed', 'fi_dist'):
+        frame.loc[rng.random(rows) < 0.1, field] = np.nan
+    return frame
+
+
+def legacy_order(frame, keys):
+    ordered = frame.assign(_position=np.arange(len(frame))).sort_values(
+        [key.field for key in keys], ascending=[key.ascending for key in keys], kind='stable'
+    )
+    return ordered['_position'].to_numpy()
+
+
+class TestActiveKeys:
+
+    @pytest.mark.parametrize('types, expected', LEGACY_KEYS)
+    def test_matches_legacy_branches(self, types, expected):
+        keys = active_keys(types)
+
+        assert [key.field for key in keys] == expected
+        assert [key.ascending for key in keys] == [field not in DESCENDING for field in expected]
+
+    def test_google_clearance_leads(self):
+        keys = active_keys(['ospi'], google=True)
+
+        assert keys[0] == RankKey('Clearance_Score', False, google=True)
+        assert [key.field for key in keys[1:]] == ['score', 'antenna', 'Speed', 'fcc_cnt']
+
+
+class TestRankOrder:
+
+    def test_encode_missing_last(self):
+        codes, size = encode(pd.Series([3.0, np.nan, 1.0, 3.0]))
+        assert codes.tolist() == [1, 2, 0, 1] and size == 3
+
+        codes, _ = encode(pd.Series([3.0, np.nan, 1.0, 3.0]), ascending=False)
+        assert codes.tolist() == [0, 2, 1, 0]
+
+    @pytest.mark.parametrize('google', [False, True])
+    def test_matches_sort_values(self, candidates, google):
+        keys = active_keys(['cci_sites', 'ospi', 're_asd'], google=google)
+
+        assert rank_order(candidates, keys).tolist() == legacy_order(candidates, keys).tolist()
+
+    @pytest.mark.parametrize('top', [1, 20, 999, 5000, 6000])
+    def test_top_is_prefix_of_full_order(self, candidates, top):
+        keys = active_keys(['cci_sites', 'ospi', 're_asd'], google=True)
+
+        assert rank_order(candidates, keys, top).tolist() == rank_order(candidates, keys)[:top].tolist()
+
+    def test_top_with_ties_keeps_row_order(self):
+        frame = pd.DataFrame({'antenna': [2, 1, 1, 1, 2], 'Speed': [1.0, 5.0, 5.0, 5.0, 1.0]})
+        keys = active_keys([])
+
+        assert rank_order(frame, keys, 2).tolist() == [1, 2]
+
+    def test_top_beyond_composite_range(self):
+        rng = np.random.default_rng(3)
+        frame = pd.DataFrame({f"key{i}": rng.random(20000) for i in range(6)})
+        keys = [RankKey(f"key{i}", i % 2 == 0) for i in range(6)]
+
+        assert rank_order(frame, keys, 50).tolist() == legacy_order(frame, keys)[:50].tolist()
+
+    def test_empty(self, candidates):
+        assert rank_order(candidates, active_keys([]), 0).size == 0
+        assert rank_order(candidates.iloc[:0], active_keys([])).size == 0
@@ -0,0 +1,120 @@
+from time import time
+
+import pandas as pd
+import pytest
+from FixedWireless.utils.siklu import SIKLU_FIELDS, LinkBudgetCache, LinkBudgetClient
+
+
+def _link_budget_handler(failures=None, empty=()):
+    """
+    Link budget API stub: d_km echoes the candidate latitude so reports can be matched back to their candidate.
+    failures maps a latitude to the number of 503s served before it succeeds, latitudes in empty get {}.
+    """
+    failures = dict(failures or {})
+
+    def handler(path, query):
+        lat_s = float(query['lat_s'][0])
+        if failures.get(lat_s, 0) > 0:
+            failures[lat_s] -= 1
+            return 503, {}
+        if lat_s in empty:
+            return 200, {}
+        return 200, {
+            'antenna': 1, 'capacity': int(query['capacity'][0]), 'd_km': lat_s, 'link_margin': 3.2,
+            'model': query['model_name'][0], 'modulation': 'QPSK', 'oxygen_attenuation_km': 0.2,
+            'rain_attenuation_km': 4.1, 'rain_attenuation_total': 6.3, 'availability': float(query['availability'][0])
+        }
+
+    return handler
+
+
+@pytest.fixture
+def candidates():
+    return pd.DataFrame(
+        {'id': [f"c{i}" for i in range(12)], 'lat': [40.0 + i / 100 for i in range(12)], 'long': [-73.99] * 12},
+        index=range(100, 112)
+    )
+
+
+class TestLinkBudgetClient:
+
+    def test_aligned_to_candidates(self, stub_server, candidates):
+        server = stub_server(_link_budget_handler(), latency=0.1)
+
+        with LinkBudgetClient(url=server.url, max_workers=6, rate=1000) as client:
+            start = time()
+            reports = client.evaluate_many(candidates, 40.74, -73.99, 1000)
+            elapsed = time() - start
+
+        assert reports.index.equals(candidates.index)
+        assert list(reports.columns) == SIKLU_FIELDS + ['availability']
+        assert reports['d_km'].tolist() == candidates['lat'].tolist()
+        assert (reports['capacity'] == 1000).all()
+        # 12 requests of 100 ms on 6 workers
+        assert elapsed < 0.6
+        assert len(set(port for port, _, _ in server.requests)) <= 6
+
+    def test_retries_failures_and_empty_reports(self, stub_server, candidates):
+        server = stub_server(_link_budget_handler(failures={40.01: 2, 40.02: 10}, empty=(40.03,)))
+
+        with LinkBudgetClient(url=server.url, retries=2, backoff=0.01, rate=1000) as client:
+            reports = client.evaluate_many(candidates, 40.74, -73.99, 1000)
+
+        assert reports.loc[101, 'd_km'] == 40.01
+        assert reports.loc[[102, 103]].isna().all(axis=None)
+        assert reports['d_km'].notna().sum() == 10
+
+    def test_empty_candidates(self, candidates):
+        with LinkBudgetClient(url='http://127.0.0.1:9') as client:
+            reports = client.evaluate_many(candidates.iloc[:0], 40.74, -73.99, 1000)
+
+        assert reports.empty and list(reports.columns) == SIKLU_FIELDS
+
+
+class TestLinkBudgetCache:
+
+    def test_key_normalisation(self, tmp_path):
+        cache = LinkBudgetCache(str(tmp_path / 'siklu.sqlite'), precision=4)
+        client = LinkBudgetClient(url='http://127.0.0.1:9')
+
+        near = cache.key(client.parameters(40.7390831, -73.9913778, 40.74, -73.99, 1000))
+        same = cache.key(client.parameters(40.73908, -73.99138, 40.74, -73.99, 1000.0))
+        other = cache.key(client.parameters(40.73908, -73.99138, 40.74, -73.99, 2000))
+
+        assert near == same != other
+        cache.close()
+
+    def test_only_misses_are_requested(self, stub_server, candidates, tmp_path):
+        server = stub_server(_link_budget_handler(empty=(40.03,)))
+        filepath = str(tmp_path / 'siklu.sqlite')
+
+        cache = LinkBudgetCache(filepath)
+        with LinkBudgetClient(url=server.url, rate=1000, cache=cache) as client:
+            first = client.evaluate_many(candidates.iloc[:6], 40.74, -73.99, 1000)
+        cache.close()
+        assert len(server.requests) == 6
+
+        # reopened store, half the batch is known and a duplicated candidate is requested once
+        cache = LinkBudgetCache(filepath)
+        batch = pd.concat([candidates, candidates.iloc[[8]].set_axis([200])])
+        with LinkBudgetClient(url=server.url, rate=1000, cache=cache) as client:
+            second = client.evaluate_many(batch, 40.74, -73.99, 1000)
+
+        # 6 new candidates plus the empty response, which is not cached
+        assert len(server.requests) == 6 + 7
+        assert second.loc[first.index].equals(first)
+        assert second.loc[200, 'd_km'] == second.loc[108, 'd_km']
+        assert cache.stats['hits'] == 5 and cache.stats['misses'] == 7
+        cache.close()
+
+    def test_failures_are_not_cached(self, stub_server, candidates, tmp_path):
+        server = stub_server(_link_budget_handler(failures={40.0: 1}))
+        cache = LinkBudgetCache(str(tmp_path / 'siklu.sqlite'))
+
+        with LinkBudgetClient(url=server.url, rate=1000, retries=0, cache=cache) as client:
+            assert client.evaluate_many(candidates.iloc[:1], 40.74, -73.99, 1000).isna().all(axis=None)
+            assert client.evaluate(40.0, -73.99, 40.74, -73.99, 1000)['d_km'] == 40.0
+            assert client.evaluate(40.0, -73.99, 40.74, -73.99, 1000)['d_km'] == 40.0
+
+        assert len(server.requests) == 2
+        cache.close()
@@ -1 +1,4 @@
-__all__ = ['google', 'siklu', 'helpers', 'arcgis']
\ No newline at end of file
+__all__ = [
+    'google', 'siklu', 'helpers', 'arcgis', 'lazy', 'cache', 'geodesy', 'dem', 'clearance', 'http_client', 'link_budget',
+    'candidate_table', 'open_levels', 'ranking'
+]
\ No newline at end of file
@@ -0,0 +1,198 @@
+__all__ = ['DiskCache', 'DEFAULT_CACHE_DIR']
+
+import os
+import pickle
+import sqlite3
+import time
+from os import path
+from threading import RLock
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get('FW_CACHE_DIR', path.join(path.expanduser('~'), '.fixed_wireless'))
+
+_BATCH = 500  # keys per statement in the bulk operations, below SQLite's bound parameter limit
+
+
+class DiskCache:
+    """
+    Persistent key/value store in a local SQLite file. Values are pickled, entries expire after ttl seconds and the
+    least recently used entries are evicted once the stored payload exceeds max_bytes. A version token recorded with
+    the store lets callers drop everything when the data it was derived from changes (see invalidate). Lookups are
+    counted in hits & misses (see stats).
+    """
+
+    def __init__(self, filepath: str, max_bytes: int = 256 * 1024 ** 2, ttl: Optional[float] = 7 * 24 * 3600):
+        """
+        :param filepath: SQLite file, created (with parent folders) if missing
+        :param max_bytes: Upper bound on the summed size of stored payloads
+        :param ttl: Seconds an entry stays valid, None disables expiry
+        """
+        folder = path.dirname(path.abspath(filepath))
+        if not path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = RLock()
+        self._db = sqlite3.connect(filepath, check_same_thread=False, isolation_level=None)
+        self._db.execute('pragma journal_mode=wal')
+        self._db.execute(
+            'create table if not exists entries '
+            '(key text primary key, created real not null, accessed real not null, size integer not null, value blob)'
+        )
+        self._db.execute('create index if not exists entries_accessed on entries (accessed)')
+        self._db.execute('create table if not exists meta (name text primary key, value text)')
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('select created, value from entries where key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            created, value = row
+            if self._expired(created, now):
+                self._db.execute('delete from entries where key = ?', (key,))
+                self.misses += 1
+                return default
+            self._db.execute('update entries set accessed = ? where key = ?', (now, key))
+            self.hits += 1
+        return pickle.loads(value)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Bulk get: {key: value} for the keys present and unexpired, missing keys are left out.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found, expired = dict(), []
+        with self._lock:
+            for offset in range(0, len(keys), _BATCH):
+                batch = keys[offset:offset + _BATCH]
+                rows = self._db.execute(
+                    f"select key, created, value from entries where key in ({','.join('?' * len(batch))})", batch
+                )
+                for key, created, value in rows:
+                    if self._expired(created, now):
+                        expired.append((key,))
+                    else:
+                        found[key] = value
+            self._db.executemany('delete from entries where key = ?', expired)
+            self._db.executemany('update entries set accessed = ? where key = ?', [(now, key) for key in found])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: pickle.loads(value) for key, value in found.items()}
+
+    def set(self, key: str, value: Any) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                'insert or replace into entries (key, created, accessed, size, value) values (?, ?, ?, ?, ?)',
+                (key, now, now, len(payload), payload)
+            )
+            self.evict()
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """
+        Bulk set in one transaction, evicting once afterwards.
+        """
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, now, now, len(payload), payload))
+        with self._lock:
+            self._db.execute('begin')
+            try:
+                self._db.executemany(
+                    'insert or replace into entries (key, created, accessed, size, value) values (?, ?, ?, ?, ?)', rows
+                )
+            except Exception:
+                self._db.execute('rollback')
+                raise
+            self._db.execute('commit')
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute('delete from entries where key = ?', (key,))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute('select count(*) from entries').fetchone()[0]
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute('select coalesce(sum(size), 0) from entries').fetchone()[0]
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Lookups served (hits) and not (misses) since the store was opened, with the current entry count and size.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self), 'bytes': self.size
+        }
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently used entries until the store fits in max_bytes.
+
+        :return: Number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            if self.ttl is not None:
+                removed += self._db.execute('delete from entries where created < ?', (time.time() - self.ttl,)).rowcount
+
+            excess = self.size - self.max_bytes
+            if excess <= 0:
+                return removed
+
+            doomed = []
+            for key, size in self._db.execute('select key, size from entries order by accessed'):
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+            self._db.executemany('delete from entries where key = ?', doomed)
+        return removed + len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute('delete from entries')
+
+    def invalidate(self, version: str) -> bool:
+        """
+        Compare version with the token stored alongside the entries. When it differs every entry is dropped and the
+        new token recorded.
+
+        :return: True if the cache was cleared
+        """
+        with self._lock:
+            row = self._db.execute("select value from meta where name = 'version'").fetchone()
+            if row is not None and row[0] == version:
+                return False
+            self.clear()
+            self._db.execute("insert or replace into meta (name, value) values ('version', ?)", (version,))
+            return row is not None
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_MISSING = object()
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+__all__ = ['CandidateTable', 'DICTIONARY_COLUMNS', 'KEY_COLUMN', 'ARROW_AVAILABLE']
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from FixedWireless.utils import lazy
+
+pd = lazy.lazy_import('pandas')
+pa = lazy.lazy_import('pyarrow', hint='Install pyarrow for the Arrow backed candidate table.')
+pc = lazy.lazy_import('pyarrow.compute', hint='Install pyarrow for the Arrow backed candidate table.')
+
+# Low cardinality string columns, stored once per distinct value (Arrow dictionary arrays / pandas categoricals)
+DICTIONARY_COLUMNS = ('candidate_type', 'state', 'structure', 'city')
+
+# Join key, normalised to text when rows are added so candidates & ranking rows match whatever type ODW returned
+KEY_COLUMN = 'id'
+
+ARROW_AVAILABLE = lazy.is_available('pyarrow')
+
+_ROW = '__row'
+
+
+def _concat_tables(tables: list):
+    """
+    Concatenate tables whose columns may differ, missing columns are null filled and numeric types widened. A column
+    that is text in one table and numeric in another is stored as text, as a pandas concat would keep it as objects.
+    """
+    try:
+        return pa.concat_tables(tables, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        pass
+
+    types = dict()
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                types.setdefault(field.name, set()).add(field.type)
+    conflicting = {name for name, seen in types.items() if len(seen) > 1}
+
+    def as_text(table):
+        for position, field in enumerate(table.schema):
+            if field.name in conflicting:
+                column = table.column(position)
+                if pa.types.is_dictionary(column.type):
+                    column = column.cast(column.type.value_type)
+                table = table.set_column(position, field.name, column.cast(pa.string()))
+        return table
+
+    return pa.concat_tables([as_text(table) for table in tables], promote_options='permissive')
+
+
+def _dictionary_encode(table):
+    """
+    DICTIONARY_COLUMNS of a Table/RecordBatch held as plain strings (e.g. after null filling) dictionary encoded.
+    """
+    for position, field in enumerate(table.schema):
+        if field.name in DICTIONARY_COLUMNS and _is_text(field.type):
+            table = table.set_column(position, field.name, table.column(position).dictionary_encode())
+    return table
+
+
+def _is_text(data_type) -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+class CandidateTable:
+    """
+    Columnar candidate table shared by the IdentifyCandidates stages. Query results are added as record batches and
+    only stitched together when read, the key column is normalised to text once on the way in and low cardinality
+    string columns are dictionary encoded. Reads project just the columns a stage needs: with pyarrow the projection
+    and numpy views of numeric columns share the table's buffers, pandas frames are only built for the final stages
+    that need them. Without pyarrow the same interface is kept over pandas frames with categorical columns.
+    """
+
+    def __init__(self, pieces: Optional[list] = None, arrow: Optional[bool] = None):
+        """
+        :param pieces: pyarrow Tables / RecordBatches (arrow) or DataFrames (pandas) already normalised
+        :param arrow: Store rows in pyarrow, defaults to ARROW_AVAILABLE
+        """
+        self.arrow = ARROW_AVAILABLE if arrow is None else arrow
+        self._pieces = list(pieces or [])
+
+    @classmethod
+    def from_pandas(cls, frame: pd.DataFrame, arrow: Optional[bool] = None) -> 'CandidateTable':
+        table = cls(arrow=arrow)
+        table.append(frame)
+        return table
+
+    def _normalise(self, frame: pd.DataFrame):
+        if KEY_COLUMN in frame:
+            key = frame[KEY_COLUMN]
+            frame = frame.assign(**{KEY_COLUMN: key.astype(str).where(key.notna(), None)})
+
+        if not self.arrow:
+            return frame.astype({column: 'category' for column in DICTIONARY_COLUMNS if column in frame})
+
+        batch = pa.RecordBatch.from_pandas(frame, preserve_index=False)
+        return _dictionary_encode(batch.replace_schema_metadata(None))
+
+    def append(self, rows) -> None:
+        """
+        Add rows (DataFrame, or a pyarrow RecordBatch/Table already in table form) without copying what is stored.
+        Columns missing from earlier batches are null filled when the table is read.
+        """
+        if isinstance(rows, CandidateTable):
+            self._pieces.extend(rows._pieces)
+        elif self.arrow and not isinstance(rows, pd.DataFrame):
+            self._pieces.append(rows)
+        else:
+            self._pieces.append(self._normalise(rows))
+
+    @property
+    def table(self):
+        """
+        The rows as one pyarrow Table (arrow) or DataFrame (pandas). Batches are combined on first read and the
+        result kept, a table that has not grown since is returned as is.
+        """
+        if len(self._pieces) != 1 or (self.arrow and not isinstance(self._pieces[0], pa.Table)):
+            if self.arrow:
+                tables = [
+                    piece if isinstance(piece, pa.Table) else pa.Table.from_batches([piece]) for piece in self._pieces
+                ]
+                # one shared dictionary per column across the batches, which the hash join requires
+                combined = _dictionary_encode(_concat_tables(tables)).unify_dictionaries() if tables else pa.table({})
+            else:
+                combined = pd.concat(self._pieces, ignore_index=True, sort=False) if self._pieces else pd.DataFrame()
+                combined = combined.infer_objects().astype(
+                    {column: 'category' for column in DICTIONARY_COLUMNS if column in combined}
+                )
+            self._pieces = [combined]
+        return self._pieces[0]
+
+    def __len__(self) -> int:
+        return sum(piece.num_rows if self.arrow else len(piece) for piece in self._pieces)
+
+    @property
+    def columns(self) -> List[str]:
+        table = self.table
+        return list(table.column_names if self.arrow else table.columns)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns
+
+    @property
+    def nbytes(self) -> int:
+        table = self.table
+        return table.nbytes if self.arrow else int(table.memory_usage(deep=True).sum())
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        numpy array of one column. With pyarrow a single chunk numeric column without nulls is a view of the table's
+        buffer, dictionary columns are decoded.
+        """
+        if not self.arrow:
+            series = self.table[name]
+            return series.to_numpy(dtype=object) if isinstance(series.dtype, pd.CategoricalDtype) else series.to_numpy()
+
+        column = self.table.column(name)
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(column.type.value_type)
+        return column.to_numpy()
+
+    def select(self, columns: Sequence[str]) -> 'CandidateTable':
+        """
+        Projection on columns, with pyarrow the new table shares the column buffers.
+        """
+        if self.arrow:
+            return CandidateTable([self.table.select(list(columns))], arrow=True)
+        return CandidateTable([self.table[list(columns)]], arrow=False)
+
+    def filter(self, mask) -> 'CandidateTable':
+        mask = np.asarray(mask, dtype=bool)
+        if self.arrow:
+            return CandidateTable([self.table.filter(pa.array(mask))], arrow=True)
+        return CandidateTable([self.table[mask].reset_index(drop=True)], arrow=False)
+
+    def set_column(self, name: str, values) -> None:
+        """
+        Add or replace a column with len(self) values.
+        """
+        table = self.table
+        if not self.arrow:
+            table = table.assign(**{name: values})
+        else:
+            if not isinstance(values, (pa.Array, pa.ChunkedArray)):
+                values = pa.array(
+                    values.tolist() if isinstance(values, np.ndarray) and values.dtype == object else values
+                )
+            if name in DICTIONARY_COLUMNS and _is_text(values.type):
+                values = values.dictionary_encode()
+            if name in table.column_names:
+                table = table.set_column(table.column_names.index(name), name, values)
+            else:
+                table = table.append_column(name, values)
+        self._pieces = [table]
+
+    def fill_null(self, name: str, value) -> None:
+        if name not in self:
+            return
+        if not self.arrow:
+            self.set_column(name, self.table[name].fillna(value))
+            return
+
+        column = self.table.column(name)
+        if isinstance(value, float) and (pa.types.is_null(column.type) or pa.types.is_integer(column.type)):
+            column = column.cast(pa.float64())
+        self.set_column(name, pc.fill_null(column, value))
+
+    def groups(self, by: str, column: str = KEY_COLUMN) -> Dict[str, list]:
+        """
+        {value of by: [column values in row order]}, e.g. candidate ids per candidate_type.
+        """
+        keys, values = self.column(by), self.column(column)
+        groups = dict()
+        for key in dict.fromkeys(keys.tolist()):
+            groups[key] = values[keys == key].tolist()
+        return groups
+
+    def join(self, other: 'CandidateTable', on: str = KEY_COLUMN, suffix: str = '_Drop') -> 'CandidateTable':
+        """
+        Left join on the (text) key keeping this table's row order. Columns both tables carry keep this table's name
+        and get suffix on the other side, a key matching several rows of other repeats the row.
+        """
+        if not self.arrow:
+            joined = self.table.merge(other.table, how='left', on=on, sort=False, suffixes=('', suffix))
+            return CandidateTable([joined], arrow=False)
+
+        left = self.table.append_column(_ROW, pa.array(np.arange(self.table.num_rows)))
+        right = other.table
+        clashes = set(left.column_names) & set(right.column_names) - {on}
+        right = right.rename_columns([f"{name}{suffix}" if name in clashes else name for name in right.column_names])
+
+        joined = left.join(right, on, join_type='left outer', use_threads=True)
+        joined = joined.take(pc.sort_indices(joined.column(_ROW)))
+        columns = left.column_names[:-1] + [name for name in right.column_names if name != on]
+        return CandidateTable([joined.select(columns)], arrow=True)
+
+    def to_pandas(self, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame of columns (all by default), dictionary columns come back as categoricals.
+        """
+        table = self.table
+        if columns is not None:
+            table = table.select(list(columns)) if self.arrow else table[list(columns)]
+        return table.to_pandas() if self.arrow else table.copy()
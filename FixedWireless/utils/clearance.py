@@ -0,0 +1,112 @@
+__all__ = [
+    'DELETE_CLEARANCE', 'DEFAULT_FREQUENCY_GHZ', 'E_BAND_FREQUENCIES_GHZ', 'EFFECTIVE_EARTH_RADIUS_FACTOR',
+    'DEFAULT_FRESNEL_FRACTION', 'fresnel_radius', 'earth_bulge', 'clearances', 'min_clearances', 'classify',
+    'classify_paths'
+]
+
+from typing import Optional
+
+import numpy as np
+
+from FixedWireless.utils.geodesy import EARTH_RADIUS_M
+
+DELETE_CLEARANCE = -300  # minimum clearance (m) below which a candidate is removed instead of failed
+
+# Siklu E-band channels (71-76 & 81-86 GHz). The Fresnel zone is widest at the low end, which is the default.
+E_BAND_FREQUENCIES_GHZ = (71.0, 76.0, 81.0, 86.0)
+DEFAULT_FREQUENCY_GHZ = E_BAND_FREQUENCIES_GHZ[0]
+
+EFFECTIVE_EARTH_RADIUS_FACTOR = 4 / 3  # k for standard atmospheric refraction
+
+# share of the first Fresnel zone that has to be free of terrain for a path to count as line of sight
+DEFAULT_FRESNEL_FRACTION = 0.6
+
+
+def fresnel_radius(d1_km, d2_km, frequency_ghz: float = DEFAULT_FREQUENCY_GHZ) -> np.ndarray:
+    """
+    First Fresnel zone radius in metres at d1_km from one end and d2_km from the other, 17.32 * sqrt(d1 d2 / (f D)).
+    """
+    d1_km, d2_km = np.asarray(d1_km, dtype='float64'), np.asarray(d2_km, dtype='float64')
+    total = d1_km + d2_km
+    with np.errstate(invalid='ignore', divide='ignore'):
+        radius = 17.32 * np.sqrt(d1_km * d2_km / (frequency_ghz * total))
+    return np.where(total > 0, radius, 0.0)
+
+
+def earth_bulge(d1_m, d2_m, k: float = EFFECTIVE_EARTH_RADIUS_FACTOR, radius: float = EARTH_RADIUS_M) -> np.ndarray:
+    """
+    Height in metres the earth rises above the chord between two points at sea level, d1 d2 / (2 k R).
+    """
+    return np.asarray(d1_m, dtype='float64') * np.asarray(d2_m, dtype='float64') / (2 * k * radius)
+
+
+def clearances(profiles, heights, distances_km, target_heights=None, frequency_ghz: float = DEFAULT_FREQUENCY_GHZ,
+               k: Optional[float] = EFFECTIVE_EARTH_RADIUS_FACTOR,
+               fresnel_fraction: float = DEFAULT_FRESNEL_FRACTION) -> np.ndarray:
+    """
+    Clearance in metres of every sample on every path: the straight line between the antennas less the terrain, the
+    earth bulge and fresnel_fraction of the first Fresnel zone radius.
+
+    :param profiles: (n, samples) terrain elevations (m), evenly spaced from the candidate to the target, NaN unknown
+    :param heights: Scalar or (n,) antenna height (m) above the terrain at the candidate end
+    :param distances_km: Scalar or (n,) path lengths
+    :param target_heights: Scalar or (n,) antenna height at the target end, defaults to heights
+    :param frequency_ghz: Link frequency used for the Fresnel zone
+    :param k: Effective earth radius factor, None leaves curvature out
+    :param fresnel_fraction: Share of the first Fresnel zone that must be clear, 0 checks the straight line only
+    :return: (n, samples) clearances, the end points are 0 by construction
+    """
+    profiles = np.atleast_2d(np.asarray(profiles, dtype='float64'))
+    count, samples = profiles.shape
+    heights = np.broadcast_to(np.asarray(heights, dtype='float64'), (count,))
+    target_heights = heights if target_heights is None else np.broadcast_to(
+        np.asarray(target_heights, dtype='float64'), (count,)
+    )
+    distances_km = np.broadcast_to(np.asarray(distances_km, dtype='float64'), (count,))
+
+    fraction = np.linspace(0.0, 1.0, samples)
+    start = profiles[:, 0] + heights
+    end = profiles[:, -1] + target_heights
+    line = start[:, None] + (end - start)[:, None] * fraction
+
+    d1_km = distances_km[:, None] * fraction
+    d2_km = distances_km[:, None] - d1_km
+
+    obstruction = profiles
+    if k is not None:
+        obstruction = obstruction + earth_bulge(d1_km * 1000, d2_km * 1000, k)
+    if fresnel_fraction:
+        obstruction = obstruction + fresnel_fraction * fresnel_radius(d1_km, d2_km, frequency_ghz)
+
+    return line - obstruction
+
+
+def min_clearances(profiles, heights, distances_km, target_heights=None, **kwargs) -> np.ndarray:
+    """
+    Smallest clearance per path, NaN when any sample is unknown. Keyword arguments as clearances.
+    """
+    return clearances(profiles, heights, distances_km, target_heights, **kwargs).min(axis=1)
+
+
+def classify(min_clearance, delete_below: float = DELETE_CLEARANCE) -> np.ndarray:
+    """
+    'Pass' (clear), 'Fail' (obstructed), 'Delete' (obstructed by more than -delete_below metres) or 'No Data' (NaN).
+    """
+    min_clearance = np.asarray(min_clearance, dtype='float64')
+    return np.select(
+        [np.isnan(min_clearance), min_clearance < delete_below, min_clearance < 0],
+        ['No Data', 'Delete', 'Fail'],
+        default='Pass'
+    ).astype(object)
+
+
+def classify_paths(profiles, heights, distances_km, target_heights=None,
+                   frequency_ghz: float = DEFAULT_FREQUENCY_GHZ, k: Optional[float] = EFFECTIVE_EARTH_RADIUS_FACTOR,
+                   fresnel_fraction: float = DEFAULT_FRESNEL_FRACTION) -> np.ndarray:
+    """
+    Pass/Fail/Delete for every path in one call, see clearances for the arguments.
+    """
+    return classify(min_clearances(
+        profiles, heights, distances_km, target_heights,
+        frequency_ghz=frequency_ghz, k=k, fresnel_fraction=fresnel_fraction
+    ))
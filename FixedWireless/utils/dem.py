@@ -0,0 +1,277 @@
+__all__ = [
+    'DEM_EXTENSIONS', 'GeoTiff', 'ElevationModel', 'path_points', 'elevation_profiles', 'clearance_scores'
+]
+
+import glob
+import struct
+from os import path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from FixedWireless.utils import clearance, geodesy
+
+DEM_EXTENSIONS = ('.tif', '.tiff')
+
+# TIFF field type -> (struct code, size in bytes)
+_FIELD_TYPES = {
+    1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('I', 4), 5: ('II', 8), 6: ('b', 1), 7: ('B', 1), 8: ('h', 2),
+    9: ('i', 4), 10: ('ii', 8), 11: ('f', 4), 12: ('d', 8), 16: ('Q', 8), 17: ('q', 8)
+}
+
+# (SampleFormat, BitsPerSample) -> numpy kind
+_SAMPLE_DTYPES = {
+    (1, 8): 'u1', (1, 16): 'u2', (1, 32): 'u4', (2, 8): 'i1', (2, 16): 'i2', (2, 32): 'i4', (3, 32): 'f4', (3, 64): 'f8'
+}
+
+_IMAGE_WIDTH, _IMAGE_LENGTH, _BITS_PER_SAMPLE, _COMPRESSION = 256, 257, 258, 259
+_STRIP_OFFSETS, _SAMPLES_PER_PIXEL, _ROWS_PER_STRIP = 273, 277, 278
+_TILE_WIDTH, _TILE_LENGTH, _TILE_OFFSETS, _SAMPLE_FORMAT = 322, 323, 324, 339
+_MODEL_PIXEL_SCALE, _MODEL_TIEPOINT, _GEO_KEY_DIRECTORY, _GDAL_NODATA = 33550, 33922, 34735, 42113
+
+_GT_MODEL_TYPE_KEY, _GT_RASTER_TYPE_KEY = 1024, 1025
+_MODEL_TYPE_PROJECTED, _RASTER_PIXEL_IS_POINT = 1, 2
+
+
+def _read_ifd(handle, byte_order: str, offset: int, big: bool) -> Dict[int, tuple]:
+    count_format, entry_format, inline = ('Q', 'HHQ', 8) if big else ('H', 'HHI', 4)
+    handle.seek(offset)
+    count, = struct.unpack(byte_order + count_format, handle.read(struct.calcsize(count_format)))
+    entry_size = struct.calcsize(entry_format) + inline
+
+    tags = dict()
+    for _ in range(count):
+        entry = handle.read(entry_size)
+        tag, field_type, values = struct.unpack(byte_order + entry_format, entry[:-inline])
+        if field_type not in _FIELD_TYPES:
+            continue
+        code, size = _FIELD_TYPES[field_type]
+        length = size * values
+        if length <= inline:
+            data = entry[-inline:][:length]
+        else:
+            position = handle.tell()
+            handle.seek(struct.unpack(byte_order + ('Q' if big else 'I'), entry[-inline:])[0])
+            data = handle.read(length)
+            handle.seek(position)
+        if field_type == 2:
+            tags[tag] = (data.rstrip(b'\x00').decode('ascii', 'replace'),)
+        else:
+            tags[tag] = struct.unpack(byte_order + code * values, data)
+    return tags
+
+
+class GeoTiff:
+    """
+    Single band, uncompressed GeoTIFF (stripped or tiled, classic or BigTIFF) on a geographic (longitude/latitude)
+    grid, the layout DEM tiles are usually distributed in. The file is memory mapped and only the pixels touched by
+    sample / read_window are paged in, so tiles far larger than memory can be queried.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+
+        with open(filepath, 'rb') as handle:
+            header = handle.read(16)
+            byte_order = {b'II': '<', b'MM': '>'}.get(header[:2])
+            if byte_order is None:
+                raise ValueError(f"{filepath} is not a TIFF file")
+            magic, = struct.unpack(byte_order + 'H', header[2:4])
+            if magic == 42:
+                big, first_ifd = False, struct.unpack(byte_order + 'I', header[4:8])[0]
+            elif magic == 43:
+                big, first_ifd = True, struct.unpack(byte_order + 'Q', header[8:16])[0]
+            else:
+                raise ValueError(f"{filepath} is not a TIFF file")
+            tags = _read_ifd(handle, byte_order, first_ifd, big)
+
+        if tags.get(_COMPRESSION, (1,))[0] != 1:
+            raise ValueError(f"{filepath}: only uncompressed GeoTIFFs are supported (gdal_translate -co COMPRESS=NONE)")
+        if tags.get(_SAMPLES_PER_PIXEL, (1,))[0] != 1:
+            raise ValueError(f"{filepath}: only single band GeoTIFFs are supported")
+        if _MODEL_PIXEL_SCALE not in tags or _MODEL_TIEPOINT not in tags:
+            raise ValueError(f"{filepath}: missing ModelPixelScale/ModelTiepoint, rotated grids are not supported")
+
+        geo_keys = tags.get(_GEO_KEY_DIRECTORY, ())
+        geo_keys = dict((geo_keys[i], geo_keys[i + 3]) for i in range(4, len(geo_keys) - 3, 4))
+        if geo_keys.get(_GT_MODEL_TYPE_KEY) == _MODEL_TYPE_PROJECTED:
+            raise ValueError(f"{filepath}: projected DEMs are not supported, warp to EPSG:4326 first")
+
+        kind = _SAMPLE_DTYPES.get((tags.get(_SAMPLE_FORMAT, (1,))[0], tags[_BITS_PER_SAMPLE][0]))
+        if kind is None:
+            raise ValueError(f"{filepath}: unsupported sample type")
+        self.dtype = np.dtype(byte_order + kind)
+
+        self.width = tags[_IMAGE_WIDTH][0]
+        self.height = tags[_IMAGE_LENGTH][0]
+
+        if _TILE_OFFSETS in tags:
+            self._block_shape = (tags[_TILE_LENGTH][0], tags[_TILE_WIDTH][0])
+            self._block_offsets = np.asarray(tags[_TILE_OFFSETS], dtype='int64')
+        else:
+            self._block_shape = (tags.get(_ROWS_PER_STRIP, (self.height,))[0], self.width)
+            self._block_offsets = np.asarray(tags[_STRIP_OFFSETS], dtype='int64')
+        self._blocks_across = -(-self.width // self._block_shape[1])
+
+        scale_x, scale_y = tags[_MODEL_PIXEL_SCALE][:2]
+        tie_i, tie_j, _, tie_x, tie_y = tags[_MODEL_TIEPOINT][:5]
+        self.pixel_size = (scale_x, scale_y)
+        # model coordinates of the centre of pixel (0, 0)
+        centre = 0.0 if geo_keys.get(_GT_RASTER_TYPE_KEY) == _RASTER_PIXEL_IS_POINT else 0.5
+        self.origin = (tie_x + (centre - tie_i) * scale_x, tie_y - (centre - tie_j) * scale_y)
+
+        nodata = tags.get(_GDAL_NODATA, (None,))[0]
+        self.nodata = float(nodata) if nodata not in (None, '') else None
+
+        self._bytes = np.memmap(filepath, dtype='uint8', mode='r')
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        (west, south, east, north) of the pixel centres, the extent sample can interpolate within.
+        """
+        west, north = self.origin
+        return west, north - (self.height - 1) * self.pixel_size[1], west + (self.width - 1) * self.pixel_size[0], north
+
+    def contains(self, longitudes, latitudes) -> np.ndarray:
+        west, south, east, north = self.bounds
+        longitudes, latitudes = np.asarray(longitudes), np.asarray(latitudes)
+        return (longitudes >= west) & (longitudes <= east) & (latitudes >= south) & (latitudes <= north)
+
+    def _pixels(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        block_rows, block_cols = self._block_shape
+        blocks = (rows // block_rows) * self._blocks_across + cols // block_cols
+        offsets = self._block_offsets[blocks] + ((rows % block_rows) * block_cols + cols % block_cols) * self.dtype.itemsize
+        raw = self._bytes[offsets[..., None] + np.arange(self.dtype.itemsize)]
+        values = np.ascontiguousarray(raw).view(self.dtype)[..., 0].astype('float64')
+        if self.nodata is not None:
+            values[values == self.nodata] = np.nan
+        return values
+
+    def read_window(self, row_offset: int, col_offset: int, rows: int, cols: int) -> np.ndarray:
+        """
+        Pixel values of a rows x cols window as float64, nodata as NaN.
+        """
+        if row_offset < 0 or col_offset < 0 or row_offset + rows > self.height or col_offset + cols > self.width:
+            raise IndexError(f"window ({row_offset}, {col_offset}, {rows}, {cols}) outside {self.height}x{self.width}")
+        grid_rows, grid_cols = np.meshgrid(
+            np.arange(row_offset, row_offset + rows), np.arange(col_offset, col_offset + cols), indexing='ij'
+        )
+        return self._pixels(grid_rows, grid_cols)
+
+    def sample(self, longitudes, latitudes) -> np.ndarray:
+        """
+        Bilinearly interpolated elevations, NaN outside bounds or where a neighbouring pixel is nodata.
+        """
+        longitudes, latitudes = np.broadcast_arrays(
+            np.asarray(longitudes, dtype='float64'), np.asarray(latitudes, dtype='float64')
+        )
+        result = np.full(longitudes.shape, np.nan)
+        inside = self.contains(longitudes, latitudes)
+        if not inside.any():
+            return result
+
+        col = (longitudes[inside] - self.origin[0]) / self.pixel_size[0]
+        row = (self.origin[1] - latitudes[inside]) / self.pixel_size[1]
+        col0 = np.clip(np.floor(col).astype('int64'), 0, max(self.width - 2, 0))
+        row0 = np.clip(np.floor(row).astype('int64'), 0, max(self.height - 2, 0))
+        col1 = np.minimum(col0 + 1, self.width - 1)
+        row1 = np.minimum(row0 + 1, self.height - 1)
+        dx, dy = col - col0, row - row0
+
+        top = self._pixels(row0, col0) * (1 - dx) + self._pixels(row0, col1) * dx
+        bottom = self._pixels(row1, col0) * (1 - dx) + self._pixels(row1, col1) * dx
+        result[inside] = top * (1 - dy) + bottom * dy
+        return result
+
+
+class ElevationModel:
+    """
+    Mosaic of GeoTiff tiles. Points are sampled from the first tile (in the order given) that contains them.
+    """
+
+    def __init__(self, tiles: Iterable[GeoTiff]):
+        self.tiles: List[GeoTiff] = list(tiles)
+
+    @classmethod
+    def from_paths(cls, paths) -> 'ElevationModel':
+        """
+        :param paths: GeoTIFF file or folder path, or a list of them. Folders contribute every .tif/.tiff they contain
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+
+        files = []
+        for item in paths:
+            if path.isdir(item):
+                files.extend(sorted(
+                    filepath for filepath in glob.glob(path.join(item, '*'))
+                    if filepath.lower().endswith(DEM_EXTENSIONS)
+                ))
+            else:
+                files.append(item)
+
+        if not files:
+            raise FileNotFoundError(f"No GeoTIFF DEM tiles found in {paths}")
+        return cls(GeoTiff(filepath) for filepath in files)
+
+    def sample(self, longitudes, latitudes) -> np.ndarray:
+        longitudes, latitudes = np.broadcast_arrays(
+            np.asarray(longitudes, dtype='float64'), np.asarray(latitudes, dtype='float64')
+        )
+        result = np.full(longitudes.shape, np.nan)
+        pending = np.ones(longitudes.shape, dtype=bool)
+
+        for tile in self.tiles:
+            inside = pending & tile.contains(longitudes, latitudes)
+            if inside.any():
+                result[inside] = tile.sample(longitudes[inside], latitudes[inside])
+                pending &= ~inside
+            if not pending.any():
+                break
+        return result
+
+
+def path_points(lat1, lon1, lat2, lon2, samples: int = 200) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Evenly spaced points from (lat1, lon1) to (lat2, lon2), both ends included, as (n, samples) longitude & latitude
+    arrays. Interpolated linearly in degrees, which stays within centimetres of the great circle over search radii.
+    """
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype='float64')) for v in
+                                                   (lat1, lon1, lat2, lon2)])
+    fraction = np.linspace(0.0, 1.0, int(samples))
+    longitudes = lon1[:, None] + (lon2 - lon1)[:, None] * fraction
+    latitudes = lat1[:, None] + (lat2 - lat1)[:, None] * fraction
+    return longitudes, latitudes
+
+
+def elevation_profiles(model: ElevationModel, lat1, lon1, lat2, lon2, samples: int = 200) -> np.ndarray:
+    """
+    Terrain elevation (m) along every path in one pass, (n, samples). Offline equivalent of the Google elevation
+    path request made per candidate by google.get_elevation_path.
+    """
+    return model.sample(*path_points(lat1, lon1, lat2, lon2, samples))
+
+
+def clearance_scores(model: ElevationModel, lat, lon, target_lat, target_lon, height, samples: int = 200,
+                     frequency_ghz: float = clearance.DEFAULT_FREQUENCY_GHZ,
+                     k: Optional[float] = clearance.EFFECTIVE_EARTH_RADIUS_FACTOR,
+                     fresnel_fraction: float = clearance.DEFAULT_FRESNEL_FRACTION) -> np.ndarray:
+    """
+    'Pass' / 'Fail' / 'Delete' (or 'No Data' outside the DEM) for every candidate to target path, the same labels and
+    thresholds as google.get_elevation_path with the Fresnel zone and earth bulge taken into account (utils.clearance).
+
+    :param lat: Candidate latitudes
+    :param lon: Candidate longitudes
+    :param target_lat: Source site latitude
+    :param target_lon: Source site longitude
+    :param height: Mast height (m) applied at both ends, per candidate
+    :param frequency_ghz: Link frequency for the Fresnel zone
+    :param k: Effective earth radius factor, None ignores curvature
+    :param fresnel_fraction: Share of the first Fresnel zone that must be clear, 0 reproduces the straight line check
+    """
+    profiles = elevation_profiles(model, lat, lon, target_lat, target_lon, samples)
+    distances_km = geodesy.haversine(lon, lat, target_lon, target_lat) / 1000
+    return clearance.classify_paths(
+        profiles, height, distances_km, frequency_ghz=frequency_ghz, k=k, fresnel_fraction=fresnel_fraction
+    )
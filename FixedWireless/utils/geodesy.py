@@ -0,0 +1,225 @@
+__all__ = [
+    'WGS84_A', 'WGS84_F', 'EARTH_RADIUS_M', 'CARDINAL_DIRECTIONS', 'VERTEX_BUFFER',
+    'Rings', 'haversine', 'vincenty', 'rings_from_geojson', 'offset_rings', 'cardinal_vertices'
+]
+
+import json
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+WGS84_A = 6378137.0  # semi-major axis (m)
+WGS84_F = 1 / 298.257223563  # flattening
+EARTH_RADIUS_M = 6371008.8  # IUGG mean radius (m)
+
+CARDINAL_DIRECTIONS = ('N', 'S', 'E', 'W')
+
+# st_buffer distance applied to building footprints before their cardinal vertices are taken (see queries.py)
+VERTEX_BUFFER = -0.000012
+
+
+class Rings(NamedTuple):
+    """
+    Polygon exterior rings packed into one coordinate array: ring i is coords[offsets[i]:offsets[i + 1]]. Rings are
+    stored open (the closing vertex is dropped) and in the order they were read.
+    """
+    coords: np.ndarray  # (n, 2) x/y (longitude/latitude)
+    offsets: np.ndarray  # (m + 1,) int64
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def ring_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    @classmethod
+    def from_sequences(cls, rings) -> 'Rings':
+        """
+        :param rings: Iterable of [[x, y], ...] rings, closed or open
+        """
+        parts = []
+        for ring in rings:
+            ring = np.asarray(ring, dtype='float64').reshape(-1, 2)
+            if len(ring) > 1 and (ring[0] == ring[-1]).all():
+                ring = ring[:-1]
+            parts.append(ring)
+        offsets = np.zeros(len(parts) + 1, dtype='int64')
+        offsets[1:] = np.cumsum([len(part) for part in parts])
+        coords = np.concatenate(parts) if parts else np.empty((0, 2))
+        return cls(coords, offsets)
+
+
+def _radians(*values) -> List[np.ndarray]:
+    return np.broadcast_arrays(*[np.radians(np.asarray(value, dtype='float64')) for value in values])
+
+
+def haversine(lon1, lat1, lon2, lat2, radius: float = EARTH_RADIUS_M) -> np.ndarray:
+    """
+    Great circle distance in metres on a sphere, broadcast over array inputs.
+    """
+    lon1, lat1, lon2, lat2 = _radians(lon1, lat1, lon2, lat2)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * radius * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def vincenty(lon1, lat1, lon2, lat2, max_iterations: int = 200, tolerance: float = 1e-12) -> np.ndarray:
+    """
+    Distance in metres on the WGS84 ellipsoid (Vincenty's inverse formula), broadcast over array inputs. Agrees with
+    PostGIS st_distance(geography, geography) to well under a millimetre. The few nearly antipodal pairs the iteration
+    does not converge for fall back to haversine.
+    """
+    lon1, lat1, lon2, lat2 = _radians(lon1, lat1, lon2, lat2)
+    a, f = WGS84_A, WGS84_F
+    b = a * (1 - f)
+
+    u1 = np.arctan((1 - f) * np.tan(lat1))
+    u2 = np.arctan((1 - f) * np.tan(lat2))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(u1), np.cos(u1), np.sin(u2), np.cos(u2)
+
+    lon_delta = lon2 - lon1
+    lam = lon_delta
+    lam_previous = lam + 1
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(max_iterations):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # equatorial lines have cos2_alpha == 0
+            cos_2sm = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+
+            lam_previous = lam
+            lam = lon_delta + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sm + c * cos_sigma * (-1 + 2 * cos_2sm ** 2))
+            )
+            if np.all(np.abs(lam - lam_previous) < tolerance):
+                break
+
+        u_sq = cos2_alpha * (a ** 2 - b ** 2) / b ** 2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2sm + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sm ** 2)
+            - big_b / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sm ** 2)
+        ))
+        distance = b * big_a * (sigma - delta_sigma)
+
+    converged = np.abs(lam - lam_previous) < tolerance
+    if not np.all(converged):
+        distance = np.where(converged, distance, haversine(*np.degrees([lon1, lat1, lon2, lat2])))
+    return distance
+
+
+def rings_from_geojson(source) -> Tuple[Rings, list]:
+    """
+    Exterior rings and properties of the Polygon features in a GeoJSON file path, string or parsed object. Accepts a
+    FeatureCollection, a Feature, or (arbitrarily nested) lists of features such as postgis/Sample_GeoJson.json.
+
+    :return: (Rings, [feature properties, ...])
+    """
+    if isinstance(source, str):
+        if source.lstrip().startswith(('{', '[')):
+            source = json.loads(source)
+        else:
+            with open(source) as geojson:
+                source = json.load(geojson)
+
+    features = []
+
+    def collect(node):
+        if isinstance(node, list):
+            for item in node:
+                collect(item)
+        elif node.get('type') == 'FeatureCollection':
+            collect(node['features'])
+        elif node.get('type') == 'Feature' and (node.get('geometry') or {}).get('type') == 'Polygon':
+            features.append(node)
+
+    collect(source)
+    rings = Rings.from_sequences(feature['geometry']['coordinates'][0] for feature in features)
+    return rings, [feature.get('properties') for feature in features]
+
+
+def _neighbours(rings: Rings) -> Tuple[np.ndarray, np.ndarray]:
+    index = np.arange(len(rings.coords))
+    starts = np.repeat(rings.offsets[:-1], np.diff(rings.offsets))
+    sizes = np.repeat(np.diff(rings.offsets), np.diff(rings.offsets))
+    local = index - starts
+    return starts + (local - 1) % sizes, starts + (local + 1) % sizes
+
+
+def _signed_areas(coords: np.ndarray, rings: Rings) -> np.ndarray:
+    if not len(coords):
+        return np.zeros(len(rings))
+    _, following = _neighbours(rings)
+    cross = coords[:, 0] * coords[following, 1] - coords[following, 0] * coords[:, 1]
+    areas = np.add.reduceat(cross, rings.offsets[:-1].clip(max=len(cross) - 1)) / 2
+    return np.where(np.diff(rings.offsets) > 0, areas, 0.0)
+
+
+def offset_rings(rings: Rings, distance: float) -> Tuple[Rings, np.ndarray]:
+    """
+    Planar offset of every ring by distance (coordinate units, negative shrinks) with mitred joins. For a negative
+    distance this reproduces st_buffer at convex corners, which are the only candidates for a ring's extremities.
+
+    :return: (offset Rings, bool array flagging rings the offset collapsed)
+    """
+    coords = rings.coords
+    previous, following = _neighbours(rings)
+    areas = _signed_areas(coords, rings)
+    # outward normals are on the right of each edge for counter-clockwise rings
+    orientation = np.repeat(np.where(areas < 0, -1.0, 1.0), np.diff(rings.offsets))[:, None]
+
+    def outward_normals(start, end):
+        edge = end - start
+        length = np.hypot(edge[:, 0], edge[:, 1])[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.column_stack((edge[:, 1], -edge[:, 0])) / length * orientation
+
+    incoming = outward_normals(coords[previous], coords)
+    outgoing = outward_normals(coords, coords[following])
+    incoming = np.where(np.isfinite(incoming), incoming, outgoing)
+    outgoing = np.where(np.isfinite(outgoing), outgoing, incoming)
+
+    # mitre point: the offset edges meet at distance / cos(half the turning angle) along the bisector
+    denominator = np.clip(1 + (incoming * outgoing).sum(axis=1), 1e-9, None)[:, None]
+    shifted = Rings(coords + distance * (incoming + outgoing) / denominator, rings.offsets)
+
+    # a ring has collapsed when the offset turns it inside out (orientation flips) or reverses every one of its edges
+    shifted_areas = _signed_areas(shifted.coords, rings)
+    kept = ((shifted.coords[following] - shifted.coords) * (coords[following] - coords)).sum(axis=1) > 0
+    any_kept = np.zeros(len(rings), dtype=bool)
+    np.logical_or.at(any_kept, rings.ring_ids, kept)
+    collapsed = (np.sign(shifted_areas) != np.sign(areas)) | ~any_kept | (np.diff(rings.offsets) < 3)
+    return shifted, collapsed
+
+
+def cardinal_vertices(rings: Rings, buffer: float = VERTEX_BUFFER) -> np.ndarray:
+    """
+    Bulk equivalent of public.cc_cardinal_vertices_from_polygon(st_buffer(geom, buffer)): the northern-, southern-,
+    eastern- and western-most vertex of every buffered ring. Ties go to the first vertex in ring order.
+
+    :return: (rings, 4, 2) array ordered as CARDINAL_DIRECTIONS, NaN for rings the buffer collapsed
+    """
+    result = np.full((len(rings), 4, 2), np.nan)
+    if not len(rings.coords):
+        return result
+
+    shifted, collapsed = offset_rings(rings, buffer) if buffer else (rings, np.diff(rings.offsets) == 0)
+    x, y = shifted.coords[:, 0], shifted.coords[:, 1]
+    ring_ids = rings.ring_ids
+    non_empty = np.diff(rings.offsets) > 0
+    starts = rings.offsets[:-1][non_empty]
+
+    for position, key in enumerate((-y, y, -x, x)):
+        # lexsort is stable, so the first row of each ring's block is its extreme vertex with ties in ring order
+        order = np.lexsort((key, ring_ids))
+        result[non_empty, position] = shifted.coords[order[starts]]
+
+    result[collapsed] = np.nan
+    return result
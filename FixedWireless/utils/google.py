@@ -1,14 +1,39 @@
-import requests
+import logging
+from math import isnan
+from os import path
+from threading import RLock
+from typing import List, Optional, Sequence, Tuple
 
-__all__ = ['get_min_clearance', 'get_elevation_path', 'param_df_template']
+from FixedWireless.utils import lazy
+from FixedWireless.utils import http_client
+from FixedWireless.utils.cache import DiskCache, DEFAULT_CACHE_DIR
+
+requests = lazy.lazy_import('requests')
+np = lazy.lazy_import('numpy')
+clearance = lazy.lazy_import('FixedWireless.utils.clearance')
+geodesy = lazy.lazy_import('FixedWireless.utils.geodesy')
+dem = lazy.lazy_import('FixedWireless.utils.dem')
+
+__all__ = [
+    'get_min_clearance', 'get_min_clearances', 'clearance_label', 'clearance_labels', 'get_elevation_path',
+    'param_df_template', 'ElevationFetcher', 'ElevationCache', 'ELEVATION_URL'
+]
 
 API_KEY = ''
 
+ELEVATION_URL = 'https://maps.google.com/maps/api/elevation/json'
+
+# Elevation API statuses returned with HTTP 200 that are worth retrying
+RETRY_API_STATUSES = ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+
+ELEVATION_QUANTUM = 1e-4  # degrees (~11 m) sample positions are snapped to for the elevation cache
+ELEVATION_TILE = 0.01  # degrees (~1.1 km) per side of the tiles cached samples are grouped by
+
 
 def get_elevation_path(lat1, lon1, lat2, lon2, height, samples="200", sensor="false", debug=False):
     # Key is currently set to test - use gapi_key once enabled
 
-    url = f'https://maps.google.com/maps/api/elevation/json?path={str(lat1)},{str(lon1)}|{str(lat2)},{str(lon2)}&samples={samples}&sensor={sensor}&key={API_KEY}'
+    url = f'{ELEVATION_URL}?path={str(lat1)},{str(lon1)}|{str(lat2)},{str(lon2)}&samples={samples}&sensor={sensor}&key={API_KEY}'
     response = requests.get(url)
     # Results will be in JSON format - convert to dict using requests functionality
     response = response.json()
@@ -17,7 +42,11 @@ def get_elevation_path(lat1, lon1, lat2, lon2, height, samples="200", sensor="fa
         return elevation_array
     min_clearance = get_min_clearance(elevation_array, mast_height=height)
 
-    if min_clearance < -300:
+    return clearance_label(min_clearance)
+
+
+def clearance_label(min_clearance):
+    if min_clearance < clearance.DELETE_CLEARANCE:
         return 'Delete'
     elif min_clearance < 0:
         return 'Fail'
@@ -35,6 +64,237 @@ def get_min_clearance(elevation_path, mast_height):
     return min(clearance)
 
 
+def get_min_clearances(elevation_paths, mast_heights):
+    """
+    get_min_clearance for many equally sampled paths at once (straight line only, see utils.clearance for the
+    Fresnel zone & earth curvature aware version).
+
+    :param elevation_paths: (n, samples) terrain elevations, NaN where unknown
+    :param mast_heights: Scalar or (n,) mast heights applied at both ends of each path
+    :return: (n,) minimum clearances, NaN for paths with any unknown elevation
+    """
+    return clearance.min_clearances(elevation_paths, mast_heights, 0.0, k=None, fresnel_fraction=0)
+
+
+def clearance_labels(min_clearances):
+    """
+    clearance_label over an array, 'No Data' where the clearance is NaN.
+    """
+    return clearance.classify(min_clearances)
+
+
+class ElevationCache:
+    """
+    Persistent store of sampled terrain elevations. Sample positions are snapped to a quantum degree grid and grouped
+    into tile entries of a DiskCache, so a profile costs one lookup per tile it crosses and any path passing near
+    previously sampled points reuses them. Terrain does not go stale, entries only leave through the LRU size bound.
+    """
+
+    def __init__(self, filepath: Optional[str] = None, quantum: float = ELEVATION_QUANTUM,
+                 tile: float = ELEVATION_TILE, max_bytes: int = 64 * 1024 ** 2, ttl: Optional[float] = None):
+        """
+        :param filepath: SQLite file, defaults to <FW_CACHE_DIR>/elevation_cache.sqlite
+        :param quantum: Grid spacing in degrees, points closer than this share an elevation
+        :param tile: Tile side in degrees, a multiple of quantum
+        :param max_bytes: Size bound for the store, least recently used tiles are evicted first
+        :param ttl: Seconds a tile stays valid, None keeps tiles until they are evicted
+        """
+        self.quantum = quantum
+        self.cells_per_tile = max(int(round(tile / quantum)), 1)
+        self.store = DiskCache(
+            filepath or path.join(DEFAULT_CACHE_DIR, 'elevation_cache.sqlite'), max_bytes=max_bytes, ttl=ttl
+        )
+        self._lock = RLock()
+
+    def _tiles(self, lat, lon):
+        """
+        {tile key: [(position, cell), ...]} for the points lat/lon.
+        """
+        cells = np.stack([
+            np.round(np.asarray(lat, dtype='float64') / self.quantum),
+            np.round(np.asarray(lon, dtype='float64') / self.quantum)
+        ], axis=-1).astype('int64').reshape(-1, 2)
+
+        tiles = dict()
+        for position, (cell_lat, cell_lon) in enumerate(cells.tolist()):
+            key = f"{self.quantum}:{cell_lat // self.cells_per_tile}:{cell_lon // self.cells_per_tile}"
+            tiles.setdefault(key, []).append((position, (cell_lat, cell_lon)))
+        return tiles
+
+    def lookup(self, lat, lon) -> np.ndarray:
+        """
+        Cached elevations of the points lat/lon (same shape), NaN where the grid cell has not been sampled.
+        """
+        shape = np.shape(lat)
+        elevations = np.full(int(np.prod(shape)), np.nan)
+        for key, cells in self._tiles(lat, lon).items():
+            tile = self.store.get(key)
+            if tile is None:
+                continue
+            for position, cell in cells:
+                elevations[position] = tile.get(cell, np.nan)
+        return elevations.reshape(shape)
+
+    def update(self, lat, lon, elevations) -> None:
+        """
+        Store the elevations sampled at lat/lon, NaN values are skipped.
+        """
+        elevations = np.asarray(elevations, dtype='float64').ravel().tolist()
+        with self._lock:
+            for key, cells in self._tiles(lat, lon).items():
+                known = [(cell, elevations[position]) for position, cell in cells if not isnan(elevations[position])]
+                if not known:
+                    continue
+                tile = self.store.get(key) or dict()
+                tile.update(known)
+                self.store.set(key, tile)
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class ElevationFetcher:
+    """
+    Batched Elevation API client for the line of sight check. Path requests share one keep-alive session, run on a
+    bounded worker pool, are throttled by a token bucket shared by all workers and retried with exponential backoff.
+    Results come back in the order the paths were given, a path that still fails after its retries is logged and
+    returned as None (NaN in profiles). With an ElevationCache only the runs of samples missing from the cache are
+    requested, a path whose samples are all cached makes no request at all.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, url: str = ELEVATION_URL, max_workers: int = 8,
+                 rate: float = 50.0, burst: Optional[float] = None, retries: int = 3, backoff: float = 0.5,
+                 timeout=(5, 10), cache: Optional[ElevationCache] = None,
+                 logger: Optional[logging.Logger] = None):
+        """
+        :param api_key: Elevation API key, defaults to API_KEY
+        :param url: Elevation API endpoint
+        :param max_workers: Concurrent requests (and pooled connections)
+        :param rate: Requests per second across all workers
+        :param burst: Requests allowed back to back before rate applies, defaults to rate
+        :param retries: Retries per path after the first attempt
+        :param backoff: Base delay in seconds, doubled on every retry
+        :param timeout: requests (connect, read) timeout
+        :param cache: ElevationCache consulted before and filled after every request
+        """
+        self.api_key = API_KEY if api_key is None else api_key
+        self.url = url
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = http_client.TokenBucket(rate, burst)
+        self.session = http_client.pooled_session(max_workers)
+        self.cache = cache
+        self.logger = logger or logging.getLogger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _request(self, params: dict) -> List[float]:
+        payload = http_client.get_json(
+            self.session,
+            self.url,
+            params=dict(params, key=self.api_key),
+            timeout=self.timeout,
+            retries=self.retries,
+            backoff=self.backoff,
+            bucket=self.bucket,
+            retry_if=lambda result: result.get('status') in RETRY_API_STATUSES
+        )
+        if payload.get('status', 'OK') != 'OK':
+            raise ConnectionError(f"Elevation API returned {payload.get('status')}: {payload.get('error_message', '')}")
+        return [resultset['elevation'] for resultset in payload['results']]
+
+    def _request_span(self, latitudes, longitudes, start: int, stop: int) -> List[float]:
+        """
+        Elevations of the path samples start to stop (exclusive), a single sample as a location request.
+        """
+        if stop - start == 1:
+            params = {'locations': f"{latitudes[start]},{longitudes[start]}"}
+        else:
+            params = {
+                'path': f"{latitudes[start]},{longitudes[start]}|{latitudes[stop - 1]},{longitudes[stop - 1]}",
+                'samples': int(stop - start)
+            }
+        fetched = self._request(params)
+        if len(fetched) != stop - start:
+            raise ConnectionError(f"Elevation API returned {len(fetched)} samples, expected {stop - start}")
+        return fetched
+
+    def fetch_path(self, lat1, lon1, lat2, lon2, samples: int = 200) -> List[float]:
+        """
+        Elevations of samples evenly spaced points from (lat1, lon1) to (lat2, lon2).
+        """
+        if self.cache is None:
+            return self._request({'path': f"{lat1},{lon1}|{lat2},{lon2}", 'samples': int(samples)})
+
+        longitudes, latitudes = (points[0] for points in dem.path_points(lat1, lon1, lat2, lon2, samples))
+        elevations = self.cache.lookup(latitudes, longitudes)
+
+        missing = np.flatnonzero(np.isnan(elevations))
+        if len(missing):
+            # one request per contiguous run of missing samples, a run's evenly spaced samples line up with the
+            # profile's own so cached samples between runs are not requested again. Runs are fetched in turn, the
+            # paths themselves already run on fetch_paths' worker pool
+            failed = None
+            for run in np.split(missing, np.flatnonzero(np.diff(missing) > 1) + 1):
+                try:
+                    fetched = self._request_span(latitudes, longitudes, run[0], run[-1] + 1)
+                except Exception as error:
+                    failed = failed or error
+                    continue
+                elevations[run] = fetched
+                self.cache.update(latitudes[run], longitudes[run], fetched)
+            if failed is not None:
+                raise failed
+
+        return elevations.tolist()
+
+    def fetch_paths(self, paths: Sequence[Tuple[float, float, float, float]],
+                    samples: int = 200) -> List[Optional[List[float]]]:
+        """
+        fetch_path for every (lat1, lon1, lat2, lon2), concurrently. Failed paths are None.
+        """
+        results = http_client.run_concurrently(
+            lambda path: self.fetch_path(*path, samples=samples), paths, self.max_workers
+        )
+
+        for position, result in enumerate(results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Elevation path {position} failed: {result}")
+                results[position] = None
+        return results
+
+    def profiles(self, lat, lon, target_lat, target_lon, samples: int = 200):
+        """
+        (n, samples) elevations from every candidate to the target, NaN rows for failed paths.
+        """
+        lat, lon = np.atleast_1d(np.asarray(lat, dtype='float64')), np.atleast_1d(np.asarray(lon, dtype='float64'))
+        paths = [(cand_lat, cand_lon, target_lat, target_lon) for cand_lat, cand_lon in zip(lat.tolist(), lon.tolist())]
+
+        profiles = np.full((len(paths), int(samples)), np.nan)
+        for position, elevations in enumerate(self.fetch_paths(paths, samples)):
+            if elevations is not None and len(elevations) == int(samples):
+                profiles[position] = elevations
+        return profiles
+
+    def clearance_scores(self, lat, lon, target_lat, target_lon, height, samples: int = 200, **kwargs):
+        """
+        Pass/Fail/Delete ('No Data' for failed paths) per candidate, see utils.clearance.classify_paths for kwargs.
+        """
+        profiles = self.profiles(lat, lon, target_lat, target_lon, samples)
+        distances_km = geodesy.haversine(lon, lat, target_lon, target_lat) / 1000
+        return clearance.classify_paths(profiles, height, distances_km, **kwargs)
+
+
 def param_df_template(df):
 
     temp = dict()
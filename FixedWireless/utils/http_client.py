@@ -0,0 +1,125 @@
+__all__ = ['RETRY_STATUSES', 'TokenBucket', 'pooled_session', 'get_json', 'run_concurrently']
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Iterable, List, Optional
+
+from FixedWireless.utils import lazy
+
+requests = lazy.lazy_import('requests')
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Thread safe rate limiter: tokens refill at rate per second up to capacity and acquire blocks until one is
+    available, so any number of workers sharing a bucket stay under rate requests per second (after an initial burst
+    of up to capacity).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(self.rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens, sleeping until they are available. Returns the seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def pooled_session(max_connections: int = 8, headers: Optional[dict] = None):
+    """
+    requests.Session keeping up to max_connections keep-alive connections per host, enough for one per worker.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_json(session, url: str, params=None, timeout=(5, 10), retries: int = 3, backoff: float = 0.5,
+             bucket: Optional[TokenBucket] = None, retry_if: Optional[Callable[[object], bool]] = None):
+    """
+    GET url and decode the JSON body. Connection errors, timeouts, RETRY_STATUSES and payloads for which retry_if
+    returns True are retried after backoff * 2 ** attempt seconds (or the server's Retry-After).
+
+    :param session: requests.Session (see pooled_session)
+    :param url: Endpoint
+    :param params: Query string parameters
+    :param timeout: requests (connect, read) timeout
+    :param retries: Retries after the first attempt
+    :param backoff: Base delay in seconds
+    :param bucket: TokenBucket every attempt is taken from
+    :param retry_if: Predicate on the decoded payload flagging application level throttling
+    :raises ConnectionError: when every attempt failed
+    """
+    last_error = None
+
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+
+        delay = backoff * 2 ** attempt
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+            last_error = error
+        else:
+            if response.status_code in RETRY_STATUSES:
+                last_error = requests.exceptions.HTTPError(f"{response.status_code} from {url}", response=response)
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.replace('.', '', 1).isdigit():
+                    delay = max(delay, float(retry_after))
+            else:
+                response.raise_for_status()
+                payload = response.json()
+                if retry_if is None or not retry_if(payload):
+                    return payload
+                last_error = ValueError(f"{url} returned a retryable payload")
+
+        if attempt < retries:
+            time.sleep(delay)
+
+    raise ConnectionError(f"GET {url} failed after {retries + 1} attempts") from last_error
+
+
+def run_concurrently(function: Callable, items: Iterable, max_workers: int = 8) -> List[object]:
+    """
+    function(item) for every item on a bounded thread pool. Results are returned in input order, an item that raised
+    gets its exception in place of a result so one failure does not discard the rest of the batch.
+    """
+    items = list(items)
+
+    def guarded(item):
+        try:
+            return function(item)
+        except Exception as error:
+            return error
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [guarded(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='http') as executor:
+        return list(executor.map(guarded, items))
@@ -0,0 +1,110 @@
+__all__ = ['LazyModule', 'lazy_import', 'load', 'is_loaded', 'is_available', 'import_times']
+
+import importlib
+import importlib.util
+import sys
+import time
+from threading import RLock
+from types import ModuleType
+from typing import Dict, Optional
+
+_IMPORT_TIMES: Dict[str, float] = {}
+_IMPORT_LOCK = RLock()
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a heavy dependency (arcpy, arcgis, pandas, geopandas...) that performs the real import on first
+    attribute access. When attribute is supplied the proxy resolves to that member of the module instead, e.g.
+    lazy_import('arcgis.features', 'GeoAccessor').
+    """
+
+    def __init__(self, name: str, attribute: Optional[str] = None, hint: Optional[str] = None):
+        super().__init__(name if attribute is None else f"{name}.{attribute}")
+        self.__dict__['_lazy_module'] = name
+        self.__dict__['_lazy_attribute'] = attribute
+        self.__dict__['_lazy_hint'] = hint
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self):
+        target = self.__dict__['_lazy_target']
+        if target is not None:
+            return target
+
+        name = self.__dict__['_lazy_module']
+        with _IMPORT_LOCK:
+            if name not in sys.modules:
+                start = time.perf_counter()
+                try:
+                    module = importlib.import_module(name)
+                except ImportError as err:
+                    hint = self.__dict__['_lazy_hint']
+                    raise ImportError(f"{name} is required for this step. {hint or ''}".strip()) from err
+                _IMPORT_TIMES[name] = time.perf_counter() - start
+            else:
+                module = sys.modules[name]
+
+        attribute = self.__dict__['_lazy_attribute']
+        target = getattr(module, attribute) if attribute else module
+        self.__dict__['_lazy_target'] = target
+        return target
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._load(), key, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_target'] is not None else 'not loaded'
+        return f"<LazyModule {self.__name__} ({state})>"
+
+
+def lazy_import(name: str, attribute: Optional[str] = None, hint: Optional[str] = None) -> LazyModule:
+    """
+    Return a proxy for module *name* (or *name.attribute*) that is only imported when first used.
+
+    :param name: Fully qualified module name
+    :param attribute: Optional member of the module the proxy should resolve to
+    :param hint: Install hint appended to the ImportError raised if the module is missing
+    """
+    return LazyModule(name, attribute, hint)
+
+
+def load(module):
+    """
+    Force a LazyModule to import, returning the real module/attribute. Non-lazy objects are returned unchanged.
+    """
+    return module._load() if isinstance(module, LazyModule) else module
+
+
+def is_loaded(name: str) -> bool:
+    """
+    True if the module has already been imported by anything in the process (e.g. arcpy inside a GP tool host).
+    """
+    return name in sys.modules
+
+
+def is_available(name: str) -> bool:
+    """
+    True if the module can be imported, checked without importing it.
+    """
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def import_times() -> Dict[str, float]:
+    """
+    Seconds spent importing each module loaded through a LazyModule, in load order.
+    """
+    return dict(_IMPORT_TIMES)
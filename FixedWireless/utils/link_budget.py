@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+__all__ = [
+    'Radio', 'EQUIPMENT', 'RAIN_ZONES', 'DEFAULT_RAIN_RATE', 'oxygen_attenuation', 'water_vapour_attenuation',
+    'rain_coefficients', 'rain_specific_attenuation', 'rain_path_attenuation', 'free_space_loss', 'link_budgets',
+    'evaluate_many'
+]
+
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+from FixedWireless.utils import geodesy, lazy
+from FixedWireless.utils.siklu import SIKLU_FIELDS, DEFAULT_MODEL
+
+pd = lazy.lazy_import('pandas')
+
+
+class Radio(NamedTuple):
+    """
+    Link budget figures for one radio model. antennas are (size ft, gain dBi) ascending by size, modes are
+    (modulation, capacity Mbps, receiver sensitivity dBm) ascending by capacity.
+    """
+    frequency_ghz: float
+    tx_power_dbm: float
+    antennas: Tuple[Tuple[float, float], ...]
+    modes: Tuple[Tuple[str, float, float], ...]
+
+
+# Nominal datasheet figures, calibrate against recorded link budget API reports before relying on absolute capacities
+EQUIPMENT = {
+    'EtherHaul-8010F/FX': Radio(
+        frequency_ghz=73.5,
+        tx_power_dbm=10.0,
+        antennas=((1.0, 43.5), (2.0, 50.0)),
+        modes=(
+            ('BPSK 1/2', 1000.0, -68.0), ('QPSK 1/2', 2000.0, -65.0), ('QPSK 3/4', 3000.0, -62.0),
+            ('16QAM 1/2', 4000.0, -59.0), ('16QAM 3/4', 6000.0, -55.0), ('64QAM 3/4', 9000.0, -49.0),
+            ('64QAM 5/6', 10000.0, -46.0)
+        )
+    ),
+    'EtherHaul-2500F': Radio(
+        frequency_ghz=73.5,
+        tx_power_dbm=10.0,
+        antennas=((1.0, 43.5), (2.0, 50.0)),
+        modes=(
+            ('BPSK 1/2', 250.0, -74.0), ('QPSK 1/2', 500.0, -71.0), ('QPSK 3/4', 750.0, -68.0),
+            ('16QAM 1/2', 1000.0, -65.0), ('16QAM 3/4', 1500.0, -61.0), ('64QAM 3/4', 2000.0, -56.0),
+            ('64QAM 5/6', 2500.0, -53.0)
+        )
+    ),
+}
+
+# ITU-R P.837-1 rain climatic zones, rain rate (mm/h) exceeded 0.01% of an average year
+RAIN_ZONES = {
+    'A': 8.0, 'B': 12.0, 'C': 15.0, 'D': 19.0, 'E': 22.0, 'F': 28.0, 'G': 30.0, 'H': 32.0, 'J': 35.0, 'K': 42.0,
+    'L': 60.0, 'M': 63.0, 'N': 95.0, 'P': 145.0, 'Q': 115.0
+}
+DEFAULT_RAIN_RATE = RAIN_ZONES['K']  # north eastern United States
+
+# ITU-R P.838-3 regression coefficients: (a_j, b_j, c_j, m, c) for log10(k) and alpha
+_RAIN_COEFFICIENTS = {
+    'kh': ((-5.33980, -0.35351, -0.23789, -0.94158), (-0.10008, 1.26970, 0.86036, 0.64552),
+           (1.13098, 0.45400, 0.15354, 0.16817), -0.18961, 0.71147),
+    'kv': ((-3.80595, -3.44965, -0.39902, 0.50167), (0.56934, -0.22911, 0.73042, 1.07319),
+           (0.81061, 0.51059, 0.11899, 0.27195), -0.16398, 0.63297),
+    'ah': ((-0.14318, 0.29591, 0.32177, -5.37610, 16.1721), (1.82442, 0.77564, 0.63773, -0.96230, -3.29980),
+           (-0.55187, 0.19822, 0.13164, 1.47828, 3.43990), 0.67849, -1.95537),
+    'av': ((-0.07771, 0.56727, -0.20238, -48.2991, 48.5833), (2.33840, 0.95545, 1.14520, 0.791669, 0.791459),
+           (-0.76284, 0.54039, 0.26809, 0.116226, 0.116479), -0.053739, 0.83433),
+}
+
+
+def oxygen_attenuation(frequency_ghz, pressure_hpa: float = 1013.25, temperature_c: float = 15.0) -> np.ndarray:
+    """
+    Dry air specific attenuation (dB/km), ITU-R P.676 Annex 2 approximation for 63 - 350 GHz (covers E-band).
+    """
+    f = np.asarray(frequency_ghz, dtype='float64')
+    if np.any((f < 63) | (f > 350)):
+        raise ValueError('oxygen_attenuation covers 63 - 350 GHz')
+    rp, rt = pressure_hpa / 1013.25, 288.0 / (273.0 + temperature_c)
+
+    lines = (
+        2e-4 * rt ** 1.5 * (1 - 1.2e-5 * f ** 1.5)
+        + 4 / ((f - 63) ** 2 + 1.5 * rp ** 2 * rt ** 5)
+        + 0.28 * rt ** 2 / ((f - 118.75) ** 2 + 2.84 * rp ** 2 * rt ** 2)
+    )
+    return lines * f ** 2 * rp ** 2 * 1e-3
+
+
+def water_vapour_attenuation(frequency_ghz, density_g_m3: float = 7.5, pressure_hpa: float = 1013.25,
+                             temperature_c: float = 15.0) -> np.ndarray:
+    """
+    Water vapour specific attenuation (dB/km), ITU-R P.676 Annex 2 approximation.
+    """
+    f = np.asarray(frequency_ghz, dtype='float64')
+    rho = density_g_m3
+    rp, rt = pressure_hpa / 1013.25, 288.0 / (273.0 + temperature_c)
+    eta1 = 0.955 * rp * rt ** 0.68 + 0.006 * rho
+    eta2 = 0.735 * rp * rt ** 0.5 + 0.0353 * rt ** 4 * rho
+
+    def g(line):
+        return 1 + ((f - line) / (f + line)) ** 2
+
+    lines = (
+        3.98 * eta1 * np.exp(2.23 * (1 - rt)) / ((f - 22.235) ** 2 + 9.42 * eta1 ** 2) * g(22.0)
+        + 11.96 * eta1 * np.exp(0.7 * (1 - rt)) / ((f - 183.31) ** 2 + 11.14 * eta1 ** 2)
+        + 0.081 * eta1 * np.exp(6.44 * (1 - rt)) / ((f - 321.226) ** 2 + 6.29 * eta1 ** 2)
+        + 3.66 * eta1 * np.exp(1.6 * (1 - rt)) / ((f - 325.153) ** 2 + 9.22 * eta1 ** 2)
+        + 25.37 * eta1 * np.exp(1.09 * (1 - rt)) / (f - 380) ** 2
+        + 17.4 * eta1 * np.exp(1.46 * (1 - rt)) / (f - 448) ** 2
+        + 844.6 * eta1 * np.exp(0.17 * (1 - rt)) / (f - 557) ** 2 * g(557.0)
+        + 290 * eta1 * np.exp(0.41 * (1 - rt)) / (f - 752) ** 2 * g(752.0)
+        + 8.3328e4 * eta2 * np.exp(0.99 * (1 - rt)) / (f - 1780) ** 2 * g(1780.0)
+    )
+    return lines * f ** 2 * rt ** 2.5 * rho * 1e-4
+
+
+def _regression(name: str, log_f: np.ndarray) -> np.ndarray:
+    a, b, c, m, intercept = _RAIN_COEFFICIENTS[name]
+    a, b, c = np.array(a), np.array(b), np.array(c)
+    return (a * np.exp(-((log_f[..., None] - b) / c) ** 2)).sum(axis=-1) + m * log_f + intercept
+
+
+def rain_coefficients(frequency_ghz, pol: str = 'v') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ITU-R P.838-3 k and alpha for horizontal ('h') or vertical ('v') polarisation on a horizontal path.
+    """
+    if pol not in ('h', 'v'):
+        raise ValueError(f"pol must be 'h' or 'v', got {pol!r}")
+    log_f = np.log10(np.asarray(frequency_ghz, dtype='float64'))
+    return 10 ** _regression('k' + pol, log_f), _regression('a' + pol, log_f)
+
+
+def rain_specific_attenuation(frequency_ghz, rain_rate, pol: str = 'v') -> np.ndarray:
+    """
+    Rain specific attenuation k R^alpha (dB/km) at rain_rate (mm/h).
+    """
+    k, alpha = rain_coefficients(frequency_ghz, pol)
+    return k * np.asarray(rain_rate, dtype='float64') ** alpha
+
+
+def rain_path_attenuation(distance_km, frequency_ghz, rain_rate=DEFAULT_RAIN_RATE, availability: float = 99.9,
+                          pol: str = 'v') -> np.ndarray:
+    """
+    Rain attenuation (dB) exceeded for 100 - availability % of the year over distance_km, ITU-R P.530-17 section 2.4.1:
+    path reduction factor applied to the 0.01% specific attenuation, scaled to the required percentage (0.001 - 1%).
+
+    :param distance_km: Scalar or (n,) path lengths
+    :param frequency_ghz: Link frequency (>= 10 GHz)
+    :param rain_rate: Rain rate (mm/h) exceeded 0.01% of the time, see RAIN_ZONES
+    :param availability: Required availability (%)
+    :param pol: 'h' or 'v'
+    """
+    d = np.maximum(np.asarray(distance_km, dtype='float64'), 1e-3)
+    f = float(frequency_ghz)
+    rain_rate = np.asarray(rain_rate, dtype='float64')
+    _, alpha = rain_coefficients(f, pol)
+
+    denominator = 0.477 * d ** 0.633 * rain_rate ** (0.073 * alpha) * f ** 0.123 - 10.579 * (1 - np.exp(-0.024 * d))
+    with np.errstate(divide='ignore'):
+        reduction = np.where(denominator > 0, np.minimum(1 / denominator, 2.5), 2.5)
+    a001 = rain_specific_attenuation(f, rain_rate, pol) * d * reduction
+
+    p = np.clip(100.0 - availability, 0.001, 1.0)
+    c0 = 0.12 + 0.4 * np.log10((f / 10) ** 0.8) if f >= 10 else 0.12
+    c1 = 0.07 ** c0 * 0.12 ** (1 - c0)
+    c2 = 0.855 * c0 + 0.546 * (1 - c0)
+    c3 = 0.139 * c0 + 0.043 * (1 - c0)
+    return a001 * c1 * p ** -(c2 + c3 * np.log10(p))
+
+
+def free_space_loss(distance_km, frequency_ghz) -> np.ndarray:
+    return 92.45 + 20 * np.log10(frequency_ghz) + 20 * np.log10(np.maximum(distance_km, 1e-3))
+
+
+def link_budgets(lat_s, lon_s, lat_d, lon_d, capacity, model_name: str = DEFAULT_MODEL, availability: float = 99.9,
+                 spare: float = 2.0, pol: str = 'v', rain_rate=DEFAULT_RAIN_RATE,
+                 water_vapour_density: float = 7.5) -> Dict[str, np.ndarray]:
+    """
+    Link budget for every candidate (lat_s, lon_s) to the target (lat_d, lon_d) in one pass. For each antenna the
+    fastest mode whose fade margin at the availability's rain attenuation is at least spare dB is found, then the
+    smallest antenna reaching capacity is picked (the largest when none does).
+
+    :param capacity: Required capacity (Mbps)
+    :param model_name: Key of EQUIPMENT
+    :param availability: Required availability (%)
+    :param spare: Fade margin (dB) kept in reserve
+    :param pol: 'h' or 'v'
+    :param rain_rate: Scalar or (n,) 0.01% rain rate (mm/h)
+    :param water_vapour_density: Surface water vapour density (g/m3) for gaseous attenuation
+    :return: SIKLU_FIELDS as (n,) arrays. capacity & modulation are NaN/None when no mode closes the link, link_margin
+             is then the (negative) margin of the slowest mode
+    """
+    radio = EQUIPMENT[model_name]
+    f = radio.frequency_ghz
+    d_km = np.atleast_1d(geodesy.haversine(lon_s, lat_s, lon_d, lat_d)) / 1000
+    count = len(d_km)
+
+    oxygen_km = float(oxygen_attenuation(f))
+    gaseous = (oxygen_km + float(water_vapour_attenuation(f, water_vapour_density))) * d_km
+    rain_km = np.broadcast_to(rain_specific_attenuation(f, rain_rate, pol), (count,))
+    rain_total = np.broadcast_to(rain_path_attenuation(d_km, f, rain_rate, availability, pol), (count,))
+
+    sizes, gains = (np.array(column) for column in zip(*radio.antennas))
+    modulations, capacities, sensitivities = zip(*radio.modes)
+    capacities, sensitivities = np.array(capacities), np.array(sensitivities)
+
+    # (n, antennas) received level at the rain fade, (n, antennas, modes) margin over each mode's sensitivity
+    faded = radio.tx_power_dbm + 2 * gains - (free_space_loss(d_km, f) + gaseous + rain_total)[:, None]
+    margins = faded[:, :, None] - sensitivities
+    closes = margins >= spare
+
+    best = len(capacities) - 1 - np.argmax(closes[:, :, ::-1], axis=-1)
+    best = np.where(closes.any(axis=-1), best, -1)
+    best_capacity = np.where(best >= 0, capacities[best], np.nan)
+
+    meets = best_capacity >= float(capacity)
+    antenna = np.where(meets.any(axis=1), np.argmax(meets, axis=1), len(sizes) - 1)
+
+    rows = np.arange(count)
+    mode = best[rows, antenna]
+    link_margin = margins[rows, antenna, np.maximum(mode, 0)]
+
+    return {
+        'antenna': sizes[antenna],
+        'capacity': best_capacity[rows, antenna],
+        'd_km': d_km,
+        'link_margin': link_margin,
+        'model': np.full(count, model_name, dtype=object),
+        'modulation': np.array([modulations[m] if m >= 0 else None for m in mode.tolist()], dtype=object),
+        'oxygen_attenuation_km': np.full(count, oxygen_km),
+        'rain_attenuation_km': np.array(rain_km, dtype='float64'),
+        'rain_attenuation_total': np.array(rain_total, dtype='float64'),
+    }
+
+
+def evaluate_many(candidates: pd.DataFrame, lat_d, lon_d, capacity, **kwargs) -> pd.DataFrame:
+    """
+    Offline counterpart of siklu.LinkBudgetClient.evaluate_many: link_budgets for the lat/long columns of candidates,
+    indexed like candidates with SIKLU_FIELDS columns. Keyword arguments as link_budgets.
+    """
+    if candidates.empty:
+        return pd.DataFrame(columns=SIKLU_FIELDS, index=candidates.index)
+    fields = link_budgets(
+        candidates['lat'].to_numpy(dtype='float64'), candidates['long'].to_numpy(dtype='float64'),
+        lat_d, lon_d, capacity, **kwargs
+    )
+    return pd.DataFrame(fields, index=candidates.index, columns=SIKLU_FIELDS)
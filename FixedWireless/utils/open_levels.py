@@ -0,0 +1,101 @@
+__all__ = ['LEVEL_PATTERN', 'DEFAULT_TX_AGL', 'MOUNT_OFFSET', 'Intervals', 'parse', 'tx_agl']
+
+import re
+from typing import NamedTuple
+
+import numpy as np
+
+from FixedWireless.utils import lazy
+
+pd = lazy.lazy_import('pandas')
+
+# One open level, a range "30 - 115" or a single height "115", units (FT) are ignored
+LEVEL_PATTERN = r'(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?'
+
+DEFAULT_TX_AGL = 30.0  # ft, used for sites without open_levels or with a value that holds no heights
+
+MOUNT_OFFSET = 5.0  # ft the mount sits below the top of an open level
+
+
+class Intervals(NamedTuple):
+    """
+    Open levels of every site in compressed rows: the intervals of site i are lower/upper[offsets[i]:offsets[i + 1]],
+    in the order they appear in the text. Sites without a parsable level have none.
+    """
+    lower: np.ndarray
+    upper: np.ndarray
+    offsets: np.ndarray
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+def parse(values) -> Intervals:
+    """
+    Every open_levels value as intervals in one pass. Each distinct value is matched once and its intervals gathered
+    for the sites sharing it, NULL, None, NaN and values without heights yield no intervals.
+
+    Example value: 30 - 115 FT , 117 - 125 FT , 129 - 150 FT -> [30, 115], [117, 125], [129, 150]
+
+    :param values: open_levels column (Series, array or list)
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    if not len(uniques):
+        return Intervals(np.empty(0), np.empty(0), np.zeros(len(codes) + 1, dtype='int64'))
+
+    pattern = re.compile(LEVEL_PATTERN)
+    matches = [pattern.findall(str(value)) for value in uniques.tolist()]
+    levels = [level for value in matches for level in value]
+    unique_lower = np.array([low for low, _ in levels], dtype='float64')
+    unique_upper = np.array([high or low for low, high in levels], dtype='float64')
+    unique_lower, unique_upper = np.minimum(unique_lower, unique_upper), np.maximum(unique_lower, unique_upper)
+
+    unique_counts = np.fromiter(map(len, matches), dtype='int64', count=len(matches))
+    unique_starts = np.cumsum(unique_counts) - unique_counts
+
+    parsed = codes >= 0
+    codes = np.where(parsed, codes, 0)
+    counts = np.where(parsed, unique_counts[codes], 0)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype('int64')
+
+    # position of every site interval in the per distinct value arrays
+    gather = np.repeat(unique_starts[codes] - offsets[:-1], counts) + np.arange(offsets[-1])
+    return Intervals(unique_lower[gather], unique_upper[gather], offsets)
+
+
+def tx_agl(open_levels, required=None, offset: float = MOUNT_OFFSET, default: float = DEFAULT_TX_AGL) -> np.ndarray:
+    """
+    Best mount height (ft) per site. A mount fits anywhere in an open level up to offset below its top. Without a
+    required height that is the highest mount available, with one the lowest mount at or above it, or the highest
+    mount when none reaches it. Levels count in any order, so the highest level wins even when it is not listed last
+    (the former parser took the top of the last range).
+
+    :param open_levels: Intervals from parse, or the open_levels column itself
+    :param required: Scalar or per site clearance height (ft) the mount has to reach, NaN for no requirement
+    :param offset: Distance (ft) between the top of an open level and the highest mount in it
+    :param default: TX AGL of sites without open levels
+    :return: (sites,) TX AGL
+    """
+    intervals = open_levels if isinstance(open_levels, Intervals) else parse(open_levels)
+    counts = intervals.counts
+    result = np.full(len(counts), default, dtype='float64')
+
+    parsed = counts > 0
+    if not parsed.any():
+        return result
+    starts = intervals.offsets[:-1][parsed]
+
+    top = intervals.upper - offset
+    bottom = np.minimum(intervals.lower, top)
+    highest = np.maximum.reduceat(top, starts)
+    if required is None:
+        result[parsed] = highest
+        return result
+
+    required = np.broadcast_to(np.asarray(required, dtype='float64'), counts.shape)
+    mounts = np.maximum(bottom, np.repeat(required, counts))
+    mounts[~(mounts <= top)] = np.inf  # level ends below the requirement (or no requirement)
+    lowest = np.minimum.reduceat(mounts, starts)
+    result[parsed] = np.where(np.isfinite(lowest), lowest, highest)
+    return result
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+__all__ = ['RankKey', 'RANK_KEYS', 'active_keys', 'encode', 'rank_order']
+
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from FixedWireless.utils import lazy
+
+pd = lazy.lazy_import('pandas')
+
+_COMPOSITE_LIMIT = 2 ** 62  # largest range of a composite key held in one int64
+
+
+class RankKey(NamedTuple):
+    """
+    One sort key of the final candidate ranking.
+
+    :param field: Output column
+    :param ascending: Smaller values rank first
+    :param types: Candidate types of which at least one has to be present for the key to apply, empty for always
+    :param google: Only applies when the Google elevation check ran
+    """
+    field: str
+    ascending: bool = True
+    types: Tuple[str, ...] = ()
+    google: bool = False
+
+
+# In priority order. CCI site attributes only exist when CCI sites were found, score comes from the CCI site & lit
+# building rankings, fi_dist from the real estate rankings and fcc_cnt from the lit building ranking.
+RANK_KEYS = (
+    RankKey('Clearance_Score', False, google=True),
+    RankKey('fiber_on_site', True, ('cci_sites',)),
+    RankKey('is_cci_power_available', True, ('cci_sites',)),
+    RankKey('if_no_cci_power_is_meter_avail', True, ('cci_sites',)),
+    RankKey('pt_id', False, ('cci_sites',)),
+    RankKey('score', True, ('cci_sites', 'ospi')),
+    RankKey('antenna', True),
+    RankKey('revshare', False, ('cci_sites',)),
+    RankKey('Speed', False),
+    RankKey('fi_dist', True, ('re_asd', 're_mgt')),
+    RankKey('fcc_cnt', False, ('ospi',)),
+)
+
+
+def active_keys(candidate_types: Iterable[str], google: bool = False,
+                keys: Sequence[RankKey] = RANK_KEYS) -> List[RankKey]:
+    """
+    keys that apply to a result holding candidate_types, in priority order.
+    """
+    present = set(candidate_types)
+    return [
+        key for key in keys
+        if (google or not key.google) and (not key.types or present.intersection(key.types))
+    ]
+
+
+def encode(values, ascending: bool = True) -> Tuple[np.ndarray, int]:
+    """
+    Dense int64 codes ordering values the way the key ranks them, missing values last in either direction.
+
+    :return: (codes, number of distinct codes)
+    """
+    codes, uniques = pd.factorize(values, sort=True)
+    size = len(uniques)
+    codes = codes.astype('int64')
+    if not ascending:
+        codes = np.where(codes >= 0, size - 1 - codes, codes)
+    codes[codes < 0] = size
+    return codes, size + 1
+
+
+def _fold(encoded: List[Tuple[np.ndarray, int]]) -> np.ndarray:
+    """
+    Encoded keys folded into one int64 key that orders rows the same way as all of them in priority order, the key
+    so far is re-encoded densely whenever the next one would overflow it.
+    """
+    composite, span = np.zeros(len(encoded[0][0]), dtype='int64'), 1
+    for codes, size in encoded:
+        if span * size >= _COMPOSITE_LIMIT:
+            composite, span = encode(composite)
+        composite, span = composite * size + codes, span * size
+    return composite
+
+
+def rank_order(frame: pd.DataFrame, keys: Sequence[RankKey], top: Optional[int] = None) -> np.ndarray:
+    """
+    Row positions of frame in rank order. The keys are encoded as integer codes, folded into one composite key and
+    that is sorted stably, so rows tied on every key keep their order as with DataFrame.sort_values. With top only the
+    best top rows are returned: np.argpartition finds the top-th composite value and only the rows at or above it are
+    ordered.
+
+    :param frame: Candidates, one row each
+    :param keys: RankKeys in priority order, see active_keys
+    :param top: Number of rows to return, all by default
+    """
+    rows = len(frame)
+    if top is not None and top <= 0:
+        return np.empty(0, dtype='int64')
+    if not keys or not rows:
+        return np.arange(rows if top is None else min(top, rows))
+
+    composite = _fold([encode(frame[key.field], key.ascending) for key in keys])
+    if top is None or top >= rows:
+        return np.argsort(composite, kind='stable')
+
+    threshold = composite[np.argpartition(composite, top - 1)[top - 1]]
+    selected = np.flatnonzero(composite <= threshold)  # rows tied with the top-th one included, in row order
+    return selected[np.argsort(composite[selected], kind='stable')[:top]]
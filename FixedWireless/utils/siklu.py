@@ -1,9 +1,20 @@
-__all__ = ['SIKLU_FIELDS', 'DEFAULT_MODEL', 'link_budget_api']
+from __future__ import annotations
+
+__all__ = [
+    'SIKLU_FIELDS', 'DEFAULT_MODEL', 'LINK_BUDGET_URL', 'LinkBudgetCache', 'LinkBudgetClient', 'link_budget_api'
+]
 
-import time
 import json
-import requests
-from requests.exceptions import Timeout
+import logging
+from os import path
+from typing import Dict, List, Optional
+
+from FixedWireless.utils import lazy
+from FixedWireless.utils import http_client
+from FixedWireless.utils.cache import DiskCache, DEFAULT_CACHE_DIR
+
+requests = lazy.lazy_import('requests')
+pd = lazy.lazy_import('pandas')
 
 SIKLU_FIELDS = [
     'antenna', 'capacity', 'd_km', 'link_margin', 'model', 'modulation', 'oxygen_attenuation_km',
@@ -12,50 +23,208 @@ SIKLU_FIELDS = [
 
 DEFAULT_MODEL = 'EtherHaul-8010F/FX'
 
+LINK_BUDGET_URL = 'https://siklulinkbudgetapi2.herokuapp.com/api/v1/calculate/link_capacity'
 
-def link_budget_api(calling_object, model_name, row_series):
 
-    siklu_url = 'https://siklulinkbudgetapi2.herokuapp.com/api/v1/calculate/link_capacity'
+class LinkBudgetCache:
+    """
+    Local store of link budget API reports keyed by the normalised request parameters, coordinates rounded to
+    precision decimal places. The reports are deterministic in those parameters, so a tower to site pair already
+    evaluated is never requested again while its entry lasts. Backed by DiskCache (SQLite, TTL + LRU size bound), whose
+    hit/miss counters are exposed through stats.
+    """
 
-    parameters = {
-     "model_name": model_name,
-     "lat_s": row_series.lat,
-     "lon_s": row_series.long,
-     "lat_d": calling_object.latitude,
-     "lon_d": calling_object.longitude,
-     "availability": 99.9,
-     "capacity": calling_object.min_speed,
-     "spare": 2,
-     "pol": 'v'
-    }
+    def __init__(self, filepath: Optional[str] = None, precision: int = 4, ttl: Optional[float] = 30 * 24 * 3600,
+                 max_bytes: int = 64 * 1024 ** 2):
+        """
+        :param filepath: SQLite file, defaults to <FW_CACHE_DIR>/link_budget_cache.sqlite
+        :param precision: Decimal places coordinates are rounded to in the key (4 ~ 11 m)
+        :param ttl: Seconds a report stays valid, bounds how long a change to the API's model goes unnoticed
+        :param max_bytes: Size bound for the store, least recently used reports are evicted first
+        """
+        self.precision = precision
+        self.store = DiskCache(
+            filepath or path.join(DEFAULT_CACHE_DIR, 'link_budget_cache.sqlite'), max_bytes=max_bytes, ttl=ttl
+        )
 
-    attempts = 0
-    request_rxd = False
-    request = None
+    def key(self, parameters: dict) -> str:
+        normalised = dict()
+        for name, value in parameters.items():
+            if name in ('lat_s', 'lon_s', 'lat_d', 'lon_d'):
+                value = round(float(value), self.precision) + 0.0  # + 0.0 folds -0.0 into 0.0
+            elif isinstance(value, str):
+                value = value.strip().lower()
+            elif value is not None:
+                value = float(value)
+            normalised[name] = value
+        return json.dumps(normalised, sort_keys=True)
 
-    while (attempts <= 5) and (request_rxd is False):
+    def get_many(self, keys: List[str]) -> Dict[str, dict]:
+        return self.store.get_many(keys)
 
-        try:
+    def set_many(self, reports: Dict[str, dict]) -> None:
+        self.store.set_many(reports)
 
-            request = requests.get(siklu_url, params=parameters, timeout=(5, 10))
-            request_rxd = True
-            attempts += 1
+    @property
+    def stats(self) -> Dict[str, float]:
+        return self.store.stats
 
-        except Timeout as TO:
-            attempts += 1
-            request = None
-            calling_object.logger.error(
-                f"Siklu link budget api call for record ID:{row_series.id} timeout {attempts} of 5"
-            )
-            time.sleep(3)
+    def close(self) -> None:
+        self.store.close()
 
-    if not request_rxd:
-        raise ConnectionError('Siklu Budget API Request Timed Out')
 
-    result = json.loads(request.content)
-    if result:
+class LinkBudgetClient:
+    """
+    Batched Siklu link budget API client. Candidates are evaluated concurrently over one keep-alive session, throttled
+    by a shared token bucket and retried with exponential backoff (a worker waiting out its backoff does not hold up
+    the others). Reports are collected column by column and returned as one DataFrame aligned to the candidates. With
+    a LinkBudgetCache only the candidates missing from it are requested, once per distinct request.
+    """
+
+    def __init__(self, url: str = LINK_BUDGET_URL, model_name: str = DEFAULT_MODEL, max_workers: int = 8,
+                 rate: float = 20.0, burst: Optional[float] = None, retries: int = 5, backoff: float = 0.5,
+                 timeout=(5, 10), availability: float = 99.9, spare: int = 2, pol: str = 'v',
+                 cache: Optional[LinkBudgetCache] = None, logger: Optional[logging.Logger] = None):
+        """
+        :param url: Link budget endpoint
+        :param model_name: Siklu radio model evaluated
+        :param max_workers: Concurrent requests (and pooled connections)
+        :param rate: Requests per second across all workers
+        :param burst: Requests allowed back to back before rate applies, defaults to rate
+        :param retries: Retries per candidate after the first attempt
+        :param backoff: Base delay in seconds, doubled on every retry
+        :param timeout: requests (connect, read) timeout
+        :param availability: Required link availability (%)
+        :param spare: Spare fade margin (dB)
+        :param pol: Polarisation, 'v' or 'h'
+        :param cache: LinkBudgetCache consulted before and filled after the requests
+        """
+        self.url = url
+        self.model_name = model_name
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.availability = availability
+        self.spare = spare
+        self.pol = pol
+        self.bucket = http_client.TokenBucket(rate, burst)
+        self.session = http_client.pooled_session(max_workers)
+        self.cache = cache
+        self.logger = logger or logging.getLogger(__name__)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self) -> None:
+        self.session.close()
+
+    def parameters(self, lat_s, lon_s, lat_d, lon_d, capacity) -> dict:
+        return {
+            'model_name': self.model_name,
+            'lat_s': lat_s,
+            'lon_s': lon_s,
+            'lat_d': lat_d,
+            'lon_d': lon_d,
+            'availability': self.availability,
+            'capacity': capacity,
+            'spare': self.spare,
+            'pol': self.pol
+        }
+
+    def _request(self, parameters: dict) -> Optional[dict]:
+        result = http_client.get_json(
+            self.session,
+            self.url,
+            params=parameters,
+            timeout=self.timeout,
+            retries=self.retries,
+            backoff=self.backoff,
+            bucket=self.bucket
+        )
+        return result or None
+
+    def evaluate(self, lat_s, lon_s, lat_d, lon_d, capacity) -> Optional[dict]:
+        """
+        Link report for one candidate (lat_s, lon_s) to the target (lat_d, lon_d), None when the API returns nothing.
+
+        :raises ConnectionError: when every attempt failed
+        """
+        result = self._evaluate([self.parameters(lat_s, lon_s, lat_d, lon_d, capacity)])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-        calling_object.siklu_api_responses = calling_object.siklu_api_responses.append(result, ignore_index=True)
-        return
+    def _evaluate(self, requests_parameters: List[dict]) -> List[object]:
+        """
+        Report (dict), None (empty response) or the exception raised for every request, served from the cache where
+        possible. Identical requests are only sent once and only reports are cached.
+        """
+        if self.cache is None:
+            return http_client.run_concurrently(self._request, requests_parameters, self.max_workers)
+
+        keys = [self.cache.key(parameters) for parameters in requests_parameters]
+        known = self.cache.get_many(keys)
+
+        pending = dict()
+        for key, parameters in zip(keys, requests_parameters):
+            if key not in known:
+                pending.setdefault(key, parameters)
+
+        fetched = dict(zip(pending, http_client.run_concurrently(self._request, pending.values(), self.max_workers)))
+        self.cache.set_many({key: result for key, result in fetched.items() if isinstance(result, dict)})
+        known.update(fetched)
+
+        return [known[key] for key in keys]
+
+    def evaluate_many(self, candidates: pd.DataFrame, lat_d, lon_d, capacity) -> pd.DataFrame:
+        """
+        evaluate every candidate concurrently.
+
+        :param candidates: DataFrame with lat, long & id columns
+        :param lat_d: Target latitude
+        :param lon_d: Target longitude
+        :param capacity: Minimum capacity requested
+        :return: Link reports indexed like candidates, SIKLU_FIELDS first followed by any other fields the API returned.
+                 Candidates without a report (failed after retries or empty response) are all NaN
+        """
+        results = self._evaluate([
+            self.parameters(lat_s, lon_s, lat_d, lon_d, capacity)
+            for lat_s, lon_s in zip(candidates['lat'].tolist(), candidates['long'].tolist())
+        ])
+
+        columns: Dict[str, List[object]] = {field: [None] * len(results) for field in SIKLU_FIELDS}
+        for position, (candidate_id, result) in enumerate(zip(candidates['id'].tolist(), results)):
+            if isinstance(result, Exception):
+                self.logger.error(f"Siklu link budget api call for record ID:{candidate_id} failed: {result}")
+                continue
+            if not result:
+                self.logger.warning(f'No siklu API response for ID: {candidate_id}')
+                continue
+            for field, value in result.items():
+                columns.setdefault(field, [None] * len(results))[position] = value
+
+        return pd.DataFrame(columns, index=candidates.index)
+
+
+def link_budget_api(calling_object, model_name, row_series):
+    """
+    Single candidate link budget, appended to calling_object.siklu_api_responses. Kept for callers evaluating one row
+    at a time, LinkBudgetClient.evaluate_many is the batch path.
+    """
+    with LinkBudgetClient(model_name=model_name, max_workers=1, logger=calling_object.logger) as client:
+        result = client.evaluate(
+            row_series.lat, row_series.long, calling_object.latitude, calling_object.longitude,
+            calling_object.min_speed
+        )
+
+    if result:
+        calling_object.siklu_api_responses = pd.concat(
+            [calling_object.siklu_api_responses, pd.DataFrame([result])], ignore_index=True
+        )
     else:
         calling_object.logger.warning(f'No siklu API response for ID: {row_series.id}')